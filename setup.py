@@ -13,7 +13,7 @@ setup(
     packages=find_packages("src"),
     package_dir={"": "src"},
     install_requires=[
-        'simpy',
+        'simpy>=4.1,<4.2',  # the fast engine uses internals of SimPy, see PyCh.core.fast
         'dataclasses',
         'numpy',
         'matplotlib'
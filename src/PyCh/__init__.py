@@ -1,28 +1,82 @@
 #! usr/bin/python3
+"""
+PyCh: Chi-style processes, channels and select statements on top of SimPy.
+
+Importing PyCh does not import matplotlib. The plot utilities (LivePlot, LiveStepPlot, draw_lot_time_diagram,
+plt and matplotlib) are imported when they are first used, e.g. PyCh.LivePlot(), or by "from PyCh import *",
+which gives them as before. In a Jupyter notebook the nbagg backend is used, elsewhere the backend is left
+to matplotlib.
+
+"""
 ver = "2.1"
 # ===================================
 # import core
 # ===================================
-from .core.channel import Channel, CommunicationEvent, Sender, Receiver
+from .core.channel import Channel, CommunicationEvent, Sender, Receiver, SendPort, ReceivePort, ChannelStatistics
+from .core.selection import Select
+from .core.buffer import Buffer
+from .core.streams import RandomStream
+from .core.statistics import Tally, TimeWeighted, BatchMeans, confidence_interval
+from .core.trace import Trace
+from .core.sink import ResultSink, SinkReader
 from .core.environment import Environment, process, selected
+from .core.deadlock import DeadlockError
+from .core.lines import Line
+from .core.partition import PartitionedModel, Link
+from .core.realtime import RealTime
+
+# ===================================
+# import experiments
+# ===================================
+from .experiments import replicate, replicate_until, Replications, sweep, compare_scenarios, Comparison
 
 # ===================================
 # import math utilities
 # ===================================
 from math import *
+import math as _math
 from dataclasses import dataclass
 from numpy import random
 import numpy
-numpy.seterr(divide='ignore')
 
 # ===================================
-# import plot utilities
+# import plot utilities (when first used)
 # ===================================
-import matplotlib
-from matplotlib import pyplot as plt
-matplotlib.use('nbagg')
-from .utilities.liveplot import LivePlot, LiveStepPlot
-from .utilities.draw_lot_time_diagram import draw_lot_time_diagram
+plot_utilities = {
+    # name: (module, attribute of the module, or None for the module itself)
+    "matplotlib": ("matplotlib", None),
+    "plt": ("matplotlib.pyplot", None),
+    "LivePlot": ("PyCh.utilities.liveplot", "LivePlot"),
+    "LiveStepPlot": ("PyCh.utilities.liveplot", "LiveStepPlot"),
+    "draw_lot_time_diagram": ("PyCh.utilities.draw_lot_time_diagram", "draw_lot_time_diagram"),
+}
+
+
+def __getattr__(name):
+    """ Imports a plot utility when it is first used"""
+    if name not in plot_utilities:
+        raise AttributeError(f"module 'PyCh' has no attribute {name!r}")
+    from importlib import import_module
+    from .utilities import use_notebook_backend
+    use_notebook_backend()
+    module_name, attribute = plot_utilities[name]
+    module = import_module(module_name)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
 
-# Finished
-print(f"PyCh version {ver} imported succesfully.\n ")
+# "from PyCh import *" gives the names below, the functions and constants of math (as "from math import *"),
+# and the plot utilities (which are then imported)
+__all__ = [
+    "ver",
+    # core
+    "Channel", "CommunicationEvent", "Sender", "Receiver", "SendPort", "ReceivePort", "ChannelStatistics",
+    "Select", "Buffer", "RandomStream", "Tally", "TimeWeighted", "BatchMeans", "confidence_interval", "Trace",
+    "ResultSink", "SinkReader", "Environment", "process", "selected", "DeadlockError", "Line",
+    "PartitionedModel", "Link", "RealTime",
+    # experiments
+    "replicate", "replicate_until", "Replications", "sweep", "compare_scenarios", "Comparison",
+    # math utilities
+    "dataclass", "random", "numpy",
+] + [name for name in dir(_math) if not name.startswith("_")] + list(plot_utilities)
@@ -0,0 +1,228 @@
+"""
+A Buffer stores entities between two channels: it receives entities from an input channel,
+and sends the stored entities over an output channel.
+
+A Buffer can be used instead of a buffer process, e.g.:
+
+    @process
+    def Buffer(env, c_in, c_out):
+        xs = []
+        while True:
+            sending = c_out.send(xs[0]) if len(xs)>0 else None
+            receiving = c_in.receive()
+            x = yield env.select(sending, receiving)
+            if selected(receiving):
+                xs = xs + [x]
+            if selected(sending):
+                xs = xs[1:]
+
+is replaced by Buffer(env, c_in, c_out).
+
+The Buffer is not a process: it has a persistent receiver at the input channel and a persistent sender at the
+output channel, and no generator, select statements or list copies. It does behave as the buffer process above:
+it registers its receiver (if it is not full) and its sender (if it is not empty) as the alternatives of a select
+statement, of which it chooses one at random if both can communicate at once. After a communication, it makes its
+next choice at the moment the buffer process would continue (one event later), so with a FIFO discipline and an
+unlimited capacity, a model gives exactly the same results with either buffer, also with parallel servers.
+
+The order in which entities leave the buffer is set by its discipline:
+
+- "fifo": first in, first out (default)
+- "lifo": last in, first out
+- "priority": the entity with the lowest key first, ties are broken FIFO
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+from collections import deque
+from heapq import heappush, heappop
+from itertools import count
+from simpy.events import Event, URGENT
+from .channel import Sender, Receiver, schedule_event
+from .statistics import TimeWeighted
+
+
+# ==========================================================
+# Buffer
+# ==========================================================
+class Buffer:
+    """ A buffer between an input and an output channel, with optional capacity.
+
+    The buffer keeps time-weighted occupancy statistics.
+    """
+
+    def __init__(self, env, c_in, c_out, capacity=None, discipline="fifo", key=None):
+        """
+
+        :param env: the simulation environment in which this buffer operates
+        :param c_in: the channel over which entities are received
+        :param c_out: the channel over which entities are sent
+        :param capacity: the maximum number of stored entities, None for an unlimited capacity
+        :param discipline: the order in which entities leave the buffer, one of "fifo" (default), "lifo" or "priority"
+        :param key: for the "priority" discipline, a function which gives the key of an entity (default: the entity itself)
+        """
+        if capacity is not None and capacity < 1:
+            raise ValueError('The capacity of a buffer must be at least 1.')
+        if discipline not in ("fifo", "lifo", "priority"):
+            raise ValueError(
+                f'Unknown discipline {discipline!r}, choose one of "fifo", "lifo" or "priority".'
+            )
+        self.env = env  # The simulation environment in which this buffer operates
+        self.c_in = c_in  # The channel over which entities are received
+        self.c_out = c_out  # The channel over which entities are sent
+        self.capacity = capacity  # The maximum number of stored entities (None is unlimited)
+        self.discipline = discipline  # The order in which entities leave the buffer
+        self.key = key  # The key of an entity, for the priority discipline
+        self.store = [] if discipline == "priority" else deque()  # The stored entities
+        self.arrival_number = count()  # used to break ties between equal keys in FIFO order
+
+        # statistics
+        self.count_in = 0  # the number of received entities
+        self.count_out = 0  # the number of sent entities
+        self.contents = TimeWeighted(env, 0)  # the number of stored entities over time
+
+        self.receiver = BufferReceiver(env, c_in, self)  # the receiver of this buffer at the input channel
+        self.sender = BufferSender(env, c_out, self)  # the sender of this buffer at the output channel
+        if getattr(env, "tracer", None) is not None:
+            # the buffer communicates itself, so it is a process in the trace
+            self.receiver.process_number = self.sender.process_number = env.tracer.process_number(self)
+        self.schedule_update(priority=URGENT)  # as a process, the buffer starts with an urgent event
+
+    def __len__(self):
+        return len(self.store)
+
+    @property
+    def occupancy(self):
+        """ The current number of stored entities"""
+        return len(self.store)
+
+    @property
+    def mean_occupancy(self):
+        """ The time-weighted mean number of stored entities since the buffer was created
+
+        :return: the mean occupancy
+        :rtype: float
+        """
+        return self.contents.mean
+
+    @property
+    def max_occupancy(self):
+        """ The maximum number of stored entities since the buffer was created"""
+        return self.contents.max
+
+    def head(self):
+        """ Gets the entity which leaves the buffer first
+
+        :return: the first entity
+        """
+        if self.discipline == "fifo":
+            return self.store[0]
+        elif self.discipline == "lifo":
+            return self.store[-1]
+        else:
+            return self.store[0][2]
+
+    def put(self, entity):
+        """ Stores an entity which is received by the buffer
+
+        :param entity: the received entity
+        """
+        if self.discipline == "priority":
+            key = entity if self.key is None else self.key(entity)
+            heappush(self.store, (key, next(self.arrival_number), entity))
+        else:
+            self.store.append(entity)
+        self.count_in += 1
+        self.contents.update(len(self.store))
+
+    def take(self):
+        """ Removes the entity which is sent by the buffer"""
+        if self.discipline == "fifo":
+            self.store.popleft()
+        elif self.discipline == "lifo":
+            self.store.pop()
+        else:
+            heappop(self.store)
+        self.count_out += 1
+        self.contents.update(len(self.store))
+
+    def schedule_update(self, hop=False, priority=None):
+        """ Schedules the next update of the buffer, at the moment a buffer process would continue
+
+        :param hop: if true, the update follows a zero-delay hop (as a process which has received)
+        :param priority: the priority of the update event, if it is not the default
+        """
+        event = Event(self.env)
+        event._ok = True
+        event._value = None
+        event.callbacks.append(self.update)
+        if priority is None:
+            schedule_event(self.env, event, hop)
+        else:
+            self.env.schedule(event, priority)
+
+    def update(self, _=None):
+        """ Registers the receiver (if not full) and the sender (if not empty) of the buffer, as the alternatives of
+        the select statement of a buffer process
+
+        If both can communicate at once, one of them is chosen at random, and the other one is not registered:
+        the buffer makes its next choice in its next update, which is scheduled by the communication.
+        """
+        alternatives = []
+        if self.store:
+            self.sender.entity = self.head()
+            alternatives.append(self.sender)
+        if self.capacity is None or len(self.store) < self.capacity:
+            alternatives.append(self.receiver)
+        transfers = self.count_in + self.count_out
+        ready = [c for c in alternatives if c.partners()]
+        while ready and self.count_in + self.count_out == transfers:
+            c = ready.pop() if len(ready) == 1 else ready.pop(self.env.random.integers(len(ready)))
+            c.register()
+            c.channel.try_communication()
+        if self.count_in + self.count_out == transfers:
+            for c in alternatives:
+                c.register()
+
+    def communicated(self, communication_event):
+        """ Unregisters the other alternative after a communication, and schedules the next update
+
+        :param communication_event: the receiver or the sender of the buffer, which has communicated
+        """
+        other = self.sender if communication_event is self.receiver else self.receiver
+        other.unregister()
+        self.schedule_update(hop=communication_event is self.receiver)
+
+
+# ==========================================================
+# BufferReceiver and BufferSender
+# ==========================================================
+class BufferReceiver(Receiver):
+    """ The receiver of a buffer, which stores the received entity in the buffer"""
+    __slots__ = ('buffer',)
+
+    def __init__(self, env, channel, buffer):
+        super().__init__(env, channel)
+        self.buffer = buffer
+        self.communication_started = True
+
+    def complete(self, value, hop=False):
+        """ Completes the communication by storing the received entity in the buffer"""
+        self.buffer.put(value)
+        self.buffer.communicated(self)
+
+
+class BufferSender(Sender):
+    """ The sender of a buffer, which sends the first entity of the buffer"""
+    __slots__ = ('buffer',)
+
+    def __init__(self, env, channel, buffer):
+        super().__init__(env, channel)
+        self.buffer = buffer
+        self.communication_started = True
+
+    def complete(self, value, hop=False):
+        """ Completes the communication by removing the sent entity from the buffer"""
+        self.buffer.take()
+        self.buffer.communicated(self)
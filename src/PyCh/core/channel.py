@@ -7,8 +7,47 @@ These entities can be any type of object.
 
 A sender waits till a receiver is ready to receive.
 A receiver waits till a sender is ready to receive.
+When they communicate, the sender continues first, and the receiver continues one step later at the same time:
+after the events which were already scheduled at that time (e.g. other processes which continue after a delay
+of zero). This order is the same for env.execute() and env.select(). Up to version 2.1 the receiver was resumed by
+a helper process, so it continued 2 to 4 steps after the sender, depending on the use of select statements.
 If there are multiple receivers waiting, then a sender chooses one at random to send to.
 If there are multiple senders waiting, then a receiver chooses one at random to receive from.
+Instead of a random choice, a channel can also use another matching policy,
+e.g. Channel(env, policy="fifo") or Channel(env, policy="priority"), see PyCh.core.waiters.
+The random choices are drawn from the random stream of the environment, or from the stream
+of the channel if it has a name (see Environment.stream()).
+
+Several entities can be sent or received in a single communication, using send_batch(entities) and
+receive_batch(size), e.g. for a batch machine:
+
+    xs = yield env.execute(c_in.receive_batch(4))  # receives 1 to 4 entities
+    ...
+    yield env.execute(c_out.send_batch(xs))  # completes when all entities have been received
+
+A batch receiver takes the entities of all waiting senders (up to its size), and completes as soon as it has
+received at least one entity. A batch sender gives its entities to all waiting receivers, and completes when all
+its entities have been received, possibly by several receivers; until then, the remaining entities stay offered.
+A single receiver receives one entity of a batch. In a select statement, a batch sender or receiver is selected
+as soon as the first entity is sent or received.
+
+A process which communicates over the same channel in a loop can use a persistent port instead,
+which is re-armed for every communication without allocating new objects, e.g.:
+
+    out = channel.send_port()
+    while True:
+        ...
+        yield env.execute(out.send(entity))
+
+A channel can be instrumented, to find out which channel is the bottleneck of a model, e.g.
+Channel(env, instrument=True), or Environment(instrument=True) to instrument all channels.
+An instrumented channel counts its communications, measures how long senders and receivers are blocked,
+and keeps the current and peak number of waiting senders and receivers (see ChannelStatistics).
+Environment.channel_statistics() gives a snapshot of all instrumented channels.
+Channels which are not instrumented do not pay for this.
+
+The communications over the channels can also be recorded in a binary trace file, using
+Environment(trace="run.trace"), see PyCh.core.trace.
 
 These channels are based on the channels used in Chi
 See: https://cstweb.wtb.tue.nl/chi/trunk-r9682/tutorial/channels.html#a-channel
@@ -17,7 +56,30 @@ See: https://cstweb.wtb.tue.nl/chi/trunk-r9682/tutorial/channels.html#a-channel
 # ==========================================================
 # IMPORTS
 # ==========================================================
-from numpy import random
+from simpy.events import PENDING
+from .waiters import make_waiters
+
+
+def schedule_event(env, event, hop=False):
+    """ Schedules an event which has been triggered (its value is set), at once or after a zero-delay hop
+
+    The hop is a timeout of zero, after which the event is scheduled (see Environment.hop()). It is used for the
+    receiver of a communication, so the sender continues first, and the receiver continues one step later at the
+    same time (instead of after a helper process and its timeout).
+
+    :param env: the simulation environment
+    :param event: the triggered event
+    :param hop: if true, the event is scheduled after a zero-delay hop
+    """
+    if hop:
+        env.hop(event)
+    else:
+        env.schedule(event)
+
+
+def schedule_value(hop):
+    """ Schedules the event which is the value of a zero-delay hop (the callback of the hop)"""
+    hop.env.schedule(hop._value)
 
 # ==========================================================
 # Channel
@@ -25,44 +87,66 @@ from numpy import random
 class Channel:
     """ A channel through which communication can occur between senders and receivers."""
 
-    def __init__(self, env):
+    def __init__(self, env, policy="random", name=None, instrument=None, trace=None):
+        """
+
+        :param env: the simulation environment in which this channel operates
+        :param policy: the matching policy of this channel, one of "random" (default), "fifo" or "priority"
+        :param name: an optional name of this channel, a named channel uses its own random stream
+        :param instrument: if true, the channel keeps statistics (default: the instrument setting of the environment)
+        :param trace: if false, the communications are not traced (default: traced if the environment has a trace)
+        """
         self.env = env  # The simulation environment in which this channel operates
-        self.senders = []  # list of senders which are ready to send
-        self.receivers = []  # list of receivers which are ready to receive
+        self.policy = policy  # The matching policy used to choose between waiting senders/receivers
+        self.name = name  # The name of this channel
+        self.stream = env.random if name is None else env.stream(f"channel {name}")  # The random stream of this channel
+        self.senders = make_waiters(policy, self.stream)  # senders which are ready to send
+        self.receivers = make_waiters(policy, self.stream)  # receivers which are ready to receive
+        if instrument is None:
+            instrument = getattr(env, "instrument", False)
+        self.stats = ChannelStatistics(env) if instrument else None  # the statistics (None if not instrumented)
+        if instrument:
+            env.channels.append(self)
+        tracer = getattr(env, "tracer", None)
+        if trace and tracer is None:
+            raise ValueError('The channel cannot be traced, since the environment has no trace.')
+        self.tracer = tracer if trace is not False else None  # the trace recorder (None if not traced)
+        self.trace_number = tracer.add_channel(self) if self.tracer is not None else -1  # the number in the trace
+        self.transferring = False  # is true while entities of batches are transferred (see transfer_batch())
 
     def get_senders(self):
-        """ Gets the list of all registered senders on this channel
+        """ Gets all registered senders on this channel
 
-        :return: the list of registered senders on this channel
-        :rtype: list[Sender]
+        :return: the registered senders on this channel (supports len(), iteration and "in")
         """
         return self.senders
 
     def get_receivers(self):
-        """ Gets the list of all registered receivers on this channel
+        """ Gets all registered receivers on this channel
 
-        :return: the list of registered receivers on this channel
-        :rtype: list[Receiver]
+        :return: the registered receivers on this channel (supports len(), iteration and "in")
         """
         return self.receivers
 
-    def get_random_receiver(self):
-        """ Gets a random receiver from the list of registered receivers
+    def pick_receiver(self):
+        """ Gets a registered receiver, chosen according to the matching policy of this channel
 
-        :return: a random receiver
+        :return: a receiver
         :rtype: Receiver
         """
-        receiver = random.choice(self.get_receivers())
-        return receiver
+        return self.receivers.pick()
 
-    def get_random_sender(self):
-        """ Gets a random sender from the list of registered senders
+    def pick_sender(self):
+        """ Gets a registered sender, chosen according to the matching policy of this channel
 
-        :return: a random sender
+        :return: a sender
         :rtype: Sender
         """
-        sender = random.choice(self.get_senders())
-        return sender
+        return self.senders.pick()
+
+    # The names used before matching policies were introduced
+    get_random_receiver = pick_receiver
+    get_random_sender = pick_sender
 
     def get_env(self):
         """ Gets the simulation environment in which this channel operates
@@ -77,32 +161,38 @@ class Channel:
 
         :param sender: the Sender
         """
-        self.senders.append(sender)
+        if self.stats is not None:
+            self.stats.register_sender(sender, self.senders)
+        if self.tracer is not None and sender.process_number < 0:
+            sender.process_number = self.tracer.process_number(self.env.active_process)
+        self.senders.add(sender)
 
     def unregister_sender(self, sender):
         """ A function to unregister senders from this channel
 
         :param sender: the Sender
         """
-        if sender in self.get_senders():
-            self.senders.remove(sender)
+        self.senders.remove(sender)
 
     def register_receiver(self, receiver):
         """ A function to register receivers at this channel
 
         :param receiver: the Receiver
         """
-        self.receivers.append(receiver)
+        if self.stats is not None:
+            self.stats.register_receiver(receiver, self.receivers)
+        if self.tracer is not None and receiver.process_number < 0:
+            receiver.process_number = self.tracer.process_number(self.env.active_process)
+        self.receivers.add(receiver)
 
     def unregister_receiver(self, receiver):
         """ A function to unregister receivers from this channel
 
         :param receiver: the Receiver
         """
-        if receiver in self.get_receivers():
-            self.receivers.remove(receiver)
+        self.receivers.remove(receiver)
 
-    def send(self, entity=None):
+    def send(self, entity=None, priority=0):
         """ A function which creates a Sender, ready to send an entity.
 
         Can be used in a process to send entities if followed by either:
@@ -112,11 +202,12 @@ class Channel:
         See Environment.execute() or Environment.select() for more information.
 
         :param entity: the entity which is sent over this channel
+        :param priority: the priority of the Sender, used by the "priority" matching policy (lower is first)
         :return: Sender
         """
-        return Sender(self.env, self, entity)
+        return Sender(self.env, self, entity, priority)
 
-    def receive(self):
+    def receive(self, priority=0):
         """ A function which creates a Receiver, ready to receive an entity.
 
         Can be used in a process to send entities if followed by either:
@@ -125,57 +216,270 @@ class Channel:
         "yield environment.select(Receiver, *other_communication_events)"
         See Environment.execute() or Environment.select() for more information.
 
+        :param priority: the priority of the Receiver, used by the "priority" matching policy (lower is first)
         :return: Receiver
         """
-        return Receiver(self.env, self)
+        return Receiver(self.env, self, priority)
+
+    def send_port(self, priority=0):
+        """ A function which creates a SendPort, a Sender which can be re-armed using SendPort.send(entity).
+
+        A port is meant to be used by a single process, which communicates over this channel repeatedly, e.g.:
+        "yield environment.execute(port.send(entity))"
+
+        :param priority: the priority of the SendPort, used by the "priority" matching policy (lower is first)
+        :return: SendPort
+        """
+        return SendPort(self.env, self, priority)
+
+    def receive_port(self, priority=0):
+        """ A function which creates a ReceivePort, a Receiver which can be re-armed using ReceivePort.receive().
+
+        A port is meant to be used by a single process, which communicates over this channel repeatedly, e.g.:
+        "entity = yield environment.execute(port.receive())"
+
+        :param priority: the priority of the ReceivePort, used by the "priority" matching policy (lower is first)
+        :return: ReceivePort
+        """
+        return ReceivePort(self.env, self, priority)
+
+    def send_batch(self, entities, priority=0):
+        """ A function which creates a BatchSender, ready to send several entities in a single communication.
+
+        Can be used in a process as "yield environment.execute(BatchSender)" or in a select statement.
+        The BatchSender completes when all entities have been received, possibly by several receivers.
+
+        :param entities: the entities which are sent over this channel
+        :param priority: the priority of the BatchSender, used by the "priority" matching policy (lower is first)
+        :return: BatchSender
+        """
+        return BatchSender(self.env, self, entities, priority)
+
+    def receive_batch(self, size, priority=0):
+        """ A function which creates a BatchReceiver, ready to receive up to size entities in a single communication.
+
+        Can be used in a process as "entities = yield environment.execute(BatchReceiver)" or in a select statement.
+        The BatchReceiver completes as soon as it has received at least one entity, and gives the list of
+        received entities.
+
+        :param size: the maximum number of entities which is received
+        :param priority: the priority of the BatchReceiver, used by the "priority" matching policy (lower is first)
+        :return: BatchReceiver
+        """
+        return BatchReceiver(self.env, self, size, priority)
 
     def try_communication(self):
         """ If both a sender and receiver are ready to communicate,
-        communication occurs between a randomly chosen sender and receiver
+        communication occurs between a sender and receiver chosen by the matching policy
 
         If both a sender and receiver are ready to communicate,
-        a random sender and receiver are chosen.
+        a sender and receiver are chosen according to the matching policy (random by default).
         Both sender and receiver are then unregistered.
         If either sender or receiver were executed using select statement, then all other
         communication_events in the select statement are also unregistered.
         Finally, communication occurs between the sender and receiver.
 
         """
-        if self.get_senders() and self.get_receivers():
-            sender = self.get_random_sender()
-            receiver = self.get_random_receiver()
+        if self.senders and self.receivers:
+            sender = self.senders.pick()
+            receiver = self.receivers.pick()
+            if sender.batch or receiver.batch:
+                self.transfer_batch(sender, receiver)
+                return
 
             # TODO: currently, entities cannot be sent and received by the same process. Should this be allowed?
-            if receiver in sender.mutual_exclusive_communication_events or sender in receiver.mutual_exclusive_communication_events:
+            if sender.select is not None and sender.select is receiver.select:
                 raise ValueError("a process cannot send to itself")
 
-            sender.unregister_unselected_communication_events()
-            receiver.unregister_unselected_communication_events()
-
             self.unregister_sender(sender)
             self.unregister_receiver(receiver)
+            if self.stats is not None:
+                self.stats.record(sender, receiver)
+            if self.tracer is not None:
+                self.tracer.record(self.trace_number, sender, receiver, sender.entity)
+
+            self.execute_communication(sender, receiver)
+
+    def transfer_batch(self, sender, receiver):
+        """ Transfers entities between the waiting senders and receivers, of which at least one is a batch
+
+        Starting with the given pair, pairs of a sender and a receiver (chosen by the matching policy) communicate
+        until no senders or no receivers are waiting anymore. In every step, as many entities as possible are
+        moved from the sender to the receiver. A sender which has sent all its entities completes, a receiver which
+        is full is unregistered. A batch receiver completes at the end, when it has received all it can get.
 
-            self.env.process(self.execute_communication(sender, receiver))
+        A sender which completes can re-register a new sender (e.g. a Buffer, with its next entity),
+        so the communications of the channel itself are postponed until the transfer is finished.
+
+        :param sender: the first Sender
+        :param receiver: the first Receiver
+        """
+        if self.transferring:
+            return  # the running transfer also handles the newly registered senders and receivers
+        self.transferring = True
+        receiving = []  # the batch receivers which have received entities
+        try:
+            while True:
+                if sender.select is not None and sender.select is receiver.select:
+                    raise ValueError("a process cannot send to itself")
+                if receiver.batch:
+                    room = receiver.size - len(receiver.entity)
+                    if not receiver.entity:
+                        receiving.append(receiver)
+                        if receiver.select is not None:
+                            receiver.select.commit(receiver)
+                else:
+                    room = 1
+                if sender.batch:
+                    entities = sender.entity[sender.sent:sender.sent + room]
+                    sender.sent += len(entities)
+                    sent = sender.sent == len(sender.entity)
+                    if not sent and sender.select is not None and sender.select.selected is None:
+                        sender.select.commit(sender)
+                else:
+                    entities = [sender.entity]
+                    sent = True
+                if self.stats is not None:
+                    self.stats.record(sender, receiver)
+                if self.tracer is not None:
+                    for entity in entities:
+                        self.tracer.record(self.trace_number, sender, receiver, entity)
+
+                # Both are unregistered before the sender completes, since completing it can already re-arm it
+                if receiver.batch:
+                    receiver.entity.extend(entities)
+                    if len(receiver.entity) == receiver.size:
+                        self.unregister_receiver(receiver)
+                else:
+                    self.unregister_receiver(receiver)
+                if sent:
+                    self.unregister_sender(sender)
+                    sender.complete(None)
+                if not receiver.batch:
+                    receiver.entity = entities[0]
+                    receiver.complete(entities[0], hop=True)
+
+                if not (self.senders and self.receivers):
+                    break
+                sender = self.senders.pick()
+                receiver = self.receivers.pick()
+        finally:
+            self.transferring = False
+
+        # The batch receivers complete, one step after the senders
+        for receiver in receiving:
+            self.unregister_receiver(receiver)
+            receiver.complete(receiver.entity, hop=True)
 
     def execute_communication(self, sender, receiver):
+        """ Executes the communication between a sender and a receiver
+
+        The communication events of both the sender and the receiver (or their select statements) are scheduled directly.
+        The receiver is scheduled after a zero-delay hop, which forces that a sender always continues before
+        a receiver (also when a select statement is used), without the need of additional processes.
+        Like any other zero-delay step, the hop cannot be postponed indefinitely by other processes.
+
+        :param sender: the Sender
+        :param receiver: the Receiver
+        """
+        # The entity is taken first, since completing the sender can already re-arm it (e.g. of a Buffer)
+        entity = sender.entity
+
         # Sender succeeds
-        sender.communication.succeed()
+        sender.complete(None)
 
-        # We need to delay the receiver, so we use a dummy process
+        # Receiver succeeds, one zero-delay step after the sender
         # If we do not do this, it is possible the receiver receives, before the sender sends!
-        delay_receiver = self.env.process(self.dummy_process())
-        yield delay_receiver
+        receiver.entity = entity
+        receiver.complete(entity, hop=True)
 
-        # Receiver succeeds
-        receiver.entity = sender.entity
-        receiver.communication.succeed(value=receiver.entity)
+# ==========================================================
+# ChannelStatistics
+# ==========================================================
+class ChannelStatistics:
+    """ The statistics of an instrumented channel.
 
-    def dummy_process(self):
+    The blocking time of a sender (or receiver) is the time between its registration at the channel and its
+    communication. Alternatives of a select statement which are not selected are not counted.
+    """
+    __slots__ = ('env', 'communications', 'sender_blocking', 'max_sender_blocking', 'receiver_blocking',
+                 'max_receiver_blocking', 'peak_senders', 'peak_receivers')
+
+    def __init__(self, env):
+        """
+
+        :param env: the simulation environment of the channel
         """
-        This dummy process is used to force the order in which communication is handled
-        (Basically, to force that a sender continues before a receiver)
+        self.env = env
+        self.communications = 0  # the number of communications
+        self.sender_blocking = 0.0  # the total time senders were blocked
+        self.max_sender_blocking = 0.0  # the longest time a sender was blocked
+        self.receiver_blocking = 0.0  # the total time receivers were blocked
+        self.max_receiver_blocking = 0.0  # the longest time a receiver was blocked
+        self.peak_senders = 0  # the maximum number of waiting senders
+        self.peak_receivers = 0  # the maximum number of waiting receivers
+
+    def register_sender(self, sender, senders):
+        """ Records the registration of a sender, before it is added to the waiting senders
+
+        :param sender: the Sender
+        :param senders: the waiting senders of the channel
         """
-        yield self.env.timeout(0.0)
+        if sender not in senders:
+            sender.start_time = self.env.now
+            if len(senders) >= self.peak_senders:
+                self.peak_senders = len(senders) + 1
+
+    def register_receiver(self, receiver, receivers):
+        """ Records the registration of a receiver, before it is added to the waiting receivers
+
+        :param receiver: the Receiver
+        :param receivers: the waiting receivers of the channel
+        """
+        if receiver not in receivers:
+            receiver.start_time = self.env.now
+            if len(receivers) >= self.peak_receivers:
+                self.peak_receivers = len(receivers) + 1
+
+    def record(self, sender, receiver):
+        """ Records a communication between a sender and a receiver
+
+        :param sender: the Sender
+        :param receiver: the Receiver
+        """
+        now = self.env.now
+        self.communications += 1
+        blocking = now - sender.start_time
+        self.sender_blocking += blocking
+        if blocking > self.max_sender_blocking:
+            self.max_sender_blocking = blocking
+        blocking = now - receiver.start_time
+        self.receiver_blocking += blocking
+        if blocking > self.max_receiver_blocking:
+            self.max_receiver_blocking = blocking
+
+    def summary(self, channel):
+        """ A snapshot of the statistics
+
+        :param channel: the channel of these statistics, which gives the current number of waiters
+        :return: the statistics
+        :rtype: dict
+        """
+        n = self.communications
+        return {
+            "communications": n,
+            "sender blocking": self.sender_blocking,
+            "mean sender blocking": self.sender_blocking / n if n else 0.0,
+            "max sender blocking": self.max_sender_blocking,
+            "receiver blocking": self.receiver_blocking,
+            "mean receiver blocking": self.receiver_blocking / n if n else 0.0,
+            "max receiver blocking": self.max_receiver_blocking,
+            "senders": len(channel.senders),
+            "peak senders": self.peak_senders,
+            "receivers": len(channel.receivers),
+            "peak receivers": self.peak_receivers,
+        }
+
 
 # ==========================================================
 # CommunicationEvent
@@ -183,22 +487,27 @@ class Channel:
 class CommunicationEvent:
     """ A communication_event communications across a channel, it is either a Sender or Receiver.
 
+    A communication_event is registered at its channel when it is executed (or used in a select statement).
     """
+    __slots__ = ('env', 'channel', 'priority', 'communication', 'select', 'communication_started', 'entity',
+                 'start_time', 'process_number')
+    batch = False  # is true for a BatchSender or BatchReceiver
 
-    def __init__(self, env, channel):
+    def __init__(self, env, channel, priority=0):
         """
 
         :param env: the environment in which this communication_event operates
         :param channel: the channel over which this communication_event communicates
+        :param priority: the priority of this communication_event, used by the "priority" matching policy
         """
         self.env = env  # The environment of this communication_event
         self.channel = channel  # The channel of this communication_event
-        self.communication = self.env.event()  # An event which is triggered when communication begins
-        self.mutual_exclusive_communication_events = []  # When this communication_event is 'selected', these communication_events are
-        # unregistered from their channels
+        self.priority = priority  # The priority of this communication_event (lower is first)
+        self.communication = None  # An event which is triggered when communication begins (created when executed)
+        self.select = None  # The select statement of which this communication_event is an alternative (if any)
         self.communication_started = False  # is true if this communication_event has started communicating
-
-        self.register()  # registers the communication_event to its channel
+        self.start_time = None  # the time at which it was registered (only recorded by instrumented channels)
+        self.process_number = -1  # the number of the communicating process (only recorded by traced channels)
 
     def execute(self):
         """ Executes the communication of the communication_event and returns its communication event
@@ -208,19 +517,25 @@ class CommunicationEvent:
 
         :return: the communication event of this communication_event
         """
-        self.start_process()
-        return self.communication
+        return self.start_process()
 
     # The function used to start the process
     def start_process(self):
-        """ Starts the communication of the communication_event, and asks its channel to check if communication is possible
+        """ Starts the communication of the communication_event, registers it at its channel,
+        and asks its channel to check if communication is possible
 
         :return: the communication event of this communication_event
         :rtype: Event
         """
+        communication = self.communication
+        if communication is None:
+            communication = self.communication = self.env.event()
         self.communication_started = True
+        self.register()
         self.channel.try_communication()
-        return self.communication
+        if self.env.detector is not None and communication._value is PENDING:
+            self.env.detector.block(communication, [self])
+        return communication
 
     @property
     def selected(self) -> bool:
@@ -229,10 +544,22 @@ class CommunicationEvent:
         :return: a boolean which is true if the communication_event was selected
         :rtype: bool
         """
-        try:
-            return self.communication.triggered
-        except AttributeError:
-            print("Oops! The process has not yet started.")
+        if self.select is not None:
+            return self.select.selected is self
+        return self.communication is not None and self.communication.triggered
+
+    @property
+    def mutual_exclusive_communication_events(self):
+        """ The other alternatives of the select statement of this communication_event
+
+        When this communication_event is 'selected', these communication_events are unregistered from their channels.
+
+        :return: the other communication_events in the select statement
+        :rtype: list[CommunicationEvent]
+        """
+        if self.select is None:
+            return []
+        return [c for c in self.select.communication_events if c is not self]
 
     def unregister_unselected_communication_events(self):
         """ If this communication_event was selected, this function is used to unregister the not selected communication_events from
@@ -240,20 +567,44 @@ class CommunicationEvent:
         for c in self.mutual_exclusive_communication_events:
             c.unregister()
 
+    def complete(self, value, hop=False):
+        """ Completes the communication of this communication_event
+
+        Schedules the communication event, or resolves the select statement if this communication_event is an alternative.
+
+        :param value: the value of the communication (the received entity, or None)
+        :param hop: if true, the event is scheduled after a zero-delay hop (see schedule_event())
+        """
+        if self.env.detector is not None:
+            self.env.detector.unblock(self.communication if self.select is None else self.select)
+        if self.select is not None:
+            self.select.resolve(self, value, hop)
+        else:
+            communication = self.communication
+            communication._ok = True
+            communication._value = value
+            schedule_event(self.env, communication, hop)
+
 
 # ==========================================================
 # Sender
 # ==========================================================
 class Sender(CommunicationEvent):
     """ A sender is a type of communication_event which sends"""
-    def __init__(self, env, channel, entity=None):
-        super().__init__(env, channel)
+    __slots__ = ()
+
+    def __init__(self, env, channel, entity=None, priority=0):
+        super().__init__(env, channel, priority)
         self.entity = entity  # the entity which is sent
 
     def register(self):
         """ Register this sender at its channel"""
         self.channel.register_sender(self)
 
+    def partners(self):
+        """ Gets the registered receivers this sender can communicate with"""
+        return self.channel.receivers
+
     def unregister(self):
         """ Unregister this sender at its channel"""
         self.channel.unregister_sender(self)
@@ -264,13 +615,112 @@ class Sender(CommunicationEvent):
 # ==========================================================
 class Receiver(CommunicationEvent):
     """ A receiver is a type of communication_event which receives"""
-    def __init__(self, env, channel):
-        super().__init__(env, channel)
+    __slots__ = ()
+
+    def __init__(self, env, channel, priority=0):
+        super().__init__(env, channel, priority)
+        self.entity = None  # the entity which is received
 
     def register(self):
         """ Register this receiver at its channel"""
         self.channel.register_receiver(self)
 
+    def partners(self):
+        """ Gets the registered senders this receiver can communicate with"""
+        return self.channel.senders
+
     def unregister(self):
         """ Unregister this receiver from its channel"""
         self.channel.unregister_receiver(self)
+
+
+# ==========================================================
+# Batches
+# ==========================================================
+class BatchSender(Sender):
+    """ A sender of several entities, which completes when all entities have been received"""
+    __slots__ = ('sent',)
+    batch = True
+
+    def __init__(self, env, channel, entities, priority=0):
+        entities = list(entities)
+        if not entities:
+            raise ValueError('A batch needs at least one entity.')
+        super().__init__(env, channel, entities, priority)
+        self.sent = 0  # the number of entities which have been received
+
+
+class BatchReceiver(Receiver):
+    """ A receiver of up to size entities, which completes as soon as it has received at least one entity"""
+    __slots__ = ('size',)
+    batch = True
+
+    def __init__(self, env, channel, size, priority=0):
+        if size < 1:
+            raise ValueError('The size of a batch must be at least 1.')
+        super().__init__(env, channel, priority)
+        self.size = size  # the maximum number of entities which is received
+        self.entity = []  # the received entities
+
+
+# ==========================================================
+# Ports
+# ==========================================================
+def rearm(port):
+    """ Prepares a port for its next communication, re-using its communication event if possible
+
+    :param port: the SendPort or ReceivePort
+    """
+    if port.communication_started:
+        if port.select is not None:
+            if not port.select.processed:
+                raise ValueError(
+                    'The port is still used by a select statement, '
+                    'it can only be re-armed after the select statement has finished.'
+                )
+        else:
+            communication = port.communication
+            if communication.callbacks is not None:
+                raise ValueError(
+                    'The port is still communicating, '
+                    'it can only be re-armed after its communication has finished.'
+                )
+            # The communication event has been processed, so it can be used again
+            communication.callbacks = []
+            communication._value = PENDING
+        port.select = None
+        port.communication_started = False
+
+
+class SendPort(Sender):
+    """ A persistent sender, which is re-armed for every communication using SendPort.send(entity)"""
+    __slots__ = ()
+
+    def send(self, entity=None):
+        """ Re-arms this port to send an entity
+
+        Can be used in a process as "yield environment.execute(port.send(entity))"
+        or in a select statement.
+
+        :param entity: the entity which is sent over the channel
+        :return: this SendPort
+        """
+        rearm(self)
+        self.entity = entity
+        return self
+
+
+class ReceivePort(Receiver):
+    """ A persistent receiver, which is re-armed for every communication using ReceivePort.receive()"""
+    __slots__ = ()
+
+    def receive(self):
+        """ Re-arms this port to receive an entity
+
+        Can be used in a process as "entity = yield environment.execute(port.receive())"
+        or in a select statement.
+
+        :return: this ReceivePort
+        """
+        rearm(self)
+        return self
@@ -0,0 +1,167 @@
+"""
+The deadlock detector ends a simulation as soon as all its processes are blocked on channels, e.g.:
+
+    env = Environment(detect_deadlock=True)
+    ...
+    env.run(until=E)  # raises a DeadlockError which names the blocked processes and their channels
+
+A process is blocked when it waits for a communication (env.execute(), or env.select() without a timeout)
+for which no partner is available yet. A deadlock occurs when every process is blocked, since none of them
+can ever continue. Without the detector, the simulation then ends silently (the event queue is empty), or keeps
+running on a process which is not related to the rest of the model, e.g. a periodic monitor.
+Such processes can be marked as daemons, which are ignored by the detector:
+
+    env.daemon(Monitor(env, ...))
+
+A daemon must not be the only process which can unblock the other processes (e.g. by sending them a signal),
+since the detector would then report a deadlock which is not there.
+
+The detector keeps track of the processes incrementally: it counts the processes which are alive and the processes
+which are blocked, when a process starts, ends, blocks or is unblocked by a communication. Only when both counts
+are equal, a check is scheduled at the current time (after all other events at that time), which reports the
+deadlock if it still exists. Processes which wait for something else than a communication (e.g. a delay, or another
+process) are never blocked, so a deadlock in which such a process takes part is not detected.
+
+In real time (see PyCh.core.realtime), a process which receives from a channel with an open input bridge can still
+be unblocked by a coroutine, so there is no deadlock as long as such a process waits. When the run ends because no
+events are left and all input bridges are closed, the processes are checked once more.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+from math import inf
+from simpy.events import Event
+from .channel import Sender
+
+# Scheduling priority of the check, which is handled after all other events at the same time (NORMAL = 1)
+CHECK = 2
+
+
+# ==========================================================
+# DeadlockError
+# ==========================================================
+class DeadlockError(RuntimeError):
+    """ Raised when all processes of a simulation are blocked on channels"""
+
+    def __init__(self, time, blocked):
+        """
+
+        :param time: the simulation time at which the deadlock occurred
+        :param blocked: the blocked processes, with the communication_events for which they wait
+        """
+        self.time = time  # the simulation time at which the deadlock occurred
+        self.blocked = blocked  # the blocked processes, (process, list of communication_events)
+        lines = [f"{process.name}: {', '.join(describe(c) for c in events)}" for process, events in blocked[:20]]
+        if len(blocked) > 20:
+            lines.append(f"... and {len(blocked) - 20} more processes")
+        super().__init__(f"Deadlock at time {time}, all processes are blocked:\n  " + "\n  ".join(lines))
+
+
+def describe(communication_event):
+    """ Describes a communication_event, e.g. "sending on channel 'a'"
+
+    :param communication_event: the communication_event
+    :return: the description
+    :rtype: str
+    """
+    channel = communication_event.channel
+    name = f"channel {channel.name!r}" if channel.name is not None else f"an unnamed channel at {id(channel):#x}"
+    return f"{'sending on' if isinstance(communication_event, Sender) else 'receiving from'} {name}"
+
+
+# ==========================================================
+# DeadlockDetector
+# ==========================================================
+class DeadlockDetector:
+    """ Keeps track of the blocked processes of an environment, and raises a DeadlockError when all are blocked"""
+
+    def __init__(self, env):
+        """
+
+        :param env: the simulation environment
+        """
+        self.env = env
+        self.waiting = {}  # the blocked processes and their communication_events, by the event for which they wait
+        self.daemons = set()  # the processes which are ignored
+        self.alive = 0  # the number of processes (not daemons) which have not ended
+        self.stalled = 0  # the number of blocked processes (not daemons)
+        self.check_scheduled = False  # is true if a check is scheduled
+        self.inputs = []  # the input bridges of a real-time run, through which coroutines can unblock processes
+
+    def start(self, process):
+        """ Starts tracking a process
+
+        :param process: the new process
+        """
+        self.alive += 1
+        process.callbacks.append(self.end)
+
+    def end(self, process):
+        """ Stops tracking a process which has ended (the callback of the process)"""
+        if process in self.daemons:
+            self.daemons.discard(process)
+            return
+        self.alive -= 1
+        if 0 < self.alive <= self.stalled:
+            self.schedule_check()
+
+    def daemon(self, process):
+        """ Marks a process as a daemon, which is ignored
+
+        :param process: the process
+        """
+        if process in self.daemons or process.triggered:
+            return
+        self.daemons.add(process)
+        self.alive -= 1
+        if any(p is process for p, _ in self.waiting.values()):
+            self.stalled -= 1
+
+    def block(self, awaited, communication_events):
+        """ Marks the active process as blocked, until the event for which it waits is triggered
+
+        :param awaited: the event for which the process waits (the communication of a communication_event,
+            or a select statement)
+        :param communication_events: the communication_events of the event
+        """
+        process = self.env.active_process
+        if process is None:
+            return
+        self.waiting[awaited] = (process, communication_events)
+        if process not in self.daemons:
+            self.stalled += 1
+            if self.stalled >= self.alive:
+                self.schedule_check()
+
+    def unblock(self, awaited):
+        """ Marks the process which waits for an event as no longer blocked, since the event is triggered
+
+        :param awaited: the event
+        """
+        waiting = self.waiting.pop(awaited, None)
+        if waiting is not None and waiting[0] not in self.daemons:
+            self.stalled -= 1
+
+    def schedule_check(self):
+        """ Schedules a check at the current time, after all other events at that time"""
+        if not self.check_scheduled:
+            self.check_scheduled = True
+            check = Event(self.env)
+            check._ok = True
+            check._value = None
+            check.callbacks.append(self.check)
+            self.env.schedule(check, CHECK)
+
+    def check(self, _):
+        """ Raises a DeadlockError if all processes are still blocked"""
+        self.check_scheduled = False
+        # A process which no longer waits for its communication (e.g. after an interrupt) is not blocked
+        for awaited, (process, _) in list(self.waiting.items()):
+            if process.target is not awaited:
+                self.unblock(awaited)
+        if 0 < self.alive <= self.stalled:
+            blocked = [(process, events) for process, events in self.waiting.values() if process not in self.daemons]
+            bridged = {bridge.channel for bridge in self.inputs if bridge.horizon != inf}
+            if not any(c.channel in bridged for _, events in blocked for c in events if not isinstance(c, Sender)):
+                raise DeadlockError(self.env.now, blocked)
@@ -11,20 +11,282 @@ When one is executed, the other communicators all are aborted.
 E.g. Environment.select( Channel.receive(), Channel.send(entity) )
 Which executes EITHER a receive or a send.
 
+Every Environment has a seed, from which it creates independent named random streams,
+e.g. Environment(seed=42).stream("arrivals"). See PyCh.core.streams.
+
+An Environment also keeps named statistics accumulators, which are summarized by Environment.statistics().
+See PyCh.core.statistics.
+
+Environment(profile=True) profiles the processes which are defined with the @process decorator,
+and prints a table at the end of Environment.run(). See PyCh.core.profiling.
+
+Environment(trace="run.trace") records all communications in a binary trace file. See PyCh.core.trace.
+
+Environment(engine="fast") uses a leaner event loop than SimPy's (about 10% faster), with identical results.
+See PyCh.core.fast.
+
+env.sink("lots", columns={...}) collects records in numpy columns, which are written to files in chunks.
+See PyCh.core.sink.
+
+Environment(detect_deadlock=True) raises a DeadlockError as soon as all processes are blocked on channels.
+See PyCh.core.deadlock.
+
 """
 # ==========================================================
 # IMPORTS
 # ==========================================================
 import simpy
-from simpy import AnyOf
+from contextvars import ContextVar
+from heapq import heapify
+from operator import itemgetter
 from numpy import random
 from PyCh import CommunicationEvent
+from .channel import schedule_value
+from .selection import Select
+from .streams import RandomStream, stream_seed
+from .statistics import BatchMeans, Tally, TimeWeighted
+from .profiling import Profiler
+from .trace import TraceRecorder
+from .deadlock import DeadlockDetector
+from .sink import ResultSink
+from time import perf_counter
+
+# Is true while a replication runs (set by PyCh.experiments.replications.run_replication()), so the environments
+# which are created by the model require the paths of their result sinks
+replicating = ContextVar("replicating", default=False)
 
 # ==========================================================
 # Environment
 # ==========================================================
 class Environment(simpy.Environment):
 
+    def __new__(cls, *args, engine="simpy", **kwargs):
+        if engine not in ("simpy", "fast"):
+            raise ValueError(f'Unknown engine {engine!r}, choose one of "simpy" or "fast".')
+        if engine == "fast" and cls is Environment:
+            from .fast import FastEnvironment
+            cls = FastEnvironment
+        return super().__new__(cls)
+
+    def __init__(self, initial_time=0, seed=None, instrument=False, profile=False, trace=None, engine="simpy",
+                 detect_deadlock=False):
+        """
+
+        :param initial_time: the simulation time at which the simulation starts
+        :param seed: the seed of the random streams of this environment.
+            If no seed is given, it is drawn from numpy's global random state,
+            so a model which uses numpy.random.seed() stays reproducible.
+        :param instrument: if true, all channels of this environment keep statistics (see channel_statistics())
+        :param profile: if true, the processes of this environment are profiled (see PyCh.core.profiling)
+        :param trace: an optional path of a file in which all communications are recorded (see PyCh.core.trace)
+        :param engine: the scheduler which runs the simulation: "simpy" (default), or "fast" for models which only
+            use delays, channels, select statements and processes (see PyCh.core.fast)
+        :param detect_deadlock: if true, a DeadlockError is raised when all processes are blocked on channels
+            (see PyCh.core.deadlock)
+        """
+        super().__init__(initial_time)
+        self.engine = engine  # The scheduler which runs the simulation
+        if seed is None:
+            seed = int(random.randint(2 ** 32, dtype='uint64'))
+        self.seed = seed  # The seed of the random streams of this environment
+        self.rng = random.default_rng(seed)  # A numpy Generator, e.g. for drawing arrays of random numbers
+        self.streams = {}  # The random streams of this environment, by name
+        self.random = self.stream("PyCh")  # The random stream used to break ties in channels and select statements
+        self.accumulators = {}  # The statistics accumulators of this environment, by name
+        self.instrument = instrument  # Are channels instrumented by default?
+        self.channels = []  # The instrumented channels of this environment
+        self.profiler = Profiler(self) if profile else None  # The profiler of the processes (None if not profiled)
+        self.tracer = TraceRecorder(self, trace) if trace is not None else None  # The trace recorder (if any)
+        self.detector = DeadlockDetector(self) if detect_deadlock else None  # The deadlock detector (if any)
+        self.sinks = {}  # The result sinks of this environment, by name
+        self.require_sink_path = replicating.get()  # Do the result sinks need a path (in a replication)?
+
+    def stream(self, name, block_size=1024):
+        """ Gets the random stream with the given name
+
+        Streams with different names are independent, and the stream with the same name and seed
+        always gives the same random numbers. This can be used to give every process its own stream, e.g.:
+        "u = environment.stream('arrivals')" and "yield environment.delay(u.exponential(ta))"
+
+        :param name: the name of the stream
+        :param block_size: the number of random numbers drawn from numpy at once (used when the stream is created)
+        :return: the random stream
+        :rtype: RandomStream
+        """
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = self.streams[name] = RandomStream(stream_seed(self.seed, name), block_size)
+        return stream
+
+    def tally(self, name):
+        """ Gets the Tally with the given name, which accumulates the mean, variance, minimum and maximum of observations
+
+        Use "tally.observe(value)" to add an observation.
+
+        :param name: the name of the observed quantity
+        :return: the tally
+        :rtype: Tally
+        """
+        return self.accumulator(name, Tally, lambda: Tally(name))
+
+    def time_weighted(self, name, value=0.0):
+        """ Gets the TimeWeighted accumulator with the given name, for a quantity which changes over time
+
+        Use "accumulator.update(value)" or "accumulator.add(delta)" to change the value of the quantity.
+
+        :param name: the name of the quantity
+        :param value: the value of the quantity at the current time (used when the accumulator is created)
+        :return: the accumulator
+        :rtype: TimeWeighted
+        """
+        return self.accumulator(name, TimeWeighted, lambda: TimeWeighted(self, value, name))
+
+    def batch_means(self, name, batches=32, warmup=True, confidence=0.95):
+        """ Gets the BatchMeans estimator with the given name, for a steady-state mean
+
+        Use "batch_means.observe(value)" to add an observation.
+
+        :param name: the name of the observed quantity
+        :param batches: the minimum number of batches which is kept (used when the estimator is created)
+        :param warmup: if true, the warm-up period is removed using the MSER rule (used when the estimator is created)
+        :param confidence: the confidence level of the confidence interval (used when the estimator is created)
+        :return: the estimator
+        :rtype: BatchMeans
+        """
+        return self.accumulator(name, BatchMeans, lambda: BatchMeans(self, name, batches, warmup, confidence))
+
+    def accumulator(self, name, kind, create):
+        """ Gets the accumulator with the given name, and creates it if it does not exist yet
+
+        :param name: the name of the accumulator
+        :param kind: the class of the accumulator
+        :param create: a function which creates the accumulator
+        :return: the accumulator
+        """
+        accumulator = self.accumulators.get(name)
+        if accumulator is None:
+            accumulator = self.accumulators[name] = create()
+        elif not isinstance(accumulator, kind):
+            raise ValueError(f'The statistic {name!r} is already used by a {type(accumulator).__name__}.')
+        return accumulator
+
+    def sink(self, name, columns=None, path=None, chunk_size=65536, format="npy"):
+        """ Gets the result sink with the given name, which collects records in numpy columns
+
+        Use "sink.append(value1, value2, ...)" to add a record. The records are written to files in chunks,
+        and can be read with SinkReader(path).
+
+        :param name: the name of the sink
+        :param columns: the names and dtypes of the columns, e.g. {"lot": "i8", "start": "f8"}
+            (used when the sink is created)
+        :param path: the directory in which the files are written, default the name of the sink
+            (used when the sink is created, and required in a replication)
+        :param chunk_size: the number of records which is written at once (used when the sink is created)
+        :param format: the format of the files, "npy" (default), "npz" or "parquet" (used when the sink is created)
+        :return: the sink
+        :rtype: ResultSink
+        """
+        sink = self.sinks.get(name)
+        if sink is None:
+            if columns is None:
+                raise ValueError(f'Give the columns of the new sink {name!r}.')
+            sink = self.sinks[name] = ResultSink(name, columns, path, chunk_size, format, self.require_sink_path)
+        return sink
+
+    def statistics(self):
+        """ Gets a summary of all statistics accumulators of this environment
+
+        :return: the summary of every accumulator, by name
+        :rtype: dict[str, dict]
+        """
+        return {name: accumulator.summary() for name, accumulator in self.accumulators.items()}
+
+    def channel_statistics(self):
+        """ Gets a snapshot of the statistics of all instrumented channels
+
+        A channel without a name is named "channel <i>", with i its number among the instrumented channels.
+
+        :return: the statistics of every channel, by name
+        :rtype: dict[str, dict]
+        """
+        return {channel.name if channel.name is not None else f"channel {i}": channel.stats.summary(channel)
+                for i, channel in enumerate(self.channels)}
+
+    def event_count(self):
+        """ Gets the number of events which have been scheduled so far, e.g. to check that a change of a model
+        does not change the work done by the simulation
+
+        :return: the number of scheduled events (including the events which are still scheduled)
+        :rtype: int
+        """
+        return int(repr(self._eid)[len("count("):-1])  # the next event id, without taking it
+
+    def process(self, generator):
+        """ Creates a process, see simpy.Environment.process()
+
+        If the environment is traced, the process gets its number in the trace.
+
+        :param generator: the generator of the process
+        :return: the process
+        """
+        process = super().process(generator)
+        if self.tracer is not None:
+            self.tracer.process_number(process)
+        if self.detector is not None:
+            self.detector.start(process)
+        return process
+
+    def daemon(self, process):
+        """ Marks a process as a daemon, which is ignored by the deadlock detector (e.g. a periodic monitor)
+
+        Without a deadlock detector, this has no effect.
+
+        :param process: the process
+        :return: the process
+        """
+        if self.detector is not None:
+            self.detector.daemon(process)
+        return process
+
+    def run(self, until=None):
+        """ Runs the simulation, see simpy.Environment.run()
+
+        If the environment is profiled, the profile of the processes is printed at the end.
+        If the environment is traced, the trace is flushed at the end, so it can be read.
+        The result sinks are flushed at the end as well.
+
+        :param until: the time or event until which the simulation runs
+        :return: the value of the until event (if any)
+        """
+        if self.profiler is None and self.tracer is None and not self.sinks:
+            return self.simulate(until)
+        start = perf_counter()
+        try:
+            return self.simulate(until)
+        finally:
+            self.finish(perf_counter() - start)
+
+    def finish(self, run_time):
+        """ Ends a run: flushes the trace and the result sinks, and prints the profile (if any)
+
+        :param run_time: the wall-clock time of the run, in seconds
+        """
+        if self.tracer is not None:
+            self.tracer.flush()
+        for sink in self.sinks.values():
+            sink.flush()
+        if self.profiler is not None:
+            self.profiler.run_time += run_time
+            print(self.profiler.table())
+
+    def simulate(self, until=None):
+        """ Runs the event loop of the engine, see simpy.Environment.run()
+
+        :param until: the time or event until which the simulation runs
+        :return: the value of the until event (if any)
+        """
+        return super().run(until)
+
     @property
     def time(self):
         """ Returns the current simulation time
@@ -46,6 +308,31 @@ class Environment(simpy.Environment):
         """
         return self.timeout(time)
 
+    def hop(self, event):
+        """ Schedules a triggered event after a zero-delay step, e.g. the receiver of a communication
+
+        :param event: the triggered event (its value is set)
+        """
+        self.timeout(0.0, event).callbacks.append(schedule_value)
+
+    def cancel(self, event):
+        """ Removes a scheduled event from the event queue, e.g. the timeout of a select statement which is no longer
+        needed, so the simulation time does not advance to it
+
+        This takes O(n) time for n scheduled events. An event which is not (or no longer) scheduled is ignored.
+
+        :param event: the scheduled event
+        """
+        queue = self._queue
+        try:
+            i = list(map(itemgetter(3), queue)).index(event)
+        except ValueError:
+            return
+        last = queue.pop()
+        if i < len(queue):
+            queue[i] = last
+            heapify(queue)
+
     @staticmethod
     def execute(communication_event):
         """ Used to communicate over a channel using "yield environment.execute(communication_event)"
@@ -59,11 +346,9 @@ class Environment(simpy.Environment):
 
         :param communication_event: The communication_event (sender/receiver)
         """
-        communication_event.start_process()
+        return communication_event.start_process()
 
-        return communication_event.communication
-
-    def select(self, *communication_events):  # TODO: documentation
+    def select(self, *communication_events, timeout=None):
         """ The select function allows a process to wait for one of a list senders/receivers to communicate.
 
         This is useful if it is unknown which communication_event (sender/receiver) will first be ready.
@@ -84,63 +369,16 @@ class Environment(simpy.Environment):
         returns the received entity if a receiver is selected.
         If a sender is selected, the yield statement returns None
 
+        If a timeout is given, the process also continues when no communication has occurred within this duration,
+        in which case no communication_event is selected, and select.timed_out is true.
+
         :param communication_events: the communication_events of which only one will be selected
+        :param timeout: an optional (simulation) time duration after which the select statement stops waiting
+        :return: a Select event, of which Select.selected is the selected communication_event
         """
-
         # Removes all communication_events of NoneType (for which the guard is false)
         communication_events = [c for c in communication_events if c]
-        # Check if the correct input is given, and if not, give an error.
-        for c in communication_events:
-            if not isinstance(c, CommunicationEvent):
-                if isinstance(c, simpy.Process):
-                    raise TypeError(
-                        'A process was passed to the Select statement, '
-                        'Try a communication_event instead.'
-                    )
-                else:
-                    raise TypeError(
-                        'One of the communication_events is of an incorrect type.'
-                    )
-            if self != c.env:
-                raise ValueError(
-                    'It is not allowed to mix events from different '
-                    'environments'
-                )
-            if c.communication_started:
-                raise ValueError(
-                    'The communication_event has already started its process,'
-                    'which is not allowed when used with the select statement.'
-                )
-
-        # Only one communication_event is selected. Every communication_event must know who the other communication_events are.
-        # The reason is that the communication_events must communicate to each other
-        for c in communication_events:
-            other_communication_events = [x for x in communication_events if x != c]
-            c.mutual_exclusive_communication_events.extend(other_communication_events)
-
-        def _select_process(env, communication_events):
-            """ the selection process used by the select statement"""
-
-            # start the send/receive processes for all communication_events.
-            # The order in which processes are started determines their prioritization
-            # We reshuffle this order randomly to randomize prioritization
-            # Note: it would also be acceptable to keep the order of the list unchanged.
-            random.shuffle(communication_events)
-
-            for c in communication_events:
-                c.start_process()
-
-            # start waiting till one of the processes is selected
-            events = [c.communication for c in communication_events]
-            yield AnyOf(env, events)
-
-            entity = None
-            for c in communication_events:
-                if c.selected:
-                    entity = c.communication.value
-            return entity
-
-        return self.process(_select_process(self, communication_events))
+        return Select(self, communication_events, timeout)
 
 
 # ==========================================================
@@ -224,6 +462,9 @@ def process(func):
                 'The first argument of a process should always'
                 'be its Environment.'
             )
-        return env.process(func(*args, **kwargs))
+        generator = func(*args, **kwargs)
+        if env.profiler is not None:
+            generator = env.profiler.profile(func.__name__, generator)
+        return env.process(generator)
 
     return wrapper
@@ -0,0 +1,271 @@
+"""
+The fast engine is a leaner event loop for models which only use delays, channels, select statements
+and processes, e.g.:
+
+    env = Environment(engine="fast")
+
+It has the same API as the default engine (SimPy), and gives identical results: every event is scheduled at
+the same time, with the same priority and in the same order, so random numbers are drawn in the same order too.
+The difference is in how events are handled:
+
+- A process is itself the callback of the event it waits for (instead of a bound method per resume).
+- The event loop resumes a waiting process directly, without the general callback machinery of SimPy,
+  when the event succeeded and the process is its only callback (which is the case for delays, communications
+  and select statements).
+- Delays are lean timeout events, which are pushed on the event queue directly.
+- The zero-delay hop of the receiver of a communication is a plain entry on the event queue, which the event
+  loop handles itself.
+
+Other events (e.g. a select statement with a timeout, a process which waits for another process, a failed event
+or an interrupt) are handled as by SimPy.
+
+This is deliberately not a separate scheduler: it still uses SimPy's event objects and their callback lists, and
+a communication is still scheduled as events (the sender first, then the receiver after a zero-delay hop).
+Resolving a rendezvous inline (resuming the partner process within the communication) would change the order
+in which processes continue at the same time, and with it the results of a model, which the conformance suite
+does not allow. The gain is therefore modest, about 10% on the conformance suite: most of the time of a model
+is spent in its processes and in the channels and select statements, which both engines share.
+
+The conformance suite (python -m PyCh.reference.conformance) runs the reference models on both engines,
+and checks that the results are identical.
+
+The engine uses internals of SimPy (the layout of the event queue and private attributes of the environment,
+events and processes), so setup.py only allows the SimPy versions it was tested with, and
+tests/test_simpy_internals.py fails when these internals change.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+from heapq import heappush, heappop
+from simpy.core import StopSimulation
+from simpy.events import Event, Process, Initialize, Interruption, Timeout, PENDING, NORMAL, URGENT
+from .environment import Environment
+
+
+# ==========================================================
+# FastTimeout
+# ==========================================================
+class FastTimeout(Event):
+    """ A delay of a process, which is scheduled when it is created (see simpy.Timeout)"""
+
+    def __init__(self, env, delay, value=None):
+        if delay < 0:
+            raise ValueError(f'Negative delay {delay}')
+        self.env = env
+        self.callbacks = []
+        self._value = value
+        self._delay = delay
+        self._ok = True
+        heappush(env._queue, (env._now + delay, NORMAL, next(env._eid), self))
+
+    def __repr__(self):
+        return f'<FastTimeout({self._delay}) object at {id(self):#x}>'
+
+
+class FastHop:
+    """ A zero-delay step after which a triggered event is scheduled (see Environment.hop()), which is handled by
+    the event loop itself instead of by a callback"""
+    __slots__ = ('event',)
+
+    def __init__(self, event):
+        self.event = event  # the event which is scheduled after the hop
+
+
+# ==========================================================
+# FastProcess
+# ==========================================================
+class FastProcess(Process):
+    """ A process which is itself the callback of the event it waits for (see simpy.Process)"""
+
+    def __init__(self, env, generator):
+        if not hasattr(generator, 'throw'):
+            raise ValueError(f'{generator} is not a generator.')
+        self.env = env
+        self.callbacks = []
+        self._generator = generator
+        self._target = Initialize(env, self)
+
+    def __call__(self, event):
+        self._resume(event)
+
+    def interrupt(self, cause=None):
+        """ Interrupts this process, see simpy.Process.interrupt()"""
+        FastInterruption(self, cause)
+
+    def _resume(self, event):
+        """ Resumes the process with the value of the event, see simpy.Process._resume()
+
+        This is the general case, used for initialization, failed events, interrupts and events with several
+        callbacks. The common case is handled by FastEnvironment.simulate().
+        """
+        env = self.env
+        env._active_proc = self
+        while True:
+            try:
+                if event._ok:
+                    event = self._generator.send(event._value)
+                else:
+                    # The process has to handle the failed event (or fail itself)
+                    event._defused = True
+                    exception = type(event._value)(*event._value.args)
+                    exception.__cause__ = event._value
+                    event = self._generator.throw(exception)
+            except StopIteration as stop:
+                event = None
+                self._ok = True
+                self._value = stop.args[0] if len(stop.args) else None
+                env.schedule(self)
+                break
+            except BaseException as e:
+                event = None
+                self._ok = False
+                e.__traceback__ = e.__traceback__.tb_next
+                self._value = e
+                env.schedule(self)
+                break
+            try:
+                callbacks = event.callbacks
+            except AttributeError:
+                raise RuntimeError(f'Invalid yield value "{event}"') from None
+            if callbacks is not None:
+                callbacks.append(self)
+                break
+        self._target = event
+        env._active_proc = None
+
+
+class FastInterruption(Interruption):
+    """ Interrupts a FastProcess, see simpy.Interruption"""
+
+    def _interrupt(self, event):
+        if self.process._value is not PENDING:
+            return
+        self.process._target.callbacks.remove(self.process)
+        self.process._resume(self)
+
+
+# ==========================================================
+# FastEnvironment
+# ==========================================================
+class FastEnvironment(Environment):
+    """ An Environment with the fast engine, created by Environment(engine="fast")"""
+
+    def timeout(self, delay, value=None):
+        """ Creates a delay, see simpy.Environment.timeout()
+
+        :param delay: the (simulation) time duration of the delay
+        :param value: the value of the event
+        :return: the timeout event
+        """
+        if self.profiler is not None:
+            return Timeout(self, delay, value)  # scheduled via env.schedule(), so the profiler counts it
+        return FastTimeout(self, delay, value)
+
+    def hop(self, event):
+        """ Schedules a triggered event after a zero-delay step, see Environment.hop()
+
+        :param event: the triggered event (its value is set)
+        """
+        if self.profiler is not None:
+            return super().hop(event)  # a timeout, scheduled via env.schedule(), so the profiler counts it
+        heappush(self._queue, (self._now + 0.0, NORMAL, next(self._eid), FastHop(event)))
+
+    def step(self):
+        """ Handles the next event, see simpy.Environment.step()"""
+        if self._queue and self._queue[0][3].__class__ is FastHop:
+            self._now, _, _, hop = heappop(self._queue)
+            heappush(self._queue, (self._now, NORMAL, next(self._eid), hop.event))
+            return
+        super().step()
+
+    def process(self, generator):
+        """ Creates a process, see Environment.process()
+
+        :param generator: the generator of the process
+        :return: the process
+        """
+        process = FastProcess(self, generator)
+        if self.tracer is not None:
+            self.tracer.process_number(process)
+        if self.detector is not None:
+            self.detector.start(process)
+        return process
+
+    def simulate(self, until=None):
+        """ Runs the event loop, with the same semantics as simpy.Environment.run()
+
+        :param until: the time or event until which the simulation runs
+        :return: the value of the until event (if any)
+        """
+        if until is not None:
+            if not isinstance(until, Event):
+                at = until if isinstance(until, int) else float(until)
+                if at <= self._now:
+                    raise ValueError(f'until ({at}) must be greater than the current simulation time')
+                until = Event(self)
+                until._ok = True
+                until._value = None
+                self.schedule(until, URGENT, at - self._now)
+            elif until.callbacks is None:
+                return until.value
+            until.callbacks.append(StopSimulation.callback)
+
+        queue = self._queue
+        try:
+            while queue:
+                self._now, _, _, event = heappop(queue)
+                if event.__class__ is FastHop:
+                    # The event after a zero-delay hop is scheduled directly
+                    heappush(queue, (self._now, NORMAL, next(self._eid), event.event))
+                    continue
+                callbacks, event.callbacks = event.callbacks, None
+                process = callbacks[0] if len(callbacks) == 1 and event._ok else None
+                if process.__class__ is FastProcess:
+                    # The common case: resume the process which waits for this event
+                    self._active_proc = process
+                    try:
+                        event = process._generator.send(event._value)
+                    except StopIteration as stop:
+                        process._ok = True
+                        process._value = stop.args[0] if len(stop.args) else None
+                        process._target = self._active_proc = None
+                        self.schedule(process)
+                        continue
+                    except BaseException as e:
+                        process._ok = False
+                        e.__traceback__ = e.__traceback__.tb_next
+                        process._value = e
+                        process._target = self._active_proc = None
+                        self.schedule(process)
+                        continue
+                    try:
+                        callbacks = event.callbacks
+                    except AttributeError:
+                        raise RuntimeError(f'Invalid yield value "{event}"') from None
+                    if callbacks is not None:
+                        callbacks.append(process)
+                        process._target = event
+                        self._active_proc = None
+                    else:
+                        process._resume(event)  # the event has already been processed
+                    continue
+
+                # The general case, see simpy.Environment.step()
+                try:
+                    for callback in callbacks:
+                        callback(event)
+                except StopSimulation:
+                    # as SimPy, keep the remaining callbacks for the next run
+                    event.callbacks = callbacks[callbacks.index(callback) + 1:]
+                    self.schedule(event, -1)
+                    raise
+                if not event._ok and not hasattr(event, '_defused'):
+                    exception = type(event._value)(*event._value.args)
+                    exception.__cause__ = event._value
+                    raise exception
+        except StopSimulation as stop:
+            return stop.args[0]
+        if until is not None:
+            raise RuntimeError(f'No scheduled events left but "until" event was not triggered: {until}')
+        return None
@@ -0,0 +1,484 @@
+"""
+A Line describes a serial production line of the tutorial (chapter 10): a generator, stations of a buffer and
+one or more parallel servers, and an exit, e.g.:
+
+    from PyCh.core.lines import Line, Generator, Buffer, Server, Exit
+
+    line = Line(Generator(ta=3), Buffer(), Server(ts=1), Buffer(capacity=2), Server(ts=2, servers=2), Exit())
+    result = line.run(N=1000000, seed=42)
+    result.mean_flow_time
+
+The interarrival and process times of the N lots are drawn in advance (exponentially distributed by default).
+A line is then not simulated event by event, but its departure times are computed with the recursions of the
+flow line, using numpy:
+
+- A single server with an unlimited buffer follows the Lindley recursion D[i] = max(A[i], D[i-1]) + S[i],
+  which is computed for all lots at once as a running maximum of cumulative sums.
+- A finite buffer blocks the server in front of it: a lot can only leave when there is room, so D[i] is at least
+  the departure time of lot i-capacity-1 from the next server. The stations between unlimited buffers are solved
+  together, by repeating the vectorized recursions until nothing changes (if this takes too long, the lots are
+  computed one by one).
+- Parallel servers behind an unlimited buffer process the lots in FIFO order on the first free server,
+  after which the lots leave in the order in which they are finished.
+
+Lines which cannot be computed like this (parallel servers next to a finite buffer) are simulated with the
+event-driven Environment instead, with the same interarrival and process times. Line.cross_check() runs both
+and compares the results.
+
+A Buffer is optional: without a buffer, a server (or the generator) sends its lots directly to the next server.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+from heapq import heapreplace
+import numpy
+from .streams import stream_seed
+from .environment import Environment, process
+from .channel import Channel
+from . import buffer
+
+
+# ==========================================================
+# Elements of a line
+# ==========================================================
+class Generator:
+    """ The generator of a line, which creates a lot every interarrival time"""
+
+    def __init__(self, ta, distribution="exponential"):
+        """
+
+        :param ta: the (mean) interarrival time
+        :param distribution: "exponential" (default), "constant",
+            or a function f(rng, size) which gives an array of interarrival times
+        """
+        self.ta = ta
+        self.distribution = distribution
+
+    def __repr__(self):
+        return f"Generator({self.ta!r}, {self.distribution!r})"
+
+
+class Buffer:
+    """ A FIFO buffer in front of a server"""
+
+    def __init__(self, capacity=None):
+        """
+
+        :param capacity: the maximum number of stored lots, None for an unlimited capacity
+        """
+        if capacity is not None and capacity < 1:
+            raise ValueError('The capacity of a buffer must be at least 1.')
+        self.capacity = capacity
+
+    def __repr__(self):
+        return f"Buffer({self.capacity!r})"
+
+
+class Server:
+    """ One or more identical parallel servers, which process one lot at a time each"""
+
+    def __init__(self, ts, servers=1, distribution="exponential"):
+        """
+
+        :param ts: the (mean) process time
+        :param servers: the number of parallel servers
+        :param distribution: "exponential" (default), "constant",
+            or a function f(rng, size) which gives an array of process times
+        """
+        if servers < 1:
+            raise ValueError('A station needs at least one server.')
+        self.ts = ts
+        self.servers = servers
+        self.distribution = distribution
+
+    def __repr__(self):
+        return f"Server({self.ts!r}, {self.servers!r}, {self.distribution!r})"
+
+
+class Exit:
+    """ The exit of a line, which receives all lots"""
+
+    def __repr__(self):
+        return "Exit()"
+
+
+def draw_times(rng, mean, distribution, size):
+    """ Draws interarrival or process times
+
+    :param rng: the numpy Generator
+    :param mean: the mean time
+    :param distribution: "exponential", "constant", or a function f(rng, size)
+    :param size: the number of times
+    :return: the times
+    :rtype: numpy.ndarray
+    """
+    if callable(distribution):
+        times = numpy.asarray(distribution(rng, size), dtype=float)
+        if times.shape != (size,):
+            raise ValueError(f'The distribution gave an array of shape {times.shape}, instead of ({size},).')
+        return times
+    elif distribution == "exponential":
+        return rng.exponential(mean, size)
+    elif distribution == "constant":
+        return numpy.full(size, float(mean))
+    raise ValueError(f'Unknown distribution {distribution!r}, choose "exponential", "constant" or a function.')
+
+
+# ==========================================================
+# LineResult
+# ==========================================================
+class LineResult:
+    """ The entry, exit and departure times of the lots of a line, by lot number"""
+
+    def __init__(self, entry, exit, departures, method):
+        """
+
+        :param entry: the time at which every lot was created by the generator
+        :param exit: the time at which every lot arrived at the exit
+        :param departures: for every station, the time at which every lot left its server
+        :param method: "vectorized" or "event", the way in which the result was computed
+        """
+        self.entry = entry
+        self.exit = exit
+        self.departures = departures
+        self.method = method
+
+    def __len__(self):
+        return len(self.exit)
+
+    @property
+    def flow_time(self):
+        """ The flow time of every lot"""
+        return self.exit - self.entry
+
+    @property
+    def mean_flow_time(self):
+        """ The mean flow time of the lots"""
+        return float(self.flow_time.mean())
+
+    @property
+    def throughput(self):
+        """ The number of lots per time unit, up to the last exit"""
+        return len(self.exit) / float(self.exit.max())
+
+
+# ==========================================================
+# Line
+# ==========================================================
+class Line:
+    """ A serial line of a generator, stations (an optional buffer and one or more parallel servers) and an exit"""
+
+    def __init__(self, *elements):
+        """
+
+        :param elements: the Generator, then for every station an optional Buffer and a Server, and optionally an Exit
+        """
+        elements = list(elements)
+        if elements and isinstance(elements[-1], Exit):
+            elements.pop()
+        if not elements or not isinstance(elements[0], Generator):
+            raise TypeError('A line starts with a Generator.')
+        self.generator = elements[0]
+        self.capacities = []  # for every station, the capacity of its buffer (None is unlimited, 0 is no buffer)
+        self.servers = []  # the Server of every station
+        capacity = 0
+        for element in elements[1:]:
+            if isinstance(element, Buffer) and capacity == 0:
+                capacity = element.capacity
+            elif isinstance(element, Server):
+                self.capacities.append(capacity)
+                self.servers.append(element)
+                capacity = 0
+            else:
+                raise TypeError(f'Unexpected {element!r}: a station is an optional Buffer followed by a Server.')
+        if capacity != 0:
+            raise TypeError('A buffer must be followed by a Server.')
+        if not self.servers:
+            raise TypeError('A line needs at least one Server.')
+
+    @property
+    def vectorizable(self):
+        """ Is true if the line can be computed with the vectorized recursions (see Line.solve())
+
+        Parallel servers are only computed vectorized when the buffers in front of them and behind them are unlimited.
+        """
+        for k, server in enumerate(self.servers):
+            if server.servers > 1:
+                after = self.capacities[k + 1] if k + 1 < len(self.servers) else None
+                if self.capacities[k] is not None or after is not None:
+                    return False
+        return True
+
+    def sample(self, N, seed=None):
+        """ Draws the interarrival times and the process times of N lots
+
+        The generator and every station draw from their own random stream, so changing one station does not
+        change the times of the others.
+
+        :param N: the number of lots
+        :param seed: the seed, if None it is drawn from numpy's global random state
+        :return: the interarrival times, and for every station the process times, by lot number
+        :rtype: tuple[numpy.ndarray, list[numpy.ndarray]]
+        """
+        if seed is None:
+            seed = int(numpy.random.randint(2 ** 32, dtype='uint64'))
+        rng = numpy.random.default_rng(stream_seed(seed, "generator"))
+        interarrival = draw_times(rng, self.generator.ta, self.generator.distribution, N)
+        process_times = []
+        for k, server in enumerate(self.servers):
+            rng = numpy.random.default_rng(stream_seed(seed, f"station {k}"))
+            process_times.append(draw_times(rng, server.ts, server.distribution, N))
+        return interarrival, process_times
+
+    def run(self, N, seed=None):
+        """ Computes the line for N lots, vectorized if possible and event-driven otherwise
+
+        :param N: the number of lots
+        :param seed: the seed of the interarrival and process times
+        :return: the result
+        :rtype: LineResult
+        """
+        if self.vectorizable:
+            return self.solve(N, seed)
+        return self.simulate(N, seed)
+
+    def solve(self, N, seed=None, times=None, max_sweeps=10):
+        """ Computes the line for N lots with the vectorized recursions
+
+        :param N: the number of lots
+        :param seed: the seed of the interarrival and process times
+        :param times: instead of a seed, the interarrival and process times (see Line.sample())
+        :param max_sweeps: the maximum number of times the recursions of stations between unlimited buffers are
+            repeated for a window of lots, after which the lots of the window are computed one by one
+        :return: the result
+        :rtype: LineResult
+        """
+        if not self.vectorizable:
+            raise ValueError('This line has parallel servers next to a finite buffer, use Line.simulate().')
+        interarrival, process_times = times if times is not None else self.sample(N, seed)
+
+        # The generator is the first "server": its process time for lot i is the interarrival time before it
+        station_times = [numpy.concatenate([[0.0], interarrival[:N - 1]])] + [s[:N] for s in process_times]
+        capacities = [None] + self.capacities
+        departures = [None] * len(station_times)
+
+        # The stations are solved in segments, between unlimited buffers
+        first = 0
+        while first < len(station_times):
+            last = first
+            while last + 1 < len(station_times) and capacities[last + 1] is not None:
+                last += 1
+            if first > 0:
+                order = numpy.argsort(departures[first - 1], kind='stable')  # the lots in the order of arrival
+                arrival = departures[first - 1][order]
+            else:
+                order = numpy.arange(N)
+                arrival = None
+            segment = [station_times[k][order] for k in range(first, last + 1)]
+            blocking = capacities[first + 1:last + 1]
+            if first > 0 and self.servers[first - 1].servers > 1:
+                result = [parallel_departures(arrival, segment[0], self.servers[first - 1].servers)]
+            else:
+                result = solve_segment(arrival, segment, blocking, max_sweeps)
+            for k, d in enumerate(result):
+                departures[first + k] = numpy.empty(N)
+                departures[first + k][order] = d
+            first = last + 1
+
+        entry = numpy.concatenate([[0.0], departures[0][:N - 1] + interarrival[:N - 1]])
+        return LineResult(entry, departures[-1], departures[1:], "vectorized")
+
+    def simulate(self, N, seed=None, times=None, engine="simpy"):
+        """ Simulates the line for N lots with the event-driven Environment
+
+        :param N: the number of lots
+        :param seed: the seed of the interarrival and process times
+        :param times: instead of a seed, the interarrival and process times (see Line.sample())
+        :param engine: the engine of the environment
+        :return: the result
+        :rtype: LineResult
+        """
+        interarrival, process_times = times if times is not None else self.sample(N, seed)
+        env = Environment(seed=0, engine=engine)
+        entry = numpy.empty(N)
+        exit = numpy.empty(N)
+        departures = [numpy.empty(N) for s in self.servers]
+        a = Channel(env)
+        LineGenerator(env, a, interarrival, N, entry)
+        for k, server in enumerate(self.servers):
+            if self.capacities[k] != 0:
+                b = Channel(env)
+                buffer.Buffer(env, a, b, self.capacities[k])
+                a = b
+            c = Channel(env)
+            for j in range(server.servers):
+                LineServer(env, a, c, process_times[k], departures[k])
+            a = c
+        E = LineExit(env, a, N, exit)
+        env.run(until=E)
+        return LineResult(entry, exit, departures, "event")
+
+    def cross_check(self, N, seed=None, engine="simpy"):
+        """ Computes the line with the vectorized recursions and simulates it with the same times, and compares them
+
+        :param N: the number of lots
+        :param seed: the seed of the interarrival and process times
+        :param engine: the engine of the environment
+        :return: the largest difference between the exit times of a lot
+        :rtype: float
+        """
+        times = self.sample(N, seed)
+        vectorized = self.solve(N, times=times)
+        event = self.simulate(N, times=times, engine=engine)
+        return float(numpy.max(numpy.abs(vectorized.exit - event.exit)))
+
+
+# ==========================================================
+# Recursions
+# ==========================================================
+def solve_segment(arrival, times, blocking, max_sweeps, window=1024):
+    """ Computes the departure times of single-server stations between two unlimited buffers
+
+    Station k (the first is the generator if arrival is None) starts lot i when it arrives and the previous lot has
+    left, and lot i leaves when it is finished and there is room in the next buffer:
+    D[k][i] = max(max(D[k-1][i], D[k][i-1]) + S[k][i], D[k+1][i-capacity-1]).
+
+    Lot i only depends on lots 0..i, so the lots are computed in windows. In a sweep over a window, the recursion
+    of every station is computed for all lots of the window at once with a running maximum, using the departure
+    times of the next station of the previous sweep. The sweeps are repeated until no departure time changes.
+    A window with long periods of blocking needs many sweeps, so after max_sweeps sweeps the remaining lots
+    of the window are computed one by one.
+
+    :param arrival: the arrival times at the first station, in the order of the lots, or None for the generator
+    :param times: the process times of the stations, in the order of the lots
+    :param blocking: for every station after the first, the capacity of the (finite) buffer in front of it
+    :param max_sweeps: the maximum number of sweeps over a window
+    :param window: the number of lots of a window
+    :return: the departure times of the stations
+    :rtype: list[numpy.ndarray]
+    """
+    n = len(times[0])
+    if not blocking:
+        window = n  # a single station needs a single sweep
+    departures = [numpy.full(n, -numpy.inf) for s in times]
+    first = 0  # the lots before the first lot are final
+    while first < n:
+        end = min(first + window, n)
+        for sweep in range(max_sweeps):
+            changed = end  # the first lot which changed in this sweep
+            for k, s in enumerate(times):
+                s = s[first:end]
+                if k > 0:
+                    start = departures[k - 1][first:end] + s
+                elif arrival is not None:
+                    start = arrival[first:end] + s
+                else:
+                    start = numpy.full(end - first, -numpy.inf)
+                if first > 0:
+                    start[0] = max(start[0], departures[k][first - 1] + s[0])
+                elif arrival is None and k == 0:
+                    start[0] = s[0]  # the generator starts at time 0
+                if k + 1 < len(times):
+                    shift = blocking[k] + 1  # lot i waits for lot i-shift to leave the next station
+                    low = max(first - shift, 0)
+                    if low < end - shift:
+                        start[low + shift - first:] = numpy.maximum(start[low + shift - first:],
+                                                                    departures[k + 1][low:end - shift])
+                cumulative = numpy.cumsum(s)
+                d = cumulative + numpy.maximum.accumulate(start - cumulative)
+                difference = numpy.flatnonzero(d != departures[k][first:end])
+                if len(difference):
+                    changed = min(changed, first + difference[0])
+                    departures[k][first:end] = d
+            if not blocking:
+                break
+            first = changed  # the lots before the first changed lot are final
+            if first == end:
+                break
+        else:
+            solve_lots(arrival, times, blocking, departures, first, end)
+        first = end
+    return departures
+
+
+def solve_lots(arrival, times, blocking, departures, first, end):
+    """ Computes the departure times of single-server stations lot by lot, see solve_segment()
+
+    :param arrival: the arrival times at the first station, in the order of the lots, or None for the generator
+    :param times: the process times of the stations, in the order of the lots
+    :param blocking: for every station after the first, the capacity of the (finite) buffer in front of it
+    :param departures: the departure times of the stations, of which the lots before the first lot are final
+    :param first: the first lot which is computed
+    :param end: the lot after the last lot which is computed
+    """
+    m = len(times)
+    times = [s[first:end].tolist() for s in times]
+    arrival = arrival[first:end].tolist() if arrival is not None else [-numpy.inf] * (end - first)
+    result = [[0.0] * (end - first) for s in times]
+    # the departure of the previous lot from every station (the generator starts at time 0)
+    previous = [d[first - 1] if first > 0 else -numpy.inf for d in departures]
+    if first == 0 and arrival[0] == -numpy.inf:
+        previous[0] = 0.0
+    for j in range(end - first):
+        d = arrival[j]
+        for k in range(m):
+            d = max(d, previous[k]) + times[k][j]
+            if k + 1 < m:
+                i = first + j - blocking[k] - 1  # the lot which has to leave the next station first
+                if i >= first:
+                    d = max(d, result[k + 1][i - first])
+                elif i >= 0:
+                    d = max(d, departures[k + 1][i])
+            result[k][j] = previous[k] = d
+    for k in range(m):
+        departures[k][first:end] = result[k]
+
+
+def parallel_departures(arrival, times, servers):
+    """ Computes the departure times of parallel servers, which process the lots in FIFO order on the first free server
+
+    :param arrival: the arrival times, in the order of the lots
+    :param times: the process times, in the order of the lots
+    :param servers: the number of servers
+    :return: the departure times
+    :rtype: numpy.ndarray
+    """
+    free = [-numpy.inf] * servers  # a heap with the time at which every server becomes free
+    departures = []
+    for a, s in zip(arrival.tolist(), times.tolist()):
+        d = max(a, free[0]) + s
+        heapreplace(free, d)
+        departures.append(d)
+    return numpy.array(departures)
+
+
+# ==========================================================
+# Processes of the event-driven line
+# ==========================================================
+@process
+def LineGenerator(env, c_out, interarrival, N, entry):
+    """ Sends the lots 0, 1, ..., N-1 with the given interarrival times, and records their entry times"""
+    for i in range(N):
+        entry[i] = env.now
+        yield env.execute(c_out.send(i))
+        if i + 1 < N:
+            yield env.timeout(interarrival[i])
+
+
+@process
+def LineServer(env, c_in, c_out, times, departures):
+    """ Processes every lot in its given process time, and records the time it leaves the server"""
+    while True:
+        i = yield env.execute(c_in.receive())
+        yield env.timeout(times[i])
+        yield env.execute(c_out.send(i))
+        departures[i] = env.now
+
+
+@process
+def LineExit(env, c_in, N, exit):
+    """ Receives N lots, and records the time every lot leaves the line"""
+    for n in range(N):
+        i = yield env.execute(c_in.receive())
+        exit[i] = env.now
@@ -0,0 +1,515 @@
+"""
+A partitioned model divides the processes of a large model over partitions, which run in separate OS processes,
+so the model uses several cores, e.g. a factory with a partition per work area:
+
+    model = PartitionedModel(seed=42)
+    links = [model.link(f"area {k}", lookahead=0.5) for k in range(areas)]
+
+    def area(env, k):
+        c_in = links[k - 1].receiver(env) if k > 0 else None  # a Channel from the previous area
+        c_out = links[k].sender(env)  # a Channel to the next area
+        ...
+        return exits  # the result of the partition
+
+    for k in range(areas):
+        model.partition(f"area {k}", area, k)
+    results = model.run(until=10000, processes=4)  # {"area 0": ..., "area 1": ..., ...}
+
+Every partition has its own Environment, in which its build function creates its channels and processes.
+Partitions only communicate over links. A link is a channel with a transport time, its lookahead: an entity which
+is sent at time t arrives in the other partition at time t + lookahead. Sending never blocks (as sending to
+a buffer), and the entities wait in the link (in the order of sending) until they are received.
+
+The partitions are synchronized with a conservative protocol (Chandy-Misra-Bryant, with null messages):
+a partition only handles the events before the earliest time at which one of its links can still deliver an
+entity. Whenever a partition has advanced, it sends its new entities over its outgoing links, together with a
+null message: the time before which it will not send anything anymore, plus the lookahead of the link.
+Since every lookahead is positive, the partitions can always advance.
+
+Entities which arrive at the same time are delivered before the other events at that time, in the order of the links
+(in which they were created by model.link()) and of sending. Therefore, the results do not depend on the number
+of processes: a run with processes=1 (all partitions in the current process, one after another) gives exactly
+the same results. All partitions use the seed of the model, so a named random stream (e.g. env.stream("server 3"))
+gives the same numbers as in an unpartitioned model with that seed.
+
+The simulation runs until the given time (events at that time are not handled), after which the results of the
+build functions are returned. The partitions are divided over the processes in turn, and the processes are forked
+on platforms which support it, so models which are defined in a notebook (or another __main__ module) can be used.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import multiprocessing
+import os
+import traceback
+from collections import deque
+from heapq import heappush, heappop
+from math import inf
+from queue import Empty
+from simpy.events import URGENT
+from .environment import Environment, process
+from .channel import Channel
+
+
+# ==========================================================
+# Link
+# ==========================================================
+class Link:
+    """ A connection between two partitions, with a positive transport time (its lookahead)"""
+
+    def __init__(self, number, name, lookahead):
+        """
+
+        :param number: the number of the link in its model
+        :param name: the name of the link
+        :param lookahead: the (simulation) time between sending an entity and its arrival in the other partition
+        """
+        if not lookahead > 0:
+            raise ValueError('The lookahead of a link must be positive.')
+        self.number = number  # the number of the link in its model
+        self.name = name  # the name of the link
+        self.lookahead = lookahead  # the transport time of the link
+
+    def __repr__(self):
+        return f"Link({self.name!r}, lookahead={self.lookahead})"
+
+    def sender(self, env):
+        """ Creates the sending end of this link in a partition
+
+        :param env: the environment of the partition
+        :return: the channel over which entities are sent to the other partition
+        :rtype: Channel
+        """
+        output = LinkOutput(self, partition_of(env))
+        return output.channel
+
+    def receiver(self, env, policy="random"):
+        """ Creates the receiving end of this link in a partition
+
+        :param env: the environment of the partition
+        :param policy: the matching policy of the channel (see Channel)
+        :return: the channel over which the entities from the other partition are received
+        :rtype: Channel
+        """
+        link_input = LinkInput(self, partition_of(env), policy)
+        return link_input.channel
+
+
+def partition_of(env):
+    """ Gets the partition of an environment
+
+    :param env: the environment
+    :return: the partition
+    :rtype: Partition
+    """
+    partition = getattr(env, "partition", None)
+    if partition is None:
+        raise ValueError('A link can only be used in the build function of a partition.')
+    return partition
+
+
+class LinkOutput:
+    """ The sending end of a link, which collects the sent entities until they are sent to the other partition"""
+
+    def __init__(self, link, partition):
+        """
+
+        :param link: the link
+        :param partition: the sending partition
+        """
+        if link.number in partition.outputs:
+            raise ValueError(f'{link} is already sent over by partition {partition.name!r}.')
+        self.number = link.number  # the number of the link
+        self.lookahead = link.lookahead  # the transport time of the link
+        self.channel = Channel(partition.env)  # the channel over which the entities are sent
+        self.entities = []  # the sent entities, (arrival time, entity), which are not yet sent to the other partition
+        self.clock = link.lookahead  # the last time sent in a null message
+        partition.outputs[link.number] = self
+        LinkSend(partition.env, self)
+
+
+class LinkInput:
+    """ The receiving end of a link, in which the arrived entities wait until they are received"""
+
+    def __init__(self, link, partition, policy):
+        """
+
+        :param link: the link
+        :param partition: the receiving partition
+        :param policy: the matching policy of the channel
+        """
+        if link.number in partition.inputs:
+            raise ValueError(f'{link} is already received from by partition {partition.name!r}.')
+        self.env = partition.env
+        self.channel = Channel(partition.env, policy)  # the channel over which the entities are received
+        self.queue = deque()  # the arrived entities, which have not been received yet
+        self.arrival = None  # the event for which the delivering process waits (None if it does not wait)
+        self.clock = link.lookahead  # the time before which all entities of the link are known
+        self.sequence = 0  # the number of entities which have been sent over the link
+        partition.inputs[link.number] = self
+        LinkDeliver(partition.env, self)
+
+    def deliver(self, entity):
+        """ Lets an entity arrive at the current time
+
+        :param entity: the entity
+        """
+        self.queue.append(entity)
+        arrival = self.arrival
+        if arrival is not None:
+            self.arrival = None
+            arrival._ok = True
+            arrival._value = None
+            self.env.schedule(arrival, URGENT)  # before the other events at this time
+
+
+@process
+def LinkSend(env, output):
+    """ Receives the entities which are sent over a link, and collects them with their arrival time"""
+    c = output.channel
+    while True:
+        x = yield env.execute(c.receive())
+        output.entities.append((env.now + output.lookahead, x))
+
+
+@process
+def LinkDeliver(env, link_input):
+    """ Sends the entities which arrived over a link, in the order in which they arrived"""
+    c = link_input.channel
+    queue = link_input.queue
+    while True:
+        if not queue:
+            link_input.arrival = env.event()
+            yield link_input.arrival
+        yield env.execute(c.send(queue.popleft()))
+
+
+# ==========================================================
+# Partition
+# ==========================================================
+class Partition:
+    """ A group of processes with its own environment, which communicates with other partitions over links"""
+
+    def __init__(self, number, name, build, args, kwargs):
+        """
+
+        :param number: the number of the partition in its model
+        :param name: the name of the partition
+        :param build: the function which builds the partition, build(env, *args, **kwargs)
+        :param args: the positional arguments of the build function
+        :param kwargs: the keyword arguments of the build function
+        """
+        self.number = number
+        self.name = name
+        self.build = build
+        self.args = args
+        self.kwargs = kwargs
+        self.env = None  # the environment (created when the partition is started)
+        self.outputs = {}  # the sending ends of links, by link number
+        self.inputs = {}  # the receiving ends of links, by link number
+        self.inbox = []  # the entities which have not arrived yet, a heap of (time, link number, sequence, entity)
+        self.time = 0  # all events before this time have been handled
+        self.result = None  # the value returned by the build function
+
+    def start(self, seed, engine):
+        """ Creates the environment, and builds the processes of the partition
+
+        :param seed: the seed of the model
+        :param engine: the engine of the environments
+        """
+        env = self.env = Environment(seed=seed, engine=engine)
+        env.partition = self
+        self.outputs = {}
+        self.inputs = {}
+        self.inbox = []
+        self.time = env.now
+        self.result = self.build(env, *self.args, **self.kwargs)
+
+    def receive(self, number, clock, entities):
+        """ Receives the new entities and the null message of an incoming link
+
+        :param number: the number of the link
+        :param clock: the time before which all entities of the link are known
+        :param entities: the new entities, (arrival time, entity)
+        """
+        link_input = self.inputs[number]
+        for time, entity in entities:
+            heappush(self.inbox, (time, number, link_input.sequence, entity))
+            link_input.sequence += 1
+        link_input.clock = clock
+
+    def advance(self, until, window):
+        """ Handles the events which are safe, delivering the entities which arrive in the meantime
+
+        :param until: the time until which the simulation runs
+        :param window: the maximum (simulation) time the partition advances at once
+        :return: a boolean which is true if the partition has advanced
+        :rtype: bool
+        """
+        env = self.env
+        inbox = self.inbox
+        safe = min([link_input.clock for link_input in self.inputs.values()], default=inf)
+        limit = min(safe, until, self.time + window)
+        advanced = False
+        while True:
+            arrival = inbox[0][0] if inbox else inf
+            target = min(limit, arrival)
+            if target > env.now:
+                env.simulate(target)
+            if target > self.time:
+                self.time = target
+                advanced = True
+            if arrival != target or arrival >= safe or arrival >= until:
+                return advanced
+            # All entities which arrive at this time are known, since it is before every link's clock
+            while inbox and inbox[0][0] == target:
+                _, number, _, entity = heappop(inbox)
+                self.inputs[number].deliver(entity)
+            advanced = True
+
+    def messages(self):
+        """ Gets the messages for the outgoing links: their new entities, and their new clock (the null message)
+
+        :return: the messages, (link number, clock, entities)
+        :rtype: list[tuple[int, float, list]]
+        """
+        messages = []
+        for number, output in self.outputs.items():
+            clock = self.time + output.lookahead
+            if output.entities or clock > output.clock:
+                messages.append((number, clock, output.entities))
+                output.entities = []
+                output.clock = clock
+        return messages
+
+
+# ==========================================================
+# Worker
+# ==========================================================
+class Worker:
+    """ Runs some of the partitions of a model in one OS process, and exchanges messages with the other workers"""
+
+    def __init__(self, model, index, queues=None):
+        """
+
+        :param model: the partitioned model
+        :param index: the number of this worker
+        :param queues: the inboxes of all workers (None if there is only one worker)
+        """
+        self.model = model
+        self.index = index
+        self.queues = queues
+        self.workers = 1 if queues is None else len(queues)
+        self.partitions = model.partitions[index::self.workers]
+        self.receivers = {}  # the receiving partition of every link, (worker, partition number), by link number
+        self.outgoing = {}  # the messages for the other workers, by worker
+        self.done = 0  # the number of other workers which have finished
+
+    def start(self):
+        """ Builds the partitions, and lets all workers know which partitions send and receive over which links"""
+        for partition in self.partitions:
+            partition.start(self.model.seed, self.model.engine)
+        ends = [(partition.number, list(partition.outputs), list(partition.inputs)) for partition in self.partitions]
+        for worker in range(self.workers):
+            if worker != self.index:
+                self.queues[worker].put(("links", self.index, ends))
+        all_ends = {self.index: ends}
+        early = []  # messages of workers which have already started
+        while len(all_ends) < self.workers:
+            item = self.queues[self.index].get()
+            if item[0] == "links":
+                all_ends[item[1]] = item[2]
+            else:
+                early.append(item)
+        senders = {}
+        for worker, ends in all_ends.items():
+            for number, outputs, inputs in ends:
+                for link in outputs:
+                    senders[link] = number
+                for link in inputs:
+                    self.receivers[link] = (worker, number)
+        for link in self.model.links:
+            if (link.number in senders) != (link.number in self.receivers):
+                raise ValueError(f'{link} needs both a sending and a receiving partition.')
+        for item in early:
+            self.handle(item)
+
+    def send(self, messages):
+        """ Sends the messages of a partition to the receiving partitions
+
+        :param messages: the messages, (link number, clock, entities)
+        """
+        for message in messages:
+            worker, number = self.receivers[message[0]]
+            if worker == self.index:
+                self.model.partitions[number].receive(*message)
+            else:
+                self.outgoing.setdefault(worker, []).append((number, message))
+
+    def flush(self):
+        """ Sends the collected messages to the other workers"""
+        for worker, messages in self.outgoing.items():
+            self.queues[worker].put(("messages", self.index, messages))
+        self.outgoing = {}
+
+    def handle(self, item):
+        """ Handles an item from the inbox of this worker"""
+        kind, worker, messages = item
+        if kind == "messages":
+            for number, message in messages:
+                self.model.partitions[number].receive(*message)
+        elif kind == "done":
+            self.done += 1
+
+    def wait(self, block):
+        """ Handles the items in the inbox of this worker, waiting for an item if block is true"""
+        inbox = self.queues[self.index]
+        if block:
+            self.handle(inbox.get())
+        while True:
+            try:
+                item = inbox.get_nowait()
+            except Empty:
+                return
+            self.handle(item)
+
+    def run(self, until, window):
+        """ Runs the partitions of this worker until the given time
+
+        :param until: the time until which the simulation runs
+        :param window: the maximum (simulation) time a partition advances at once
+        :return: the results of the partitions, by name
+        :rtype: dict
+        """
+        self.start()
+        running = list(self.partitions)
+        while running:
+            advanced = False
+            for partition in running:
+                if partition.advance(until, window):
+                    advanced = True
+                self.send(partition.messages())
+            running = [partition for partition in running if partition.time < until]
+            if self.queues is None:
+                if running and not advanced:
+                    raise RuntimeError('The partitions cannot advance.')
+            else:
+                self.flush()
+                if running:
+                    self.wait(block=not advanced)
+
+        if self.queues is not None:
+            # The other workers may still send messages (after the end), so the inbox is emptied until they are done
+            for worker in range(self.workers):
+                if worker != self.index:
+                    self.queues[worker].put(("done", self.index, None))
+            while self.done < self.workers - 1:
+                self.wait(block=True)
+        return {partition.name: partition.result for partition in self.partitions}
+
+
+def run_worker(model, index, queues, results, until, window):
+    """ Runs a worker in a child process, and puts its results (or its error) in the results queue"""
+    try:
+        results.put(("ok", Worker(model, index, queues).run(until, window)))
+    except BaseException:
+        results.put(("error", traceback.format_exc()))
+
+
+# ==========================================================
+# PartitionedModel
+# ==========================================================
+class PartitionedModel:
+    """ A model of which the partitions run in separate OS processes, and communicate over links"""
+
+    def __init__(self, seed=None, engine="simpy"):
+        """
+
+        :param seed: the seed of the environments of the partitions.
+            If no seed is given, it is drawn from numpy's global random state (once, for all partitions).
+        :param engine: the engine of the environments of the partitions (see Environment)
+        """
+        if seed is None:
+            from numpy import random
+            seed = int(random.randint(2 ** 32, dtype='uint64'))
+        self.seed = seed  # the seed of the environments of the partitions
+        self.engine = engine  # the engine of the environments of the partitions
+        self.links = []  # the links between the partitions
+        self.partitions = []  # the partitions
+
+    def link(self, name, lookahead):
+        """ Creates a link, over which one partition sends entities to another partition
+
+        :param name: the name of the link
+        :param lookahead: the (simulation) time between sending an entity and its arrival in the other partition
+        :return: the link
+        :rtype: Link
+        """
+        link = Link(len(self.links), name, lookahead)
+        self.links.append(link)
+        return link
+
+    def partition(self, name, build, *args, **kwargs):
+        """ Adds a partition, which is built by build(env, *args, **kwargs) in the process in which it runs
+
+        The build function creates the channels and processes of the partition in the environment env,
+        and uses link.sender(env) and link.receiver(env) to communicate with other partitions.
+        The value it returns (e.g. a list which is filled during the simulation) is the result of the partition.
+
+        :param name: the name of the partition
+        :param build: the function which builds the partition
+        :return: the partition
+        :rtype: Partition
+        """
+        if any(partition.name == name for partition in self.partitions):
+            raise ValueError(f'There is already a partition {name!r}.')
+        partition = Partition(len(self.partitions), name, build, args, kwargs)
+        self.partitions.append(partition)
+        return partition
+
+    def run(self, until, processes=None, window=None):
+        """ Runs the partitions until the given time, in parallel on a number of OS processes
+
+        :param until: the (simulation) time until which the simulation runs
+        :param processes: the number of OS processes, None to use all cores, 1 to run in the current process
+        :param window: the maximum (simulation) time a partition advances before it synchronizes with the others.
+            Smaller windows let the partitions run more in parallel, at the cost of more messages (default until / 100).
+        :return: the results of the build functions of the partitions, by name
+        :rtype: dict
+        """
+        if not self.partitions:
+            raise ValueError('The model has no partitions.')
+        if not until > 0:
+            raise ValueError('Give a positive time until which the simulation runs.')
+        if window is None:
+            window = until / 100
+        if processes is None:
+            processes = os.cpu_count() or 1
+        processes = min(processes, len(self.partitions))
+        if processes <= 1:
+            return Worker(self, 0).run(until, window)
+
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() \
+            else multiprocessing.get_context()
+        queues = [context.Queue() for _ in range(processes)]
+        results = context.Queue()
+        workers = [context.Process(target=run_worker, args=(self, index, queues, results, until, window), daemon=True)
+                   for index in range(processes)]
+        for worker in workers:
+            worker.start()
+        combined = {}
+        try:
+            for _ in workers:
+                status, value = results.get()
+                if status == "error":
+                    raise RuntimeError(f'A partition failed:\n{value}')
+                combined.update(value)
+        except BaseException:
+            for worker in workers:
+                worker.terminate()  # the other workers would wait for the failed one forever
+            raise
+        finally:
+            for worker in workers:
+                worker.join()
+        return {partition.name: combined[partition.name] for partition in self.partitions}
@@ -0,0 +1,140 @@
+"""
+Profiling shows which processes of a model use the most events and wall-clock time, e.g.:
+
+    env = Environment(profile=True)
+    ...
+    env.run(until=E)
+
+prints a table at the end of env.run(), with for every process function (decorated with @process):
+
+- processes: the number of processes which were started
+- resumes: the number of times the processes were resumed (steps between two yields)
+- events: the number of events scheduled while the processes were running (timeouts, communications, ...)
+- wall time: the wall-clock time spent inside the processes
+
+The wall time only includes the Python code of the processes (and the channels and select statements they use),
+not the time SimPy needs to handle the events, so the slow parts of a model can be found without profiling SimPy.
+Events which are scheduled outside of a process step (e.g. by the callback of an event) are counted as "(other)".
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+from time import perf_counter
+
+
+# ==========================================================
+# ProcessProfile
+# ==========================================================
+class ProcessProfile:
+    """ The profile of a process function"""
+    __slots__ = ('name', 'processes', 'resumes', 'events', 'time')
+
+    def __init__(self, name):
+        """
+
+        :param name: the name of the process function
+        """
+        self.name = name
+        self.processes = 0  # the number of started processes
+        self.resumes = 0  # the number of resumes of the processes
+        self.events = 0  # the number of events scheduled by the processes
+        self.time = 0.0  # the wall-clock time spent inside the processes
+
+
+# ==========================================================
+# Profiler
+# ==========================================================
+class Profiler:
+    """ Collects the profiles of the processes of an environment.
+
+    The profiler replaces the schedule method of the environment, to count the scheduled events.
+    """
+
+    def __init__(self, env):
+        """
+
+        :param env: the simulation environment which is profiled
+        """
+        self.env = env
+        self.profiles = {}  # the profiles of the process functions, by name
+        self.other = ProcessProfile("(other)")  # the events which are scheduled outside of a process step
+        self.current = self.other  # the profile of the running process
+        self.run_time = 0.0  # the wall-clock time spent in env.run() (or RealTime.run())
+        self.schedule = env.schedule
+        env.schedule = self.count_schedule
+
+    def count_schedule(self, event, priority=1, delay=0):
+        """ Schedules an event, and counts it for the running process"""
+        self.current.events += 1
+        self.schedule(event, priority, delay)
+
+    def profile(self, name, generator):
+        """ Wraps the generator of a process, to profile it
+
+        :param name: the name of the process function
+        :param generator: the generator of the process
+        :return: the wrapped generator
+        """
+        profile = self.profiles.get(name)
+        if profile is None:
+            profile = self.profiles[name] = ProcessProfile(name)
+        profile.processes += 1
+        wrapped = self.run_profiled(profile, generator)
+        wrapped.__name__ = generator.__name__  # the name of the process (e.g. in a trace)
+        return wrapped
+
+    def run_profiled(self, profile, generator):
+        """ The wrapped generator of a process, which measures every step of the process
+
+        Values and exceptions (e.g. an Interrupt) are passed on to the generator of the process.
+
+        :param profile: the profile of the process function
+        :param generator: the generator of the process
+        """
+        value = None
+        exception = None
+        while True:
+            caller = self.current
+            self.current = profile
+            start = perf_counter()
+            try:
+                if exception is None:
+                    event = generator.send(value)
+                else:
+                    event = generator.throw(exception)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                profile.time += perf_counter() - start
+                profile.resumes += 1
+                self.current = caller
+            try:
+                value = yield event
+                exception = None
+            except GeneratorExit:
+                generator.close()
+                raise
+            except BaseException as e:
+                exception = e
+
+    def table(self):
+        """ A table of the profiles, sorted by wall time
+
+        :return: the table
+        :rtype: str
+        """
+        profiles = sorted(self.profiles.values(), key=lambda p: p.time, reverse=True)
+        if self.other.events:
+            profiles.append(self.other)
+        total = sum(p.time for p in profiles)
+        width = max([len(p.name) for p in profiles] + [7])
+        lines = [f"run time {self.run_time:.3f} s, of which {total:.3f} s inside processes",
+                 f"{'process':<{width}}  {'processes':>9}  {'resumes':>10}  {'events':>10}  {'wall time':>10}"
+                 f"  {'per resume':>10}  {'share':>6}"]
+        for p in profiles:
+            per_resume = f"{1e6 * p.time / p.resumes:8.2f}us" if p.resumes else ""
+            share = f"{p.time / total:6.1%}" if total else ""
+            lines.append(f"{p.name:<{width}}  {p.processes:9d}  {p.resumes:10d}  {p.events:10d}  {p.time:9.3f}s"
+                         f"  {per_resume:>10}  {share:>6}")
+        return "\n".join(lines)
@@ -0,0 +1,292 @@
+"""
+The real-time mode runs a model inside asyncio, with the simulation time scaled to the wall-clock time,
+e.g. as a digital twin next to a line controller which is written with asyncio:
+
+    env = Environment()
+    ...  # the channels and processes of the model
+    rt = RealTime(env, scale=0.1)  # 0.1 s of wall-clock time per time unit of the simulation
+    orders = rt.input(c_orders)  # asyncio -> PyCh
+    done = rt.output(c_done)  # PyCh -> asyncio
+
+    async def controller():
+        await orders.send(order)  # continues when a process of the model has received the order
+        lot = await done.receive()
+
+    async def main():
+        await asyncio.gather(rt.run(until=1000), controller())
+
+    asyncio.run(main())
+
+The event loop of the model waits (with asyncio, so other coroutines keep running) until the wall-clock time of
+its next event. An input bridge wakes it up directly when a coroutine sends an entity, without polling: the
+simulation time is then advanced to the current wall-clock time, and the entity is sent over the channel by a
+process of the bridge. An output bridge receives every entity which is sent over its channel, and queues it for
+the coroutines.
+
+The lag is the wall-clock time between the moment an event was due and the moment it is handled. It is measured
+for every event (rt.lag is a Tally, in seconds). If the lag exceeds max_lag, the simulation either stops with an
+error (strict=True), or the time base is shifted, so the simulation continues from its current time instead of
+racing to catch up (rt.shifts counts this).
+
+With RealTime(env, run_ahead=True), the simulation runs ahead at full speed when no external input can arrive:
+when all input bridges are closed (bridge.close()), or have declared the time until which they will not send
+anything (bridge.hold(until)). After running ahead, the simulation continues in real time from the time it has
+reached.
+
+The deadlock detector (Environment(detect_deadlock=True)) can be used in real time: a process which receives from
+a channel with an open input bridge is not blocked for good, and the process of an output bridge is a daemon.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import asyncio
+from collections import deque
+from math import inf
+from .environment import process
+from .statistics import Tally
+
+# The number of events which is handled at once when running ahead, before the other coroutines get a turn
+RUN_AHEAD_STEPS = 1000
+
+
+# ==========================================================
+# Bridges
+# ==========================================================
+class InputBridge:
+    """ Lets asyncio coroutines send entities over a channel of the simulation"""
+
+    def __init__(self, realtime, channel):
+        """
+
+        :param realtime: the real-time runner
+        :param channel: the channel over which the entities are sent
+        """
+        self.realtime = realtime
+        self.channel = channel  # the channel over which the entities are sent
+        self.pending = deque()  # the entities which have not been sent yet, (entity, future)
+        self.horizon = -inf  # the simulation time before which no entity is sent (inf if the bridge is closed)
+
+    async def send(self, entity=None):
+        """ Sends an entity over the channel, at the current (wall-clock) time
+
+        The coroutine continues when a process of the simulation has received the entity.
+
+        :param entity: the entity
+        """
+        if self.horizon == inf:
+            raise ValueError('The bridge is closed.')
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((entity, future))
+        self.horizon = -inf
+        self.realtime.wakeup.set()
+        await future
+
+    def hold(self, until):
+        """ Declares that no entity is sent before the given simulation time, so the simulation can run ahead
+
+        :param until: the simulation time
+        """
+        self.horizon = until
+        self.realtime.wakeup.set()
+
+    def close(self):
+        """ Declares that no entity is sent anymore, so the simulation can run ahead"""
+        self.hold(inf)
+
+
+class OutputBridge:
+    """ Lets asyncio coroutines receive the entities which are sent over a channel of the simulation"""
+
+    def __init__(self, realtime, channel):
+        """
+
+        :param realtime: the real-time runner
+        :param channel: the channel from which the entities are received
+        """
+        self.realtime = realtime
+        self.channel = channel  # the channel from which the entities are received
+        self.queue = asyncio.Queue()  # the received entities, which have not been taken by a coroutine
+        realtime.env.daemon(Collect(realtime.env, channel, self.queue))
+
+    async def receive(self):
+        """ Receives the next entity which was sent over the channel
+
+        :return: the entity
+        """
+        return await self.queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+
+@process
+def Inject(env, channel, entity, future):
+    """ Sends an entity from a coroutine over a channel, and lets the coroutine continue when it is received"""
+    yield env.execute(channel.send(entity))
+    if not future.done():
+        future.set_result(None)
+
+
+@process
+def Collect(env, channel, queue):
+    """ Receives every entity which is sent over a channel, and queues it for the coroutines"""
+    while True:
+        x = yield env.execute(channel.receive())
+        queue.put_nowait(x)
+
+
+# ==========================================================
+# RealTime
+# ==========================================================
+class RealTime:
+    """ Runs the simulation of an environment in asyncio, in (scaled) wall-clock time"""
+
+    def __init__(self, env, scale=1.0, max_lag=0.1, strict=False, run_ahead=False):
+        """
+
+        :param env: the simulation environment
+        :param scale: the wall-clock time (in seconds) of one time unit of the simulation
+        :param max_lag: the maximum wall-clock time (in seconds) an event may be handled later than it is due
+        :param strict: if true, exceeding max_lag raises a RuntimeError, otherwise the time base is shifted
+        :param run_ahead: if true, the simulation runs at full speed while no input can arrive
+        """
+        if not scale > 0:
+            raise ValueError('The scale must be positive.')
+        self.env = env
+        self.scale = scale
+        self.max_lag = max_lag
+        self.strict = strict
+        self.run_ahead = run_ahead
+        self.inputs = []  # the input bridges
+        self.outputs = []  # the output bridges
+        self.lag = Tally("lag")  # the lag of the events which were handled in real time, in seconds
+        self.shifts = 0  # the number of times the time base was shifted, because the lag exceeded max_lag
+        self.wakeup = asyncio.Event()  # is set when input arrives, or when an input bridge changes its horizon
+        self.origin = None  # the time base: (wall-clock time, simulation time)
+
+    def input(self, channel):
+        """ Creates a bridge through which coroutines send entities over a channel
+
+        :param channel: the channel
+        :return: the bridge
+        :rtype: InputBridge
+        """
+        bridge = InputBridge(self, channel)
+        self.inputs.append(bridge)
+        if self.env.detector is not None:
+            self.env.detector.inputs.append(bridge)
+        return bridge
+
+    def output(self, channel):
+        """ Creates a bridge through which coroutines receive the entities which are sent over a channel
+
+        :param channel: the channel
+        :return: the bridge
+        :rtype: OutputBridge
+        """
+        bridge = OutputBridge(self, channel)
+        self.outputs.append(bridge)
+        return bridge
+
+    def wall_time(self, time):
+        """ The wall-clock time at which a simulation time is due"""
+        return self.origin[0] + (time - self.origin[1]) * self.scale
+
+    def simulation_time(self, wall_time):
+        """ The simulation time which corresponds with a wall-clock time"""
+        return self.origin[1] + (wall_time - self.origin[0]) / self.scale
+
+    def rebase(self):
+        """ Lets the current simulation time correspond with the current wall-clock time"""
+        self.origin = (asyncio.get_running_loop().time(), self.env.now)
+
+    def advance(self, time):
+        """ Advances the simulation time (without events in between), e.g. when input arrives"""
+        if time > self.env.now:
+            self.env.simulate(time)
+
+    def inject(self):
+        """ Sends the pending entities of the input bridges, at the current simulation time"""
+        for bridge in self.inputs:
+            while bridge.pending:
+                entity, future = bridge.pending.popleft()
+                Inject(self.env, bridge.channel, entity, future)
+
+    async def run(self, until=None):
+        """ Runs the simulation in real time
+
+        As at the end of Environment.run(), the trace and the result sinks are flushed (also after an error).
+
+        :param until: the simulation time until which the simulation runs, None to run until there are no events
+            left and all input bridges are closed
+        """
+        env = self.env
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await self.loop(until)
+        finally:
+            env.finish(loop.time() - start)  # as at the end of Environment.run()
+
+    async def loop(self, until):
+        """ The event loop of RealTime.run()"""
+        env = self.env
+        loop = asyncio.get_running_loop()
+        until = inf if until is None else until
+        self.rebase()
+        while True:
+            self.wakeup.clear()
+            self.inject()
+            horizon = min([bridge.horizon for bridge in self.inputs], default=inf)
+            next_time = min(env.peek(), until)
+            if next_time == inf and horizon == inf:
+                if env.detector is not None:
+                    env.detector.check(None)  # the processes which waited for input are now blocked for good
+                return  # no events left, and no input can arrive anymore
+
+            if self.run_ahead and next_time < horizon and next_time < until:
+                # No input can arrive before the next event, so it is handled at full speed
+                steps = 0
+                while env.peek() < min(horizon, until) and steps < RUN_AHEAD_STEPS:
+                    env.step()
+                    steps += 1
+                self.rebase()
+                await asyncio.sleep(0)  # the other coroutines get a turn
+                continue
+
+            if not await self.wait(next_time):
+                # Input arrived before the next event: it arrives at the current wall-clock time
+                self.advance(min(self.simulation_time(loop.time()), next_time))
+                continue
+            if next_time == until:
+                self.advance(until)
+                return
+            lag = loop.time() - self.wall_time(next_time)
+            self.lag.observe(lag)
+            if self.max_lag is not None and lag > self.max_lag:
+                if self.strict:
+                    raise RuntimeError(f'The simulation lags {lag:.3f} s behind the wall-clock time '
+                                       f'(max_lag is {self.max_lag} s).')
+                self.shifts += 1
+                self.origin = (loop.time(), next_time)
+            env.step()
+
+    async def wait(self, time):
+        """ Waits until a simulation time is due, or until input arrives
+
+        :param time: the simulation time, or inf to wait for input
+        :return: a boolean which is true if the time is due, false if input arrived
+        :rtype: bool
+        """
+        delay = inf if time == inf else self.wall_time(time) - asyncio.get_running_loop().time()
+        if delay <= 0:
+            return True
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), None if delay == inf else delay)
+        except asyncio.TimeoutError:
+            return True
+        return False
@@ -0,0 +1,145 @@
+"""
+The Select event is used by Environment.select() to wait for exactly one of several communication_events.
+
+The Select event registers its communication_events (the alternatives) once.
+When one of the alternatives communicates, it resolves the Select event directly: the other alternatives are
+unregistered from their channels, and the Select event is triggered with the value of the selected alternative.
+Optionally, a timeout can be given, after which the Select event is triggered without a selected alternative.
+If an alternative is selected first, the timeout is removed from the event queue, so it does not advance the
+simulation time.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import simpy
+from simpy.events import PENDING
+from .channel import CommunicationEvent, Sender, schedule_event
+
+
+# ==========================================================
+# Select
+# ==========================================================
+class Select(simpy.Event):
+    """ An event which is triggered when one of its communication_events (alternatives) has communicated.
+
+    The value of the event is the entity received by the selected alternative,
+    or None if a sender was selected or the select statement timed out.
+    """
+
+    def __init__(self, env, communication_events, timeout=None):
+        """
+
+        :param env: the environment in which this select statement operates
+        :param communication_events: the communication_events of which only one will be selected
+        :param timeout: an optional (simulation) time duration after which the select statement stops waiting
+        """
+        super().__init__(env)
+        self.communication_events = communication_events  # the alternatives of this select statement
+        self.selected = None  # the selected communication_event, None if not (yet) selected
+        self.timer = None  # the scheduled timeout, None if there is none (anymore)
+
+        # Check if the correct input is given, and if not, give an error.
+        sending_channels = set()
+        receiving_channels = set()
+        for c in communication_events:
+            if not isinstance(c, CommunicationEvent):
+                if isinstance(c, simpy.Process):
+                    raise TypeError(
+                        'A process was passed to the Select statement, '
+                        'Try a communication_event instead.'
+                    )
+                else:
+                    raise TypeError(
+                        'One of the communication_events is of an incorrect type.'
+                    )
+            if env != c.env:
+                raise ValueError(
+                    'It is not allowed to mix events from different '
+                    'environments'
+                )
+            if c.communication_started:
+                raise ValueError(
+                    'The communication_event has already started its process,'
+                    'which is not allowed when used with the select statement.'
+                )
+            if isinstance(c, Sender):
+                sending_channels.add(c.channel)
+            else:
+                receiving_channels.add(c.channel)
+        if not sending_channels.isdisjoint(receiving_channels):
+            raise ValueError("a process cannot send to itself")
+
+        for c in communication_events:
+            c.select = self
+            c.communication_started = True
+
+        # Communicate immediately if possible. If multiple alternatives are able to communicate,
+        # one of them is chosen at random (in the order in which their channels are tried).
+        # The other alternatives then never need to be registered at their channels.
+        ready = [c for c in communication_events if c.partners()]
+        while ready and self.selected is None:
+            if len(ready) == 1:
+                c = ready.pop()
+            else:
+                c = ready.pop(env.random.integers(len(ready)))
+            c.register()
+            c.channel.try_communication()
+
+        if self.selected is None:
+            for c in communication_events:
+                c.register()
+            if timeout is not None:
+                self.timer = self.env.timeout(timeout)
+                self.timer.callbacks.append(self._time_out)
+            elif not communication_events:
+                self.succeed()
+        if self._value is PENDING and timeout is None and env.detector is not None:
+            env.detector.block(self, communication_events)
+
+    @property
+    def timed_out(self) -> bool:
+        """ Shows if this select statement has stopped waiting because of its timeout
+
+        :return: a boolean which is true if the timeout occurred before any communication
+        :rtype: bool
+        """
+        return self.triggered and self.selected is None
+
+    def resolve(self, communication_event, value, hop=False):
+        """ Selects one of the alternatives, and schedules this event with the value of that alternative.
+
+        The other alternatives are unregistered from their channels (if they were registered).
+
+        :param communication_event: the selected communication_event
+        :param value: the value of the communication (the received entity, or None)
+        :param hop: if true, this event is scheduled after a zero-delay hop (see schedule_event())
+        """
+        self.commit(communication_event)
+        self._ok = True
+        self._value = value
+        schedule_event(self.env, self, hop)
+
+    def commit(self, communication_event):
+        """ Selects one of the alternatives, before it has completed its communication
+
+        Used by a batch, which has sent or received its first entity: the other alternatives are unregistered
+        from their channels, and the select statement is resolved when the batch completes.
+
+        :param communication_event: the selected communication_event
+        """
+        self.selected = communication_event
+        for c in self.communication_events:
+            if c is not communication_event:
+                c.unregister()
+        if self.timer is not None:
+            self.env.cancel(self.timer)
+            self.timer = None
+
+    def _time_out(self, _):
+        """ Stops waiting for the alternatives, if none of them has been selected yet"""
+        self.timer = None
+        if self.selected is None and not self.triggered:
+            for c in self.communication_events:
+                c.unregister()
+            self.succeed()
@@ -0,0 +1,275 @@
+"""
+A result sink collects records (e.g. one per lot) in numpy columns, and writes them to files in chunks,
+so the memory use of a model does not grow with the length of the run, e.g.:
+
+    env = Environment()
+    lots = env.sink("lots", columns={"lot": "i8", "location": "i4", "start": "f8", "end": "f8"})
+
+    @process
+    def Exit(env, c_in, lots):
+        while True:
+            x = yield env.execute(c_in.receive())
+            lots.append(x.id, 0, x.entrytime, env.now)  # or lots.append(lot=x.id, location=0, ...)
+
+    env.run(until=E)
+
+    result = SinkReader("lots")
+    result["start"], result["end"], ...
+
+Every column has a numpy dtype, and a buffer of chunk_size records which is allocated once. When the buffers
+are full, they are written to the files of the sink (in the directory path, default the name of the sink),
+in one of the formats:
+
+- "npy" (default): a .npy file per column, to which every chunk is appended. The reader memory-maps the columns,
+  so sinks larger than the memory can be analysed.
+- "npz": a .npz file per chunk, with all columns.
+- "parquet": a Parquet file per chunk, with all columns (only if pyarrow is installed).
+
+The sink is flushed at the end of every Environment.run(), which writes the records in the buffers and the
+sidecar file (sink.json) with the columns and the number of records, so it can be read. A sink which is used
+without an environment is flushed by sink.close(), or at the end of a with statement. The files are only opened
+while a chunk is written, so a sink never keeps files open. The reader reads a column (or a chunk of all columns,
+see SinkReader.chunks()) only when it is used.
+
+In a replication (see replicate(), sweep() and compare_scenarios()), the sinks of an environment need their own
+path, since all replications would otherwise write to the same directory, e.g.
+env.sink("lots", columns, path=f"lots/{seed}"). The environment requires this when it is created in a replication
+(see Environment.require_sink_path), a sink without an environment requires it with ResultSink(require_path=True).
+
+Visits of lots to locations can be drawn directly:
+draw_lot_time_diagram(locations, lot=result["lot"], location=result["location"], start=result["start"], end=result["end"])
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import json
+import os
+from struct import pack
+import numpy
+
+FORMATS = ("npy", "npz", "parquet")
+
+# The size of the header of a .npy file written by a sink, which leaves room for any number of records
+HEADER_SIZE = 128
+
+def npy_header(dtype, count):
+    """ Creates the header of a .npy file (version 1.0) with a one-dimensional array of count elements
+
+    :param dtype: the dtype of the array
+    :param count: the number of elements
+    :return: the header, of HEADER_SIZE bytes
+    :rtype: bytes
+    """
+    header = repr({'descr': numpy.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (count,)})
+    if len(header) > HEADER_SIZE - 11:
+        raise ValueError(f'The dtype {dtype} cannot be stored in a column.')
+    return b'\x93NUMPY\x01\x00' + pack('<H', HEADER_SIZE - 10) + (header.ljust(HEADER_SIZE - 11) + '\n').encode('latin1')
+
+
+def import_parquet():
+    """ Imports pyarrow, which is needed for the parquet format"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('The parquet format needs pyarrow, install it with "pip install pyarrow", '
+                          'or use the "npy" or "npz" format.') from None
+    return pyarrow, pyarrow.parquet
+
+
+# ==========================================================
+# ResultSink
+# ==========================================================
+class ResultSink:
+    """ Collects records in preallocated numpy columns, and writes them to files in chunks"""
+
+    def __init__(self, name, columns, path=None, chunk_size=65536, format="npy", require_path=False):
+        """
+
+        :param name: the name of the sink
+        :param columns: the names and dtypes of the columns, as a dictionary or a list of (name, dtype)
+        :param path: the directory in which the files are written (default the name of the sink)
+        :param chunk_size: the number of records which is collected before they are written
+        :param format: the format of the files: "npy" (default), "npz" or "parquet"
+        :param require_path: if true, the path must be given (e.g. in a replication, see Environment.sink())
+        """
+        if path is None and require_path:
+            raise ValueError(f'Give the path of the sink {name!r}, since the replications would otherwise write to '
+                             f'the same directory, e.g. path=f"{name}/{{seed}}".')
+        if format not in FORMATS:
+            raise ValueError(f'Unknown format {format!r}, choose one of {", ".join(map(repr, FORMATS))}.')
+        columns = list(columns.items()) if isinstance(columns, dict) else list(columns)
+        if not columns:
+            raise ValueError('A sink needs at least one column.')
+        self.name = name  # the name of the sink
+        self.names = [column for column, _ in columns]  # the names of the columns
+        self.dtypes = [numpy.dtype(dtype) for _, dtype in columns]  # the dtypes of the columns
+        self.path = name if path is None else path  # the directory of the files
+        self.chunk_size = chunk_size
+        self.format = format
+        self.buffers = [numpy.empty(chunk_size, dtype) for dtype in self.dtypes]  # the records which are not written
+        self.size = 0  # the number of records in the buffers
+        self.count = 0  # the number of records which have been written
+        self.chunks = 0  # the number of chunks which have been written
+        os.makedirs(self.path, exist_ok=True)
+        self.files = []  # the paths of the files of the columns (npy format)
+        if format == "npy":
+            for column, dtype in zip(self.names, self.dtypes):
+                file = os.path.join(self.path, f"{column}.npy")
+                with open(file, "wb") as f:
+                    f.write(npy_header(dtype, 0))
+                self.files.append(file)
+        elif format == "parquet":
+            import_parquet()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def __len__(self):
+        return self.count + self.size
+
+    def append(self, *values, **named):
+        """ Appends a record, given as the values of the columns (in order) or by the names of the columns
+
+        :param values: the values of the columns
+        :param named: the values of the columns, by name
+        """
+        if named:
+            values = tuple(named[column] for column in self.names)
+        elif len(values) != len(self.buffers):
+            raise ValueError(f'Give a value for each of the columns {self.names}.')
+        i = self.size
+        for buffer, value in zip(self.buffers, values):
+            buffer[i] = value
+        self.size = i + 1
+        if self.size == self.chunk_size:
+            self.write()
+
+    def extend(self, *columns, **named):
+        """ Appends several records, given as arrays of the columns (in order) or by the names of the columns
+
+        :param columns: the arrays of the columns, of equal length
+        :param named: the arrays of the columns, by name
+        """
+        if named:
+            columns = tuple(named[column] for column in self.names)
+        elif len(columns) != len(self.buffers):
+            raise ValueError(f'Give an array for each of the columns {self.names}.')
+        columns = [numpy.asarray(column) for column in columns]
+        n = len(columns[0])
+        if any(len(column) != n for column in columns):
+            raise ValueError('The arrays of the columns must have the same length.')
+        done = 0
+        while done < n:
+            k = min(n - done, self.chunk_size - self.size)
+            for buffer, column in zip(self.buffers, columns):
+                buffer[self.size:self.size + k] = column[done:done + k]
+            self.size += k
+            done += k
+            if self.size == self.chunk_size:
+                self.write()
+
+    def write(self):
+        """ Writes the records in the buffers as a chunk"""
+        n = self.size
+        if not n:
+            return
+        if self.format == "npy":
+            for file, buffer in zip(self.files, self.buffers):
+                with open(file, "ab") as f:
+                    buffer[:n].tofile(f)
+        elif self.format == "npz":
+            numpy.savez(os.path.join(self.path, f"chunk-{self.chunks:06d}.npz"),
+                        **{column: buffer[:n] for column, buffer in zip(self.names, self.buffers)})
+        else:
+            pyarrow, parquet = import_parquet()
+            table = pyarrow.table({column: buffer[:n] for column, buffer in zip(self.names, self.buffers)})
+            parquet.write_table(table, os.path.join(self.path, f"chunk-{self.chunks:06d}.parquet"))
+        self.count += n
+        self.chunks += 1
+        self.size = 0
+
+    def flush(self):
+        """ Writes the records in the buffers and the sidecar file, so the sink can be read"""
+        self.write()
+        for file, dtype in zip(self.files, self.dtypes):
+            with open(file, "r+b") as f:
+                f.write(npy_header(dtype, self.count))
+        temporary = os.path.join(self.path, f"sink.json.{os.getpid()}.tmp")
+        with open(temporary, "w") as sidecar:
+            json.dump({"name": self.name, "format": self.format, "count": self.count, "chunks": self.chunks,
+                       "chunk size": self.chunk_size,
+                       "columns": [[column, dtype.str] for column, dtype in zip(self.names, self.dtypes)]}, sidecar)
+        os.replace(temporary, os.path.join(self.path, "sink.json"))
+
+    def close(self):
+        """ Flushes the sink, after which it can still be appended to (and flushed again)"""
+        self.flush()
+
+
+# ==========================================================
+# SinkReader
+# ==========================================================
+class SinkReader:
+    """ Reads the records of a sink, a column or a chunk at a time"""
+
+    def __init__(self, path):
+        """
+
+        :param path: the directory of the sink
+        """
+        with open(os.path.join(path, "sink.json")) as sidecar:
+            meta = json.load(sidecar)
+        self.path = path
+        self.name = meta["name"]  # the name of the sink
+        self.format = meta["format"]  # the format of the files
+        self.count = meta["count"]  # the number of records
+        self.chunk_count = meta["chunks"]  # the number of chunks
+        self.chunk_size = meta["chunk size"]  # the (maximum) number of records of a chunk
+        self.columns = [column for column, _ in meta["columns"]]  # the names of the columns
+        self.dtypes = {column: numpy.dtype(dtype) for column, dtype in meta["columns"]}  # the dtypes, by name
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, column):
+        """ Reads a column, as a memory-mapped array for the npy format
+
+        :param column: the name of the column
+        :return: the values of the column
+        :rtype: numpy.ndarray
+        """
+        if column not in self.dtypes:
+            raise KeyError(f'The sink has no column {column!r}, only {self.columns}.')
+        if self.format == "npy":
+            if not self.count:
+                return numpy.zeros(0, self.dtypes[column])
+            return numpy.load(os.path.join(self.path, f"{column}.npy"), mmap_mode="r")[:self.count]
+        chunks = [chunk[column] for chunk in self.chunks(columns=[column])]
+        return numpy.concatenate(chunks) if chunks else numpy.zeros(0, self.dtypes[column])
+
+    def chunks(self, columns=None):
+        """ Reads the records a chunk at a time
+
+        :param columns: the names of the columns which are read (default all)
+        :return: for every chunk, a dictionary with the values of the columns
+        :rtype: Iterator[dict[str, numpy.ndarray]]
+        """
+        columns = self.columns if columns is None else columns
+        if self.format == "npy":
+            arrays = {column: self[column] for column in columns}
+            for start in range(0, self.count, self.chunk_size):
+                yield {column: array[start:start + self.chunk_size] for column, array in arrays.items()}
+        elif self.format == "npz":
+            for k in range(self.chunk_count):
+                with numpy.load(os.path.join(self.path, f"chunk-{k:06d}.npz")) as chunk:
+                    yield {column: chunk[column] for column in columns}
+        else:
+            _, parquet = import_parquet()
+            for k in range(self.chunk_count):
+                table = parquet.read_table(os.path.join(self.path, f"chunk-{k:06d}.parquet"), columns=columns)
+                yield {column: table.column(column).to_numpy() for column in columns}
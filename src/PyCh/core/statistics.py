@@ -0,0 +1,414 @@
+"""
+Statistics for the output of simulations.
+
+Confidence intervals of a mean are based on the Student t-distribution, e.g.:
+
+    mean, half_width = confidence_interval(flow_times, confidence=0.95)
+
+gives the interval [mean - half_width, mean + half_width].
+
+Observations can also be collected during a simulation by accumulators, which use a constant amount of memory,
+regardless of the length of the simulation:
+
+- Tally: the mean, variance, minimum and maximum of observations (e.g. flow times)
+- TimeWeighted: the time-weighted mean of a quantity which changes over time (e.g. the number of lots in a buffer)
+- BatchMeans: a confidence interval of a steady-state mean, from a single long simulation.
+  The observations are grouped into batches, of which the means are approximately independent.
+  The interval is only considered precise once the batches are large (by default at least twice as many
+  observations per batch as there are batches), since the means of small batches of correlated observations
+  (e.g. the flow times of successive lots) give intervals which are too narrow.
+  The warm-up period is removed automatically, using the MSER rule.
+
+The accumulators of an environment are created using Environment.tally(name), Environment.time_weighted(name)
+and Environment.batch_means(name), and Environment.statistics() gives a summary of all of them, e.g.:
+
+    flow_time = env.batch_means("flow time")
+    ...
+    flow_time.observe(env.now - x.entrytime)
+    ...
+    env.run(until=flow_time.until_precise(relative=0.02))
+    print(env.statistics())
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+from math import exp, inf, lgamma, log, sqrt
+import numpy
+
+
+# ==========================================================
+# Student t-distribution
+# ==========================================================
+def incomplete_beta(a, b, x):
+    """ The regularized incomplete beta function I_x(a, b)
+
+    Evaluated with a continued fraction (see Numerical Recipes, section 6.4).
+
+    :param a: the first shape parameter
+    :param b: the second shape parameter
+    :param x: a value in [0, 1]
+    :return: I_x(a, b)
+    :rtype: float
+    """
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    if x > (a + 1.0) / (a + b + 2.0):
+        return 1.0 - incomplete_beta(b, a, 1.0 - x)  # the continued fraction converges faster
+    front = exp(lgamma(a + b) - lgamma(a) - lgamma(b) + a * log(x) + b * log(1.0 - x)) / a
+
+    # Lentz's method
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    f = d
+    for m in range(1, 300):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            f *= c * d
+        if abs(c * d - 1.0) < 1e-15:
+            break
+    return front * f
+
+
+def t_cdf(t, df):
+    """ The cumulative distribution function of the Student t-distribution
+
+    :param t: the value
+    :param df: the degrees of freedom
+    :return: P(T <= t)
+    :rtype: float
+    """
+    tail = 0.5 * incomplete_beta(df / 2.0, 0.5, df / (df + t * t))
+    return 1.0 - tail if t > 0 else tail
+
+
+def t_quantile(p, df):
+    """ The quantile function (inverse cdf) of the Student t-distribution
+
+    :param p: the probability, in (0, 1)
+    :param df: the degrees of freedom
+    :return: the value t for which P(T <= t) = p
+    :rtype: float
+    """
+    if p < 0.5:
+        return -t_quantile(1.0 - p, df)
+    low, high = 0.0, 1.0
+    while t_cdf(high, df) < p:
+        low, high = high, 2.0 * high
+    for _ in range(100):
+        middle = 0.5 * (low + high)
+        if t_cdf(middle, df) < p:
+            low = middle
+        else:
+            high = middle
+    return 0.5 * (low + high)
+
+
+# ==========================================================
+# Confidence intervals
+# ==========================================================
+def confidence_interval(values, confidence=0.95):
+    """ Computes a confidence interval of the mean of independent observations
+
+    :param values: the observations (e.g. the results of independent replications)
+    :param confidence: the confidence level of the interval
+    :return: the mean and the half-width of the interval (the half-width is infinite for less than 2 observations)
+    :rtype: tuple[float, float]
+    """
+    values = numpy.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0:
+        return numpy.nan, inf
+    mean = float(values.mean())
+    if n < 2:
+        return mean, inf
+    standard_error = sqrt(float(values.var(ddof=1)) / n)
+    return mean, t_quantile(0.5 + confidence / 2.0, n - 1) * standard_error
+
+
+# ==========================================================
+# Warm-up detection
+# ==========================================================
+def mser(values):
+    """ Finds the end of the warm-up period of a series of observations, using the MSER rule
+
+    The MSER rule (Marginal Standard Error Rule) removes the first d observations, where d minimizes
+    the squared standard error of the mean of the remaining observations. Only d up to half the number
+    of observations is considered.
+
+    :param values: the observations, in order (e.g. batch means)
+    :return: the number of observations d which belong to the warm-up period
+    :rtype: int
+    """
+    values = numpy.asarray(values, dtype=float)
+    n = len(values)
+    if n < 4:
+        return 0
+    # sums of the remaining observations (and their squares) after removing the first d, for all d
+    remaining_sum = numpy.cumsum(values[::-1])[::-1]
+    remaining_squares = numpy.cumsum((values * values)[::-1])[::-1]
+    d = numpy.arange(n // 2 + 1)
+    count = n - d
+    sum_of_squared_errors = remaining_squares[d] - remaining_sum[d] ** 2 / count
+    return int(numpy.argmin(sum_of_squared_errors / count ** 2))
+
+
+# ==========================================================
+# Tally
+# ==========================================================
+class Tally:
+    """ Accumulates the mean, variance, minimum and maximum of observations, using Welford's algorithm."""
+
+    def __init__(self, name=None):
+        """
+
+        :param name: the name of the observed quantity
+        """
+        self.name = name
+        self.count = 0  # the number of observations
+        self.mean = numpy.nan  # the mean of the observations
+        self.sum_of_squares = 0.0  # the sum of squared differences from the mean
+        self.min = inf  # the smallest observation
+        self.max = -inf  # the largest observation
+
+    def observe(self, value):
+        """ Adds an observation
+
+        :param value: the observation
+        """
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+        else:
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.sum_of_squares += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def variance(self):
+        """ The sample variance of the observations"""
+        return self.sum_of_squares / (self.count - 1) if self.count > 1 else numpy.nan
+
+    def summary(self):
+        """ A summary of the observations
+
+        :return: the count, mean, standard deviation, minimum and maximum
+        :rtype: dict
+        """
+        return {"count": self.count, "mean": self.mean, "std": sqrt(self.variance) if self.count > 1 else numpy.nan,
+                "min": self.min, "max": self.max}
+
+
+# ==========================================================
+# TimeWeighted
+# ==========================================================
+class TimeWeighted:
+    """ Accumulates the time-weighted mean, variance, minimum and maximum of a quantity which changes over time."""
+
+    def __init__(self, env, value=0.0, name=None):
+        """
+
+        :param env: the simulation environment, which gives the current time
+        :param value: the value of the quantity at the current time
+        :param name: the name of the quantity
+        """
+        self.env = env
+        self.name = name
+        self.value = value  # the current value of the quantity
+        self.start_time = env.now  # the time at which the accumulation started
+        self.last_time = env.now  # the time of the last change of the value
+        self.area = 0.0  # the integral of the value over time, until last_time
+        self.area_of_squares = 0.0  # the integral of the squared value over time, until last_time
+        self.min = value  # the smallest value
+        self.max = value  # the largest value
+
+    def update(self, value):
+        """ Changes the value of the quantity at the current time
+
+        :param value: the new value
+        """
+        now = self.env.now
+        duration = now - self.last_time
+        if duration:
+            self.area += self.value * duration
+            self.area_of_squares += self.value * self.value * duration
+            self.last_time = now
+        self.value = value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add(self, delta):
+        """ Changes the value of the quantity by a given amount (e.g. +1 when a lot enters a buffer)
+
+        :param delta: the change of the value
+        """
+        self.update(self.value + delta)
+
+    @property
+    def mean(self):
+        """ The time-weighted mean of the quantity, until the current time"""
+        duration = self.env.now - self.start_time
+        if duration <= 0:
+            return float(self.value)
+        return (self.area + self.value * (self.env.now - self.last_time)) / duration
+
+    @property
+    def variance(self):
+        """ The time-weighted variance of the quantity, until the current time"""
+        duration = self.env.now - self.start_time
+        if duration <= 0:
+            return 0.0
+        area_of_squares = self.area_of_squares + self.value * self.value * (self.env.now - self.last_time)
+        return max(area_of_squares / duration - self.mean ** 2, 0.0)
+
+    def summary(self):
+        """ A summary of the quantity
+
+        :return: the current value, time-weighted mean and standard deviation, minimum and maximum
+        :rtype: dict
+        """
+        return {"value": self.value, "mean": self.mean, "std": sqrt(self.variance), "min": self.min, "max": self.max}
+
+
+# ==========================================================
+# BatchMeans
+# ==========================================================
+class BatchMeans:
+    """ Estimates a steady-state mean with a confidence interval, using batch means.
+
+    The observations are grouped into batches. When the number of batches reaches twice the given number of
+    batches, adjacent batches are merged and the batch size is doubled, so the memory use stays constant.
+    The warm-up period is removed using the MSER rule on the batch means.
+    """
+
+    def __init__(self, env=None, name=None, batches=32, warmup=True, confidence=0.95):
+        """
+
+        :param env: the simulation environment (only required for until_precise())
+        :param name: the name of the observed quantity
+        :param batches: the minimum number of batches which is kept (the maximum is twice this number)
+        :param warmup: if true, the warm-up period is removed using the MSER rule
+        :param confidence: the confidence level of the confidence interval
+        """
+        self.env = env
+        self.name = name
+        self.batches = batches
+        self.warmup = warmup
+        self.confidence = confidence
+        self.means = []  # the means of the completed batches
+        self.batch_size = 1  # the number of observations in a batch
+        self.batch_sum = 0.0  # the sum of the observations in the current batch
+        self.batch_count = 0  # the number of observations in the current batch
+        self.count = 0  # the total number of observations
+        self.targets = []  # the precision targets of until_precise(), with their events
+
+    def observe(self, value):
+        """ Adds an observation
+
+        :param value: the observation
+        """
+        self.count += 1
+        self.batch_sum += value
+        self.batch_count += 1
+        if self.batch_count == self.batch_size:
+            self.means.append(self.batch_sum / self.batch_size)
+            self.batch_sum = 0.0
+            self.batch_count = 0
+            if len(self.means) == 2 * self.batches:
+                self.means = [(self.means[i] + self.means[i + 1]) / 2 for i in range(0, len(self.means), 2)]
+                self.batch_size *= 2
+            if self.targets:
+                self.check_targets()
+
+    @property
+    def truncation(self):
+        """ The number of batches which belong to the warm-up period"""
+        return mser(self.means) if self.warmup else 0
+
+    def interval(self):
+        """ The estimate of the steady-state mean, and the half-width of its confidence interval
+
+        :return: the mean and the half-width
+        :rtype: tuple[float, float]
+        """
+        return confidence_interval(self.means[self.truncation:], self.confidence)
+
+    @property
+    def mean(self):
+        """ The estimate of the steady-state mean"""
+        return self.interval()[0]
+
+    def is_precise(self, relative=None, absolute=None, min_batches=10, min_batch_size=None):
+        """ Checks if the confidence interval is precise enough
+
+        :param relative: the maximum half-width, relative to the absolute value of the mean (e.g. 0.02)
+        :param absolute: the maximum half-width
+        :param min_batches: the minimum number of batches after the warm-up period
+        :param min_batch_size: the minimum number of observations in a batch, None for twice the number of batches
+        :return: a boolean which is true if the half-width is within the given targets
+        :rtype: bool
+        """
+        if min_batch_size is None:
+            min_batch_size = 2 * self.batches
+        if self.batch_size < min_batch_size:
+            return False
+        if len(self.means) - self.truncation < min_batches:
+            return False
+        mean, half_width = self.interval()
+        if relative is not None and not half_width <= relative * abs(mean):
+            return False
+        if absolute is not None and not half_width <= absolute:
+            return False
+        return True
+
+    def until_precise(self, relative=None, absolute=None, min_batches=10, min_batch_size=None):
+        """ Creates an event which is triggered when the confidence interval is precise enough
+
+        Can be used to stop a simulation early: "environment.run(until=batch_means.until_precise(relative=0.02))".
+        The precision is checked whenever a batch is completed.
+
+        :param relative: the maximum half-width, relative to the absolute value of the mean (e.g. 0.02)
+        :param absolute: the maximum half-width
+        :param min_batches: the minimum number of batches after the warm-up period
+        :param min_batch_size: the minimum number of observations in a batch, None for twice the number of batches
+        :return: the event, of which the value is the mean and the half-width
+        """
+        if self.env is None:
+            raise ValueError('until_precise() requires BatchMeans with an environment.')
+        if relative is None and absolute is None:
+            raise ValueError('Give a relative or absolute target for the half-width of the confidence interval.')
+        event = self.env.event()
+        self.targets.append((relative, absolute, min_batches, min_batch_size, event))
+        return event
+
+    def check_targets(self):
+        """ Triggers the events of until_precise() of which the precision targets are met"""
+        for target in list(self.targets):
+            relative, absolute, min_batches, min_batch_size, event = target
+            if self.is_precise(relative, absolute, min_batches, min_batch_size):
+                self.targets.remove(target)
+                event.succeed(self.interval())
+
+    def summary(self):
+        """ A summary of the observations
+
+        :return: the count, mean, half-width, number of batches, batch size and number of warm-up batches
+        :rtype: dict
+        """
+        mean, half_width = self.interval()
+        return {"count": self.count, "mean": mean, "half-width": half_width, "batches": len(self.means),
+                "batch size": self.batch_size, "warm-up batches": self.truncation}
@@ -0,0 +1,183 @@
+"""
+Random streams are independent sources of random numbers, which are handed out by an Environment.
+
+Every Environment owns a seed, and env.stream(name) gives the random stream with that name.
+Streams with different names are independent, and a stream with the same name and seed always
+gives the same random numbers, e.g.:
+
+    env = Environment(seed=42)
+    u = env.stream("arrivals")
+    delay = u.exponential(ta)
+
+This makes it possible to reproduce a simulation, and to use common random numbers across scenarios:
+if the arrival process of two models uses the same stream, both models get the same arrivals.
+
+Random numbers are drawn from numpy in blocks, and served one by one, which is much faster than drawing
+single numbers from numpy. Distributions which are not served from blocks are drawn directly from
+RandomStream.generator (e.g. stream.gamma(2.0, 1.0)). The methods of a stream accept the arguments of the
+methods of numpy's Generator; calls which a block does not serve (e.g. with a size, array parameters, or the
+probabilities of a choice) are passed on to the generator.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+from hashlib import sha256
+import numpy
+
+SCALAR = (int, float)  # the types of the parameters which are served from blocks
+
+
+# ==========================================================
+# Seeds
+# ==========================================================
+def stream_seed(seed, name):
+    """ Creates the seed sequence of a named random stream
+
+    The name is hashed with sha256 (and not with hash()), so the stream is the same in every Python process.
+
+    :param seed: the seed of the environment
+    :param name: the name of the stream
+    :return: a numpy SeedSequence
+    """
+    digest = sha256(str(name).encode()).digest()
+    key = tuple(int.from_bytes(digest[i:i + 4], 'little') for i in range(0, 16, 4))
+    return numpy.random.SeedSequence(seed, spawn_key=key)
+
+
+# ==========================================================
+# RandomStream
+# ==========================================================
+class RandomStream:
+    """ A stream of random numbers, of which the most used distributions are served from pre-drawn blocks."""
+
+    def __init__(self, seed_sequence, block_size=1024):
+        """
+
+        :param seed_sequence: the numpy SeedSequence of this stream
+        :param block_size: the number of random numbers drawn from numpy at once
+        """
+        self.generator = numpy.random.Generator(numpy.random.PCG64(seed_sequence))  # the numpy generator
+        self.block_size = block_size
+        self.uniforms = []  # block of standard uniform numbers
+        self.uniform_index = 0  # index of the next uniform number in the block
+        self.exponentials = []  # block of standard exponential numbers
+        self.exponential_index = 0
+        self.normals = []  # block of standard normal numbers
+        self.normal_index = 0
+
+    def __getattr__(self, name):
+        # Other distributions are drawn directly from the numpy generator
+        if name == 'generator' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.generator, name)
+
+    def random(self, size=None, dtype=numpy.float64, out=None):
+        """ Draws a uniform random number in [0, 1)
+
+        :param size: if given, an array of this size is drawn directly from the numpy generator
+        :param dtype: the dtype of the result, see numpy.random.Generator.random()
+        :param out: an array to fill, see numpy.random.Generator.random()
+        :return: the random number
+        :rtype: float
+        """
+        if size is not None or out is not None or dtype is not numpy.float64:
+            return self.generator.random(size, dtype, out)
+        i = self.uniform_index
+        if i == len(self.uniforms):
+            self.uniforms = self.generator.random(self.block_size).tolist()
+            i = 0
+        self.uniform_index = i + 1
+        return self.uniforms[i]
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        """ Draws a uniform random number in [low, high)
+
+        :param low: the lower bound
+        :param high: the upper bound
+        :param size: if given, an array of this size is drawn directly from the numpy generator
+        :return: the random number
+        :rtype: float
+        """
+        if size is not None or not isinstance(low, SCALAR) or not isinstance(high, SCALAR):
+            return self.generator.uniform(low, high, size)
+        return low + (high - low) * self.random()
+
+    def integers(self, low, high=None, size=None, dtype=numpy.int64, endpoint=False):
+        """ Draws a random integer in [low, high), or in [0, low) if high is not given
+
+        :param low: the lower bound (or the upper bound if high is not given)
+        :param high: the upper bound
+        :param size: if given, an array of this size is drawn directly from the numpy generator
+        :param dtype: the dtype of the result, see numpy.random.Generator.integers()
+        :param endpoint: if true, high is included, see numpy.random.Generator.integers()
+        :return: the random integer
+        :rtype: int
+        """
+        if size is not None or dtype is not numpy.int64 or endpoint or not isinstance(low, int) \
+                or not (high is None or isinstance(high, int)):
+            return self.generator.integers(low, high, size, dtype, endpoint)
+        if high is None:
+            low, high = 0, low
+        return low + int((high - low) * self.random())
+
+    def choice(self, a, size=None, replace=True, p=None, axis=0, shuffle=True):
+        """ Chooses a random element of a sequence, or a random integer in [0, a) if a is an integer
+
+        :param a: the sequence (e.g. a list), or an integer
+        :param size: if given, an array of this size is chosen directly by the numpy generator
+        :param replace: whether an element can be chosen more than once, see numpy.random.Generator.choice()
+        :param p: if given, the probabilities of the elements, see numpy.random.Generator.choice()
+        :param axis: the axis along which is chosen, see numpy.random.Generator.choice()
+        :param shuffle: whether the chosen elements are shuffled, see numpy.random.Generator.choice()
+        :return: a random element
+        """
+        if size is not None or p is not None or axis != 0:
+            return self.generator.choice(a, size, replace, p, axis, shuffle)
+        if isinstance(a, int):
+            return int(a * self.random())
+        return a[int(len(a) * self.random())]
+
+    def bernoulli(self, p):
+        """ Draws a random boolean, which is true with probability p
+
+        :param p: the probability of true
+        :return: the random boolean
+        :rtype: bool
+        """
+        return self.random() < p
+
+    def exponential(self, scale=1.0, size=None):
+        """ Draws an exponentially distributed random number
+
+        :param scale: the mean of the distribution
+        :param size: if given, an array of this size is drawn directly from the numpy generator
+        :return: the random number
+        :rtype: float
+        """
+        if size is not None or not isinstance(scale, SCALAR):
+            return self.generator.exponential(scale, size)
+        i = self.exponential_index
+        if i == len(self.exponentials):
+            self.exponentials = self.generator.standard_exponential(self.block_size).tolist()
+            i = 0
+        self.exponential_index = i + 1
+        return scale * self.exponentials[i]
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        """ Draws a normally distributed random number
+
+        :param loc: the mean of the distribution
+        :param scale: the standard deviation of the distribution
+        :param size: if given, an array of this size is drawn directly from the numpy generator
+        :return: the random number
+        :rtype: float
+        """
+        if size is not None or not isinstance(loc, SCALAR) or not isinstance(scale, SCALAR):
+            return self.generator.normal(loc, scale, size)
+        i = self.normal_index
+        if i == len(self.normals):
+            self.normals = self.generator.standard_normal(self.block_size).tolist()
+            i = 0
+        self.normal_index = i + 1
+        return loc + scale * self.normals[i]
@@ -0,0 +1,231 @@
+"""
+A trace records every communication over the channels of an environment in a compact binary file, e.g.:
+
+    env = Environment(trace="run.trace")
+    ...
+    env.run(until=E)
+
+    trace = Trace("run.trace")
+    trace.records["time"], trace.records["entity"], ...
+
+Every communication is a fixed-width record of 32 bytes (see TRACE_DTYPE):
+
+- time: the simulation time of the communication
+- channel: the number of the channel (trace.channels gives the names)
+- sender, receiver: the numbers of the sending and receiving process (trace.processes gives the names)
+- kind: the kind of the record (COMMUNICATION)
+- entity: the id of the sent entity: the entity itself if it is an integer, otherwise its attribute id if it is
+  an integer. Other entities (e.g. floats) are numbered -2, -3, -4, ... in the order in which they are first sent,
+  so their numbers never equal an integer id. The recorder keeps a weak reference to these entities, and forgets
+  the number of an entity when it is freed, so a later entity which gets the same id() gets a new number.
+  Entities which cannot be weakly referenced (e.g. floats) are kept, so their id() is not reused.
+  None is recorded as -1.
+
+Records are collected in memory and appended to the file in chunks, the file is only open while a chunk is
+written. The names of the channels and processes are written to a sidecar file (the path with ".json" added) when
+the trace is flushed, which happens at the end of every Environment.run(). The file is read as a memory-mapped
+numpy array, so traces larger than the memory can be analysed.
+
+Trace.visits() gives the time every entity spent in every process (from receiving it to sending it on),
+in the format which draw_lot_time_diagram() accepts.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import json
+import os
+from functools import partial
+from struct import Struct
+from weakref import ref, WeakKeyDictionary
+import numpy
+
+# The record of a communication, 32 bytes
+TRACE_DTYPE = numpy.dtype([
+    ('time', '<f8'),
+    ('channel', '<i4'),
+    ('sender', '<i4'),
+    ('receiver', '<i4'),
+    ('kind', '<i4'),
+    ('entity', '<i8'),
+])
+
+# The same record, packed with struct (which is faster than writing to a numpy array for single records)
+RECORD = Struct('<diiiiq')
+
+# Kinds of records
+COMMUNICATION = 0
+
+
+# ==========================================================
+# TraceRecorder
+# ==========================================================
+class TraceRecorder:
+    """ Records the communications of an environment to a binary file."""
+
+    def __init__(self, env, path, chunk_size=65536):
+        """
+
+        :param env: the simulation environment which is traced
+        :param path: the path of the trace file, which is overwritten
+        :param chunk_size: the number of records which is collected before they are written to the file
+        """
+        self.env = env
+        self.path = path
+        self.chunk_size = chunk_size
+        open(path, "wb").close()  # the file is overwritten, the records are appended by write()
+        self.buffer = bytearray()  # the packed records which are not yet written to the file
+        self.pack = RECORD.pack
+        self.limit = chunk_size * RECORD.size  # the size of the buffer at which it is written to the file
+        self.count = 0  # the number of records written to the file
+        self.channels = []  # the names of the channels, by number
+        self.processes = []  # the names of the processes, by number
+        self.process_numbers = WeakKeyDictionary()  # the numbers of the processes
+        self.entity_numbers = {}  # the numbers of the entities without an integer id, by their id()
+        self.entities = {}  # weak references to these entities (or the entities themselves), by their id()
+        self.entity_count = 0  # the number of entities without an integer id which were numbered
+
+    def add_channel(self, channel):
+        """ Gives a channel its number in the trace
+
+        :param channel: the channel
+        :return: the number of the channel
+        :rtype: int
+        """
+        number = len(self.channels)
+        self.channels.append(channel.name if channel.name is not None else f"channel {number}")
+        return number
+
+    def process_number(self, process):
+        """ Gets the number of a process (or a Buffer) in the trace
+
+        :param process: the process, None if unknown
+        :return: the number of the process, -1 if unknown
+        :rtype: int
+        """
+        if process is None:
+            return -1
+        number = self.process_numbers.get(process)
+        if number is None:
+            number = self.process_numbers[process] = len(self.processes)
+            name = getattr(process, "name", None) or type(process).__name__
+            self.processes.append(f"{name} {number}")
+        return number
+
+    def record(self, channel_number, sender, receiver, entity):
+        """ Records a communication between a sender and a receiver
+
+        :param channel_number: the number of the channel
+        :param sender: the Sender
+        :param receiver: the Receiver
+        :param entity: the entity which is sent (one entity of a batch)
+        """
+        if type(entity) is not int:
+            if entity is None:
+                entity = -1
+            else:
+                identifier = getattr(entity, "id", None)
+                entity = identifier if type(identifier) is int else self.entity_number(entity)
+        buffer = self.buffer
+        buffer += self.pack(self.env._now, channel_number, sender.process_number, receiver.process_number,
+                            COMMUNICATION, entity)
+        if len(buffer) >= self.limit:
+            self.write()
+
+    def entity_number(self, entity):
+        """ Gets the number of an entity which has no integer id (-2, -3, -4, ... in the order of first use)
+
+        :param entity: the entity
+        :return: the number of the entity
+        :rtype: int
+        """
+        key = id(entity)
+        number = self.entity_numbers.get(key)
+        if number is None:
+            number = self.entity_numbers[key] = -2 - self.entity_count
+            self.entity_count += 1
+            try:
+                self.entities[key] = ref(entity, partial(self.forget_entity, key))
+            except TypeError:
+                self.entities[key] = entity  # e.g. a float, which is kept so its id() is not reused
+        return number
+
+    def forget_entity(self, key, _):
+        """ Forgets the number of a freed entity, so its id() can be used by a new entity
+
+        :param key: the id() of the entity
+        """
+        del self.entity_numbers[key]
+        del self.entities[key]
+
+    def write(self):
+        """ Writes the collected records to the file"""
+        if self.buffer:
+            with open(self.path, "ab") as file:
+                file.write(self.buffer)
+            self.count += len(self.buffer) // RECORD.size
+            self.buffer = bytearray()
+
+    def flush(self):
+        """ Writes the collected records and the sidecar file, so the trace can be read"""
+        self.write()
+        temporary = self.path + f".{os.getpid()}.tmp.json"
+        with open(temporary, "w") as sidecar:
+            json.dump({"dtype": TRACE_DTYPE.descr, "count": self.count,
+                       "channels": self.channels, "processes": self.processes}, sidecar)
+        os.replace(temporary, self.path + ".json")
+
+    def close(self):
+        """ Flushes the trace (the trace file is not kept open, so there is nothing else to close)"""
+        self.flush()
+
+
+# ==========================================================
+# Trace
+# ==========================================================
+class Trace:
+    """ A recorded trace, of which the records are memory-mapped from the file."""
+
+    def __init__(self, path):
+        """
+
+        :param path: the path of the trace file
+        """
+        with open(path + ".json") as sidecar:
+            meta = json.load(sidecar)
+        self.channels = meta["channels"]  # the names of the channels, by number
+        self.processes = meta["processes"]  # the names of the processes, by number
+        count = meta["count"]
+        if count:
+            self.records = numpy.memmap(path, dtype=TRACE_DTYPE, mode="r", shape=(count,))
+        else:
+            self.records = numpy.zeros(0, dtype=TRACE_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def channel(self, name):
+        """ Gets the records of a channel
+
+        :param name: the name of the channel
+        :return: the records
+        :rtype: numpy.ndarray
+        """
+        return self.records[self.records["channel"] == self.channels.index(name)]
+
+    def visits(self):
+        """ Gets the visits of the entities to the processes
+
+        An entity visits a process from the time it is received by the process until the time it is sent by
+        the same process. The result can be drawn using
+        draw_lot_time_diagram(trace.processes, lot=lot, location=location, start=start, end=end).
+
+        :return: the arrays lot (the entity id), location (the process number), start and end
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        records = self.records[self.records["entity"] != -1]
+        order = numpy.lexsort((numpy.arange(len(records)), records["entity"]))  # by entity, then in order
+        records = records[order]
+        entity, time = records["entity"], records["time"]
+        follows = (entity[1:] == entity[:-1]) & (records["receiver"][:-1] == records["sender"][1:])
+        return entity[:-1][follows], records["receiver"][:-1][follows], time[:-1][follows], time[1:][follows]
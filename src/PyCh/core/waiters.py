@@ -0,0 +1,199 @@
+"""
+Waiter structures in which a Channel keeps its registered senders or receivers.
+
+The structure determines which of the waiting senders/receivers is matched when communication occurs,
+this is the matching policy of the channel:
+
+- "random": a random waiter is chosen (as in Chi), this is the default
+- "fifo": the waiter which has been registered the longest is chosen
+- "priority": the waiter with the lowest priority value is chosen, ties are broken in FIFO order
+
+Registering, unregistering and picking a waiter takes O(1) time (O(log n) for the priority policy).
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+from collections import OrderedDict
+from heapq import heapify, heappush, heappop
+from itertools import count
+
+
+# ==========================================================
+# RandomWaiters
+# ==========================================================
+class RandomWaiters:
+    """ Waiters of which a random one is picked."""
+
+    def __init__(self, stream):
+        """
+
+        :param stream: the random stream used to pick a waiter
+        """
+        self.stream = stream  # the random stream used to pick a waiter
+        self.waiters = []  # list of the registered waiters, in arbitrary order
+        self.index = {}  # the position of each registered waiter in self.waiters
+
+    def __len__(self):
+        return len(self.waiters)
+
+    def __iter__(self):
+        return iter(self.waiters)
+
+    def __contains__(self, waiter):
+        return waiter in self.index
+
+    def add(self, waiter):
+        """ Registers a waiter
+
+        :param waiter: the waiter (Sender or Receiver)
+        """
+        if waiter not in self.index:
+            self.index[waiter] = len(self.waiters)
+            self.waiters.append(waiter)
+
+    def remove(self, waiter):
+        """ Unregisters a waiter, if it is registered
+
+        The last waiter in the list takes the place of the removed waiter.
+
+        :param waiter: the waiter (Sender or Receiver)
+        """
+        i = self.index.pop(waiter, None)
+        if i is not None:
+            last = self.waiters.pop()
+            if last is not waiter:
+                self.waiters[i] = last
+                self.index[last] = i
+
+    def pick(self):
+        """ Picks a random waiter, without unregistering it
+
+        :return: a random waiter
+        """
+        waiters = self.waiters
+        if len(waiters) == 1:
+            return waiters[0]
+        return waiters[self.stream.integers(len(waiters))]
+
+
+# ==========================================================
+# FifoWaiters
+# ==========================================================
+class FifoWaiters:
+    """ Waiters of which the first registered one is picked."""
+
+    def __init__(self, stream=None):
+        self.waiters = OrderedDict()  # the registered waiters, in order of registration
+
+    def __len__(self):
+        return len(self.waiters)
+
+    def __iter__(self):
+        return iter(self.waiters)
+
+    def __contains__(self, waiter):
+        return waiter in self.waiters
+
+    def add(self, waiter):
+        """ Registers a waiter
+
+        :param waiter: the waiter (Sender or Receiver)
+        """
+        if waiter not in self.waiters:
+            self.waiters[waiter] = None
+
+    def remove(self, waiter):
+        """ Unregisters a waiter, if it is registered
+
+        :param waiter: the waiter (Sender or Receiver)
+        """
+        self.waiters.pop(waiter, None)
+
+    def pick(self):
+        """ Picks the waiter which has been registered the longest, without unregistering it
+
+        :return: the first registered waiter
+        """
+        return next(iter(self.waiters))
+
+
+# ==========================================================
+# PriorityWaiters
+# ==========================================================
+class PriorityWaiters:
+    """ Waiters of which the one with the lowest priority value is picked.
+
+    Unregistered waiters are only marked as removed in the heap, and are discarded when they reach its top
+    (or when the removed entries outnumber the registered waiters).
+    """
+
+    def __init__(self, stream=None):
+        self.heap = []  # heap of [priority, registration number, waiter] entries
+        self.entries = {}  # the heap entry of each registered waiter
+        self.registration_number = count()  # used to break ties in FIFO order
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, waiter):
+        return waiter in self.entries
+
+    def add(self, waiter):
+        """ Registers a waiter, using waiter.priority as its priority
+
+        :param waiter: the waiter (Sender or Receiver)
+        """
+        if waiter not in self.entries:
+            entry = [waiter.priority, next(self.registration_number), waiter]
+            self.entries[waiter] = entry
+            heappush(self.heap, entry)
+
+    def remove(self, waiter):
+        """ Unregisters a waiter, if it is registered
+
+        :param waiter: the waiter (Sender or Receiver)
+        """
+        entry = self.entries.pop(waiter, None)
+        if entry is not None:
+            entry[2] = None  # marks the entry as removed
+            if len(self.heap) > 2 * len(self.entries) + 16:
+                self.heap = [e for e in self.heap if e[2] is not None]
+                heapify(self.heap)
+
+    def pick(self):
+        """ Picks the waiter with the lowest priority value, without unregistering it
+
+        :return: the waiter with the highest priority
+        """
+        heap = self.heap
+        while heap[0][2] is None:
+            heappop(heap)
+        return heap[0][2]
+
+
+# The available matching policies of a channel
+POLICIES = {
+    "random": RandomWaiters,
+    "fifo": FifoWaiters,
+    "priority": PriorityWaiters,
+}
+
+
+def make_waiters(policy, stream):
+    """ Creates the waiter structure for a matching policy
+
+    :param policy: the matching policy, one of "random", "fifo" or "priority"
+    :param stream: the random stream used by the "random" policy
+    :return: an empty waiter structure
+    """
+    try:
+        return POLICIES[policy](stream)
+    except KeyError:
+        raise ValueError(
+            f'Unknown matching policy {policy!r}, '
+            f'choose one of {", ".join(map(repr, POLICIES))}.'
+        ) from None
@@ -0,0 +1,3 @@
+from .replications import replicate, replicate_until, Replications
+from .sweep import sweep
+from .compare import compare_scenarios, Comparison
@@ -0,0 +1,208 @@
+"""
+A scenario comparison runs paired replications of several variants of a model, using common random numbers,
+to estimate the differences between the variants much more precisely than independent replications, e.g.:
+
+    result = compare_scenarios(M, {"one server": dict(servers=1), "two servers": dict(servers=2)},
+                               replications=20, kwargs=dict(ta=3, ts=5, N=1000))
+    print(result)
+    result.difference("two servers", "flow time")  # the paired differences with the baseline
+    result.interval("two servers", "flow time")  # the confidence interval of the mean difference
+
+A scenario is given by the keyword arguments which it passes to the model (on top of kwargs), or by a model
+function of its own. The first scenario is the baseline, with which the other scenarios are compared.
+
+Replication i of every scenario gets the same seed, so the scenarios form pairs (one per replication) which
+use the same random numbers. This works best if the random numbers are synchronized: every process draws from its
+own named stream (env.stream(name), see RandomStream), so a stream is used for the same purpose in every scenario,
+even if the scenarios draw a different number of random numbers elsewhere. The pairs are then positively
+correlated, and the variance of their difference is smaller than with independent replications.
+
+For every scenario and metric, the result gives the mean of the paired differences with its confidence interval,
+and the variance reduction: the variance of the difference of independent replications (estimated as the sum of
+the variances of both scenarios) divided by the variance of the paired differences. A variance reduction of 10
+means that independent replications would need 10 times as many runs for the same precision.
+
+All replications of all scenarios are run in parallel on a pool of processes, as for replicate().
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import numpy
+from ..core.statistics import confidence_interval
+from .replications import Replications, replication_seed, run_replications
+
+
+# ==========================================================
+# Comparison
+# ==========================================================
+class Comparison:
+    """ The results of paired replications of scenarios, compared with a baseline scenario.
+
+    The replications of a scenario are obtained using result[scenario], as Replications.
+    """
+
+    def __init__(self, replications, baseline, confidence=0.95):
+        """
+
+        :param replications: the replications of each scenario, by name (with the same seeds)
+        :param baseline: the name of the baseline scenario
+        :param confidence: the confidence level of the confidence intervals
+        """
+        self.replications = replications  # the Replications of each scenario, by name
+        self.baseline = baseline  # the name of the baseline scenario
+        self.confidence = confidence  # the confidence level of the confidence intervals
+
+    def __len__(self):
+        return len(self.replications[self.baseline])
+
+    def __getitem__(self, scenario):
+        return self.replications[scenario]
+
+    @property
+    def scenarios(self):
+        """ The names of the scenarios"""
+        return list(self.replications)
+
+    @property
+    def names(self):
+        """ The names of the metrics"""
+        return self.replications[self.baseline].names
+
+    def difference(self, scenario, name=None):
+        """ The paired differences of a metric between a scenario and the baseline, one per replication
+
+        :param scenario: the name of the scenario
+        :param name: the name of the metric (may be omitted if the model has a single metric)
+        :return: the differences
+        :rtype: numpy.ndarray
+        """
+        baseline = self.replications[self.baseline]
+        name = baseline.default_name(name)
+        return self.replications[scenario][name] - baseline[name]
+
+    def mean(self, scenario, name=None):
+        """ The mean difference of a metric between a scenario and the baseline
+
+        :param scenario: the name of the scenario
+        :param name: the name of the metric (may be omitted if the model has a single metric)
+        :return: the mean difference
+        :rtype: float
+        """
+        return float(numpy.mean(self.difference(scenario, name)))
+
+    def half_width(self, scenario, name=None):
+        """ The half-width of the confidence interval of the mean difference of a metric
+
+        :param scenario: the name of the scenario
+        :param name: the name of the metric (may be omitted if the model has a single metric)
+        :return: the half-width
+        :rtype: float
+        """
+        return confidence_interval(self.difference(scenario, name), self.confidence)[1]
+
+    def interval(self, scenario, name=None):
+        """ The confidence interval of the mean difference of a metric between a scenario and the baseline
+
+        :param scenario: the name of the scenario
+        :param name: the name of the metric (may be omitted if the model has a single metric)
+        :return: the lower and upper bound of the interval
+        :rtype: tuple[float, float]
+        """
+        mean, half_width = confidence_interval(self.difference(scenario, name), self.confidence)
+        return mean - half_width, mean + half_width
+
+    def variance_reduction(self, scenario, name=None):
+        """ The variance of the difference of independent replications divided by the variance of the paired
+        differences, i.e. the factor by which common random numbers reduce the number of replications
+
+        :param scenario: the name of the scenario
+        :param name: the name of the metric (may be omitted if the model has a single metric)
+        :return: the variance reduction (inf if the paired differences are constant, nan if they cannot be computed)
+        :rtype: float
+        """
+        baseline = self.replications[self.baseline]
+        name = baseline.default_name(name)
+        if len(baseline) < 2:
+            return numpy.nan
+        independent = float(numpy.var(baseline[name], ddof=1) + numpy.var(self.replications[scenario][name], ddof=1))
+        paired = float(numpy.var(self.difference(scenario, name), ddof=1))
+        if paired == 0:
+            return numpy.inf if independent > 0 else numpy.nan
+        return independent / paired
+
+    def summary(self):
+        """ A table with the mean difference, its confidence interval and the variance reduction of every
+        scenario and metric
+
+        :return: the table
+        :rtype: str
+        """
+        width = max([len(name) for name in self.names] + [6])
+        lines = [f"{len(self)} paired replications, {self.confidence:.0%} confidence intervals, "
+                 f"differences with {self.baseline!r}"]
+        for scenario in self.scenarios:
+            if scenario == self.baseline:
+                continue
+            lines.append(f"{scenario}:")
+            lines.append(f"  {'metric':<{width}}  {'difference':>12}  {'half-width':>12}  {'interval':>27}  "
+                         f"{'reduction':>10}")
+            for name in self.names:
+                mean, half_width = confidence_interval(self.difference(scenario, name), self.confidence)
+                lines.append(f"  {name:<{width}}  {mean:12.5g}  {half_width:12.5g}  "
+                             f"[{mean - half_width:12.5g}, {mean + half_width:12.5g}]  "
+                             f"{self.variance_reduction(scenario, name):10.3g}")
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.summary()
+
+
+# ==========================================================
+# Compare function
+# ==========================================================
+def compare_scenarios(model, scenarios, replications=10, args=(), kwargs=None, baseline=None, seed=0,
+                      processes=None, confidence=0.95):
+    """ Runs paired replications of scenarios of a model with common random numbers, in parallel on all cores
+
+    :param model: the model function, which returns a number or a dictionary of numbers
+    :param scenarios: the scenarios by name, each given by a dictionary of keyword arguments of the model
+        (added to kwargs) or by a model function of its own; a list of dictionaries is named by their position
+    :param replications: the number of replications of every scenario
+    :param args: the positional arguments of the model
+    :param kwargs: the keyword arguments of the model, which are shared by all scenarios
+    :param baseline: the name of the scenario with which the others are compared, by default the first one
+    :param seed: the seed of the comparison, from which the seeds of the replications are derived
+    :param processes: the number of processes, None to use all cores, 1 to run in the current process
+    :param confidence: the confidence level of the confidence intervals
+    :return: the results of the replications of the scenarios
+    :rtype: Comparison
+    """
+    if not isinstance(scenarios, dict):
+        scenarios = dict(enumerate(scenarios))
+    if len(scenarios) < 2:
+        raise ValueError('Give at least two scenarios to compare.')
+    if baseline is None:
+        baseline = next(iter(scenarios))
+    elif baseline not in scenarios:
+        raise ValueError(f'The baseline {baseline!r} is not one of the scenarios {list(scenarios)}.')
+    if replications < 2:
+        raise ValueError('Give at least two replications, to compute the confidence intervals.')
+
+    # the model and keyword arguments of every scenario
+    tasks = []
+    for scenario in scenarios.values():
+        if callable(scenario):
+            tasks.append((scenario, dict(kwargs or {})))
+        else:
+            tasks.append((model, dict(kwargs or {}, **scenario)))
+
+    # run the replications of all scenarios in one pool, replication i of every scenario with the same seed
+    seeds = [replication_seed(seed, i) for i in range(replications)]
+    metrics = run_replications([m for m, _ in tasks for _ in seeds], args, [k for _, k in tasks for _ in seeds],
+                               seeds * len(tasks), processes)
+
+    results = {}
+    for j, name in enumerate(scenarios):
+        results[name] = Replications(seeds, metrics[j * replications:(j + 1) * replications], confidence)
+    return Comparison(results, baseline, confidence)
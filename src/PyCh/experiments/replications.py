@@ -0,0 +1,363 @@
+"""
+Replications run a simulation model several times with different seeds, to obtain confidence intervals.
+
+A model is a function which builds and runs a simulation, and returns its results as a number
+or as a dictionary of numbers (the metrics), e.g.:
+
+    def M(ta, ts, N, seed=None):
+        env = Environment(seed=seed)
+        ...
+        env.run(until=E)
+        return {"flow time": mean_flow_time, "throughput": N / env.now}
+
+    result = replicate(M, 100, args=(3, 1, 1000))
+    print(result)
+
+Every replication gets its own seed, which is derived from the seed of the experiment and the number of the
+replication. If the model has a seed parameter, the seed is passed to the model. During every replication,
+numpy's global random state is also seeded, so models which use numpy.random (or Environment() without a seed)
+are reproducible as well. The global random state is restored afterwards, so running replications in the current
+process (processes=1) does not change the random numbers of the caller.
+
+Replications are run in parallel on a pool of processes, and give the same results as a serial run
+(processes=1) with the same seed.
+
+If the required number of replications is not known in advance, replicate_until() adds batches of replications
+until the confidence interval is precise enough, e.g. until its half-width is within 2% of the mean:
+
+    result = replicate_until(M, relative=0.02, args=(3, 1, 1000))
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import inspect
+import multiprocessing
+import os
+from itertools import repeat
+import numpy
+from ..core.environment import replicating
+from ..core.statistics import confidence_interval
+
+
+# ==========================================================
+# Seeds
+# ==========================================================
+def replication_seed(seed, replication):
+    """ Derives the seed of a replication from the seed of an experiment
+
+    :param seed: the seed of the experiment
+    :param replication: the number of the replication (0, 1, 2, ...)
+    :return: the seed of the replication
+    :rtype: int
+    """
+    return int(numpy.random.SeedSequence(seed, spawn_key=(replication,)).generate_state(1)[0])
+
+
+def accepts_seed(model):
+    """ Checks if a model has a seed parameter
+
+    :param model: the model function
+    :return: a boolean which is true if the model can be called with seed=...
+    :rtype: bool
+    """
+    try:
+        parameters = inspect.signature(model).parameters
+    except (TypeError, ValueError):
+        return False
+    return "seed" in parameters or any(p.kind == p.VAR_KEYWORD for p in parameters.values())
+
+
+def run_replication(model, args, kwargs, pass_seed, seed):
+    """ Runs a single replication of a model, with numpy's global random state seeded (and restored afterwards)
+
+    The environments which are created by the model require the paths of their result sinks
+    (see Environment.sink()), so the replications do not write to the same directory.
+
+    :param model: the model function
+    :param args: the positional arguments of the model
+    :param kwargs: the keyword arguments of the model
+    :param pass_seed: if true, the seed is passed to the model as seed=...
+    :param seed: the seed of the replication
+    :return: the metrics of the replication, as a dictionary
+    :rtype: dict[str, float]
+    """
+    if pass_seed:
+        kwargs = dict(kwargs, seed=seed)
+    state = numpy.random.get_state()
+    numpy.random.seed(seed)
+    token = replicating.set(True)
+    try:
+        metrics = model(*args, **kwargs)
+    finally:
+        replicating.reset(token)
+        numpy.random.set_state(state)
+    if not isinstance(metrics, dict):
+        metrics = {"value": metrics}
+    return metrics
+
+
+# ==========================================================
+# Pool
+# ==========================================================
+def make_pool(processes):
+    """ Creates a pool of processes to run replications, or None to run them in the current process
+
+    On platforms which support it, the processes are forked, so models which are defined in a notebook
+    (or another __main__ module) can be used.
+
+    :param processes: the number of processes, None to use all cores
+    :return: a ProcessPoolExecutor, or None if processes is 1
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1:
+        return None
+    from concurrent.futures import ProcessPoolExecutor
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("fork"))
+    return ProcessPoolExecutor(processes)
+
+
+def run_replications(models, args, kwargs, seeds, processes=None, pool=None):
+    """ Runs replications, in parallel on a pool of processes
+
+    The replications can be of one model, or of a different model (or different keyword arguments) each,
+    e.g. the points of a sweep. The results are in the order of the seeds.
+
+    :param models: the model function, or a list with the model function of every replication
+    :param args: the positional arguments of the models
+    :param kwargs: the keyword arguments of the models, or a list with the keyword arguments of every replication
+    :param seeds: the seeds of the replications
+    :param processes: the number of processes, None to use all cores, 1 to run in the current process
+    :param pool: a pool created by make_pool(), which is used instead of a new pool (and not shut down)
+    :return: the metrics of the replications
+    :rtype: list[dict[str, float]]
+    """
+    return list(iterate_replications(models, args, kwargs, seeds, processes, pool))
+
+
+def iterate_replications(models, args, kwargs, seeds, processes=None, pool=None):
+    """ Runs replications as run_replications(), and gives the results one by one (in the order of the seeds),
+    as soon as they are available, e.g. to save the results of a point of a sweep before the next points are done
+
+    If the iteration is stopped early (e.g. by an error), the replications which have not started are cancelled.
+
+    :param models: the model function, or a list with the model function of every replication
+    :param args: the positional arguments of the models
+    :param kwargs: the keyword arguments of the models, or a list with the keyword arguments of every replication
+    :param seeds: the seeds of the replications
+    :param processes: the number of processes, None to use all cores, 1 to run in the current process
+    :param pool: a pool created by make_pool(), which is used instead of a new pool (and not shut down)
+    :return: the metrics of the replications
+    :rtype: Iterator[dict[str, float]]
+    """
+    n = len(seeds)
+    models = models if isinstance(models, list) else [models] * n
+    kwargs = kwargs if isinstance(kwargs, list) else [dict(kwargs or {})] * n
+    pass_seed = {id(m): accepts_seed(m) for m in models}
+    arguments = (models, repeat(tuple(args)), kwargs, [pass_seed[id(m)] for m in models], seeds)
+    if pool is not None:
+        yield from pool.map(run_replication, *arguments)
+        return
+    pool = make_pool(min(processes or os.cpu_count() or 1, n))
+    if pool is None:
+        yield from map(run_replication, *arguments)
+        return
+    try:
+        yield from pool.map(run_replication, *arguments)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+# ==========================================================
+# Replications
+# ==========================================================
+class Replications:
+    """ The results of the replications of a model.
+
+    The values of a metric are obtained as a numpy array using result[name].
+    """
+
+    def __init__(self, seeds, metrics, confidence=0.95):
+        """
+
+        :param seeds: the seeds of the replications
+        :param metrics: the metrics of each replication, as dictionaries
+        :param confidence: the confidence level of the confidence intervals
+        """
+        self.seeds = numpy.zeros(0, dtype=numpy.int64)  # the seeds of the replications
+        self.confidence = confidence  # the confidence level of the confidence intervals
+        self.values = {}  # the values of each metric, by name
+        self.converged = None  # if a precision target was used: true if the target was met
+        self.extend(seeds, metrics)
+
+    def extend(self, seeds, metrics):
+        """ Adds the results of more replications
+
+        :param seeds: the seeds of the new replications
+        :param metrics: the metrics of each new replication, as dictionaries
+        """
+        self.seeds = numpy.concatenate([self.seeds, numpy.asarray(seeds, dtype=numpy.int64)])
+        names = list(self.values) or (list(metrics[0]) if metrics else [])
+        for name in names:
+            new = numpy.array([m[name] for m in metrics], dtype=float)
+            self.values[name] = numpy.concatenate([self.values.get(name, []), new])
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    @property
+    def names(self):
+        """ The names of the metrics"""
+        return list(self.values)
+
+    def default_name(self, name):
+        """ Gets the name of a metric, which may be omitted (None) if the model has a single metric
+
+        :param name: the name of the metric, or None
+        :return: the name of the metric
+        :rtype: str
+        """
+        if name is None:
+            if len(self.values) != 1:
+                raise ValueError('The model has multiple metrics, give the name of the metric.')
+            name = next(iter(self.values))
+        return name
+
+    def mean(self, name=None):
+        """ The mean of a metric over the replications
+
+        :param name: the name of the metric (may be omitted if the model has a single metric)
+        :return: the mean
+        :rtype: float
+        """
+        return float(numpy.mean(self.values[self.default_name(name)]))
+
+    def half_width(self, name=None):
+        """ The half-width of the confidence interval of the mean of a metric
+
+        :param name: the name of the metric (may be omitted if the model has a single metric)
+        :return: the half-width
+        :rtype: float
+        """
+        return confidence_interval(self.values[self.default_name(name)], self.confidence)[1]
+
+    def interval(self, name=None):
+        """ The confidence interval of the mean of a metric
+
+        :param name: the name of the metric (may be omitted if the model has a single metric)
+        :return: the lower and upper bound of the interval
+        :rtype: tuple[float, float]
+        """
+        mean, half_width = confidence_interval(self.values[self.default_name(name)], self.confidence)
+        return mean - half_width, mean + half_width
+
+    def is_precise(self, names=None, relative=None, absolute=None):
+        """ Checks if the confidence intervals of metrics are precise enough
+
+        :param names: the names of the metrics, None for all metrics
+        :param relative: the maximum half-width, relative to the absolute value of the mean (e.g. 0.02)
+        :param absolute: the maximum half-width
+        :return: a boolean which is true if all half-widths are within the given targets
+        :rtype: bool
+        """
+        for name in self.values if names is None else names:
+            mean, half_width = confidence_interval(self.values[name], self.confidence)
+            if relative is not None and not half_width <= relative * abs(mean):
+                return False
+            if absolute is not None and not half_width <= absolute:
+                return False
+        return True
+
+    def summary(self):
+        """ A table with the mean and confidence interval of every metric
+
+        :return: the table
+        :rtype: str
+        """
+        width = max([len(name) for name in self.values] + [6])
+        lines = [f"{len(self)} replications, {self.confidence:.0%} confidence intervals"
+                 + ("" if self.converged is None else
+                    ", precision target met" if self.converged else ", precision target NOT met"),
+                 f"{'metric':<{width}}  {'mean':>12}  {'half-width':>12}  {'interval':>27}"]
+        for name, values in self.values.items():
+            mean, half_width = confidence_interval(values, self.confidence)
+            lines.append(f"{name:<{width}}  {mean:12.5g}  {half_width:12.5g}  "
+                         f"[{mean - half_width:12.5g}, {mean + half_width:12.5g}]")
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.summary()
+
+
+# ==========================================================
+# Replicate function
+# ==========================================================
+def replicate(model, n, args=(), kwargs=None, seed=0, processes=None, confidence=0.95):
+    """ Runs n replications of a model, in parallel on all cores
+
+    :param model: the model function, which returns a number or a dictionary of numbers
+    :param n: the number of replications
+    :param args: the positional arguments of the model
+    :param kwargs: the keyword arguments of the model
+    :param seed: the seed of the experiment, from which the seeds of the replications are derived
+    :param processes: the number of processes, None to use all cores, 1 to run in the current process
+    :param confidence: the confidence level of the confidence intervals
+    :return: the results of the replications
+    :rtype: Replications
+    """
+    seeds = [replication_seed(seed, i) for i in range(n)]
+    return Replications(seeds, run_replications(model, args, kwargs, seeds, processes), confidence)
+
+
+def replicate_until(model, relative=None, absolute=None, metrics=None, args=(), kwargs=None, seed=0,
+                    processes=None, confidence=0.95, min_replications=10, max_replications=10000, batch=None):
+    """ Runs replications of a model until the confidence intervals are precise enough
+
+    Replications are added in batches, which are run in parallel. After every batch the confidence intervals
+    are checked, and no further batches are started once all targets are met (or max_replications is reached).
+    The attribute converged of the result shows if the targets were met.
+
+    Replication i always gets the same seed, so the results are reproducible for the same batch size.
+
+    :param model: the model function, which returns a number or a dictionary of numbers
+    :param relative: the maximum half-width, relative to the absolute value of the mean (e.g. 0.02 for 2%)
+    :param absolute: the maximum half-width
+    :param metrics: the names of the metrics which must be precise, None for all metrics
+    :param args: the positional arguments of the model
+    :param kwargs: the keyword arguments of the model
+    :param seed: the seed of the experiment, from which the seeds of the replications are derived
+    :param processes: the number of processes, None to use all cores, 1 to run in the current process
+    :param confidence: the confidence level of the confidence intervals
+    :param min_replications: the number of replications in the first batch
+    :param max_replications: the maximum number of replications
+    :param batch: the number of replications in the next batches, by default the number of processes
+    :return: the results of the replications
+    :rtype: Replications
+    """
+    if relative is None and absolute is None:
+        raise ValueError('Give a relative or absolute target for the half-width of the confidence intervals.')
+    if isinstance(metrics, str):
+        metrics = [metrics]
+    processes = processes or os.cpu_count() or 1
+    batch = batch or processes
+    result = Replications([], [], confidence)
+    pool = make_pool(processes)
+    try:
+        size = min(max(min_replications, 2), max_replications)
+        while size > 0:
+            n = len(result)
+            seeds = [replication_seed(seed, i) for i in range(n, n + size)]
+            result.extend(seeds, run_replications(model, args, kwargs, seeds, processes, pool))
+            result.converged = result.is_precise(metrics, relative, absolute)
+            if result.converged:
+                break
+            size = min(batch, max_replications - len(result))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return result
@@ -0,0 +1,187 @@
+"""
+A sweep runs a simulation model for every point of a grid of parameters, e.g.:
+
+    table = sweep(M, {"ta": [2.0, 2.5, 3.0], "ts": [1.0], "N": [1000]}, replications=10)
+
+runs 10 replications of M(ta=..., ts=..., N=...) for each of the 3 points, in parallel on all cores.
+The model returns a number or a dictionary of numbers (the metrics), as for replicate().
+
+The results of every point are cached on disk, in the directory given by cache (".pych_cache" by default).
+A point is identified by its parameters, the number of replications, the seed and a hash of the source code of
+the model function, so when the sweep is run again, only the new or changed points are simulated. Numpy values of
+the parameters are identified by their Python values (e.g. numpy.float64(1.0) as 1.0). Every point is saved as soon
+as its replications are done, so an interrupted sweep keeps the points which it has finished.
+Changes in other functions (e.g. the processes used by the model) are not detected, the cache can be
+invalidated by changing the version argument (or by deleting the cache directory).
+
+The result is a columnar table: a dictionary of numpy arrays with one row per point, containing the parameters,
+the mean of every metric, and the half-width of its confidence interval (in the column "<metric> half-width").
+It can be converted to a pandas DataFrame using pandas.DataFrame(table).
+
+All points use the same seeds for their replications, so the points are compared using common random numbers.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import inspect
+import json
+import os
+from hashlib import sha256
+from itertools import islice, product
+import numpy
+from ..core.statistics import confidence_interval
+from .replications import replication_seed, iterate_replications
+
+
+# ==========================================================
+# Grid
+# ==========================================================
+def grid_points(grid):
+    """ Gets the points of a grid of parameters
+
+    :param grid: a dictionary of parameter names and their values (all combinations are used),
+        or a list of dictionaries (the points themselves)
+    :return: the points, as dictionaries of parameter names and values
+    :rtype: list[dict]
+    """
+    if isinstance(grid, dict):
+        names = list(grid)
+        return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+    return [dict(point) for point in grid]
+
+
+# ==========================================================
+# Cache
+# ==========================================================
+def model_hash(model):
+    """ A hash of the source code of a model function (or of its name if the source is not available)
+
+    :param model: the model function
+    :return: the hash
+    :rtype: str
+    """
+    try:
+        source = inspect.getsource(model)
+    except (OSError, TypeError):
+        source = getattr(model, "__module__", "") + "." + getattr(model, "__qualname__", repr(model))
+    return sha256(source.encode()).hexdigest()
+
+
+def normalize(value):
+    """ Converts numpy values to Python values, so equal parameters give the same key (see point_key())
+
+    :param value: the value of a parameter
+    :return: the value, with numpy scalars and arrays (also inside lists, tuples and dictionaries) as Python values
+    """
+    if isinstance(value, (numpy.generic, numpy.ndarray)):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return type(value)(normalize(v) for v in value)
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    return value
+
+
+def point_key(model_digest, point, replications, seed, version):
+    """ The key of a point in the cache
+
+    :param model_digest: the hash of the model, see model_hash()
+    :param point: the parameters of the point
+    :param replications: the number of replications
+    :param seed: the seed of the sweep
+    :param version: the version of the model
+    :return: the key
+    :rtype: str
+    """
+    description = json.dumps({
+        "model": model_digest,
+        "parameters": sorted((name, repr(normalize(value))) for name, value in point.items()),
+        "replications": replications,
+        "seed": repr(seed),
+        "version": repr(version),
+    })
+    return sha256(description.encode()).hexdigest()
+
+
+def load_point(cache, key):
+    """ Loads the results of a point from the cache
+
+    :param cache: the cache directory, or None
+    :param key: the key of the point
+    :return: the values of each metric, or None if the point is not in the cache
+    :rtype: dict[str, numpy.ndarray]
+    """
+    if cache is None:
+        return None
+    try:
+        with numpy.load(os.path.join(cache, key + ".npz")) as data:
+            return {name: data[name] for name in data.files}
+    except (OSError, ValueError):
+        return None
+
+
+def save_point(cache, key, values):
+    """ Saves the results of a point to the cache
+
+    The file is written under a temporary name first, so an interrupted sweep cannot leave a broken file.
+
+    :param cache: the cache directory, or None
+    :param key: the key of the point
+    :param values: the values of each metric
+    """
+    if cache is None:
+        return
+    os.makedirs(cache, exist_ok=True)
+    path = os.path.join(cache, key + ".npz")
+    temporary = path + f".{os.getpid()}.tmp.npz"
+    numpy.savez(temporary, **values)
+    os.replace(temporary, path)
+
+
+# ==========================================================
+# Sweep function
+# ==========================================================
+def sweep(model, grid, replications=1, seed=0, processes=None, cache=".pych_cache", version=None,
+          confidence=0.95):
+    """ Runs replications of a model for every point of a grid of parameters, using a cache on disk
+
+    :param model: the model function, which returns a number or a dictionary of numbers
+    :param grid: a dictionary of parameter names and their values (all combinations are used),
+        or a list of dictionaries (the points themselves)
+    :param replications: the number of replications of every point
+    :param seed: the seed of the sweep, from which the seeds of the replications are derived
+    :param processes: the number of processes, None to use all cores, 1 to run in the current process
+    :param cache: the cache directory, None to disable the cache
+    :param version: the version of the model, change it to invalidate the cached results
+    :param confidence: the confidence level of the confidence intervals
+    :return: the table with the parameters and results of every point
+    :rtype: dict[str, numpy.ndarray]
+    """
+    points = grid_points(grid)
+    digest = model_hash(model)
+    keys = [point_key(digest, point, replications, seed, version) for point in points]
+    seeds = [replication_seed(seed, i) for i in range(replications)]
+    results = [load_point(cache, key) for key in keys]
+
+    # simulate all replications of the points which are not in the cache, in one pool, and save every point as
+    # soon as its replications are done
+    missing = [i for i, values in enumerate(results) if values is None]
+    if missing:
+        kwargs = [points[i] for i in missing for _ in seeds]
+        metrics = iterate_replications(model, (), kwargs, seeds * len(missing), processes)
+        for i in missing:
+            point_metrics = list(islice(metrics, replications))
+            results[i] = {name: numpy.array([m[name] for m in point_metrics], dtype=float)
+                          for name in point_metrics[0]}
+            save_point(cache, keys[i], results[i])
+
+    # build the table
+    table = {}
+    for name in dict.fromkeys(name for point in points for name in point):
+        table[name] = numpy.array([point.get(name) for point in points])
+    for name in dict.fromkeys(name for values in results for name in values):
+        intervals = [confidence_interval(values[name], confidence) for values in results]
+        table[name] = numpy.array([mean for mean, _ in intervals])
+        table[name + " half-width"] = numpy.array([half_width for _, half_width in intervals])
+    return table
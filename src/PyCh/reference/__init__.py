@@ -0,0 +1,6 @@
+"""
+Reference models, to check and compare the engines (see PyCh.reference.models),
+the conformance suite of the engines (python -m PyCh.reference.conformance),
+and the benchmark suite (python -m PyCh.reference.benchmarks).
+"""
+from .models import deterministic, stochastic, serial, requesting_parallel, assembly, controlled
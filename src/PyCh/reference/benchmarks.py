@@ -0,0 +1,214 @@
+"""
+The benchmark suite measures how fast the reference models run, so the effect of a change (or an upgrade of
+Python, SimPy or numpy) on the speed of models can be seen:
+
+    python -m PyCh.reference.benchmarks --output results.json
+    python -m PyCh.reference.benchmarks --baseline results.json
+
+or from Python:
+
+    results = benchmarks()
+    regressions = compare(results, baseline)
+
+The benchmarks are the tutorial models M, StochasticSystemModel, SerialSystemModel and ParallelSystemModel,
+and a line of 20 stations of which the buffers are select statements. Every benchmark is run with a fixed seed,
+and measures:
+
+- wall time: the best wall-clock time of a number of runs (default 3)
+- events: the number of scheduled events, and events per second
+- communications: the number of communications over channels, and communications per second
+- peak memory: the peak of the memory allocated by Python during the run (measured with tracemalloc)
+
+The counts and the peak memory are measured in separate runs, so they do not slow down the timed runs.
+Since the seeds are fixed, the counts of a benchmark only change if the behaviour of the model changes.
+
+The results are written as JSON. Compared with a baseline (the results of an earlier run), a benchmark
+is flagged as a regression if its wall time has increased by more than a tolerance (default 10%),
+or if its number of events has changed.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+from . import models
+from ..core.environment import Environment
+
+# The benchmarks of the suite: a name, the model, and its arguments
+BENCHMARKS = [
+    ("M", models.deterministic, dict(ta=3, ts=1, N=20000)),
+    ("StochasticSystemModel", models.stochastic, dict(ta=3, ts=1, N=20000)),
+    ("SerialSystemModel", models.serial, dict(ta=3, ts=1, N=20000, stations=2)),
+    ("ParallelSystemModel", models.serial, dict(ta=3, ts=5, N=20000, stations=1, servers=2)),
+    ("line of 20 stations", models.serial, dict(ta=1, ts=0.9, N=2000, stations=20)),
+]
+
+SEED = 2024  # the seed of every benchmark
+
+
+def count(model, kwargs, seed):
+    """ Runs a model once in an instrumented environment, and counts its events and communications
+
+    :param model: the model, which is built in the given environment (see PyCh.reference.models)
+    :param kwargs: the arguments of the model
+    :param seed: the seed
+    :return: the number of events and the number of communications
+    :rtype: tuple[int, int]
+    """
+    kwargs = dict(kwargs)
+    env = Environment(seed=seed, instrument=True, engine=kwargs.pop("engine", "simpy"))
+    model(env=env, **kwargs)
+    return env.event_count(), sum(c.stats.communications for c in env.channels)
+
+
+def peak_memory(model, kwargs, seed):
+    """ Runs a model once, and measures the peak of the memory allocated by Python
+
+    :param model: the model
+    :param kwargs: the arguments of the model
+    :param seed: the seed
+    :return: the peak memory in bytes
+    :rtype: int
+    """
+    tracemalloc.start()
+    try:
+        model(seed=seed, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(model, kwargs, seed=SEED, engine="simpy", repeat=3):
+    """ Runs a benchmark
+
+    :param model: the model
+    :param kwargs: the arguments of the model
+    :param seed: the seed
+    :param engine: the engine of the environment
+    :param repeat: the number of timed runs, of which the best is used
+    :return: the measurements of the benchmark
+    :rtype: dict[str, float]
+    """
+    kwargs = dict(kwargs, engine=engine)
+    wall_time = min(timed(model, kwargs, seed) for _ in range(repeat))
+    events, communications = count(model, kwargs, seed)
+    return {
+        "wall time": wall_time,
+        "events": events,
+        "events per second": events / wall_time,
+        "communications": communications,
+        "communications per second": communications / wall_time,
+        "peak memory": peak_memory(model, kwargs, seed),
+    }
+
+
+def timed(model, kwargs, seed):
+    """ Runs a model once, and gives its wall-clock time"""
+    start = perf_counter()
+    model(seed=seed, **kwargs)
+    return perf_counter() - start
+
+
+def system():
+    """ Describes the versions of Python and the packages, and the machine on which the benchmarks ran
+
+    :return: the description
+    :rtype: dict[str, str]
+    """
+    import numpy
+    import simpy
+    import PyCh
+    return {
+        "python": platform.python_version(),
+        "pych": PyCh.ver,
+        "simpy": simpy.__version__,
+        "numpy": numpy.__version__,
+        "machine": f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+    }
+
+
+def benchmarks(names=None, engine="simpy", repeat=3, verbose=True):
+    """ Runs the benchmark suite
+
+    :param names: the names of the benchmarks which are run, default all of BENCHMARKS
+    :param engine: the engine of the environments
+    :param repeat: the number of timed runs of every benchmark, of which the best is used
+    :param verbose: if true, the measurements of every benchmark are printed
+    :return: the results, which can be written as JSON
+    :rtype: dict
+    """
+    selected = [b for b in BENCHMARKS if names is None or b[0] in names]
+    if names is not None and len(selected) < len(set(names)):
+        unknown = set(names) - {b[0] for b in BENCHMARKS}
+        raise ValueError(f'Unknown benchmarks {sorted(unknown)}, choose from {[b[0] for b in BENCHMARKS]}.')
+    results = {"system": system(), "engine": engine, "seed": SEED, "benchmarks": {}}
+    for name, model, kwargs in selected:
+        result = results["benchmarks"][name] = run_benchmark(model, kwargs, SEED, engine, repeat)
+        if verbose:
+            print(f"{name:<24} {result['wall time']:7.3f}s  {result['events per second']:10.0f} events/s  "
+                  f"{result['communications per second']:10.0f} communications/s  "
+                  f"{result['peak memory'] / 2 ** 20:7.2f} MB")
+    return results
+
+
+def compare(results, baseline, tolerance=0.1, verbose=True):
+    """ Compares results with a baseline
+
+    :param results: the results of benchmarks()
+    :param baseline: earlier results of benchmarks()
+    :param tolerance: the relative increase of the wall time above which a benchmark is flagged
+    :param verbose: if true, the comparison of every benchmark is printed
+    :return: the flagged benchmarks, (name, reason)
+    :rtype: list[tuple[str, str]]
+    """
+    if results.get("engine") != baseline.get("engine"):
+        raise ValueError(f'The results ({results.get("engine")}) and the baseline ({baseline.get("engine")}) '
+                         f'use different engines.')
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if reference is None:
+            continue
+        ratio = result["wall time"] / reference["wall time"]
+        status = "ok"
+        if result["events"] != reference["events"]:
+            status = f"events changed ({reference['events']} -> {result['events']})"
+            regressions.append((name, status))
+        elif ratio > 1 + tolerance:
+            status = f"REGRESSION ({ratio - 1:+.1%} wall time)"
+            regressions.append((name, status))
+        if verbose:
+            print(f"{name:<24} {reference['wall time']:7.3f}s -> {result['wall time']:7.3f}s  {ratio - 1:+7.1%}  {status}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the benchmarks of the reference models.")
+    parser.add_argument("names", nargs="*", help="the benchmarks which are run (default all)")
+    parser.add_argument("--engine", choices=("simpy", "fast"), default="simpy", help="the engine (default simpy)")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of timed runs of every benchmark (default 3)")
+    parser.add_argument("--output", help="a JSON file in which the results are written")
+    parser.add_argument("--baseline", help="a JSON file with earlier results, with which the results are compared")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="the relative increase of the wall time which is flagged as a regression (default 0.1)")
+    args = parser.parse_args(argv)
+    results = benchmarks(args.names or None, args.engine, args.repeat)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        print()
+        regressions = compare(results, baseline, args.tolerance)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+The conformance suite runs the reference models on both engines, and checks that the results are identical:
+
+    python -m PyCh.reference.conformance
+
+or from Python:
+
+    failures = conformance(seeds=range(5))
+
+Every case is run with every seed on the "simpy" and the "fast" engine. The exits of both runs (the time at
+which every lot left the line, and its flow time) must be exactly equal, not only statistically.
+The wall-clock time of both engines is reported as well.
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+import argparse
+import sys
+from time import perf_counter
+from . import models
+
+# The cases of the suite: a name, the model, and its arguments
+CASES = [
+    ("deterministic", models.deterministic, dict(ta=3, ts=1, N=200)),
+    ("deterministic, ta < ts", models.deterministic, dict(ta=1, ts=3, N=200)),
+    ("stochastic", models.stochastic, dict(ta=3, ts=1, N=2000)),
+    ("serial", models.serial, dict(ta=3, ts=1, N=2000, stations=2)),
+    ("serial, native buffers", models.serial, dict(ta=3, ts=1, N=2000, stations=2, native_buffer=True)),
+    ("parallel", models.serial, dict(ta=3, ts=5, N=2000, stations=1, servers=2)),
+    ("parallel, native buffers", models.serial, dict(ta=3, ts=5, N=2000, stations=1, servers=2, native_buffer=True)),
+    ("serial, heavy load", models.serial, dict(ta=1, ts=[0.9, 2.7, 0.5], N=2000, stations=3, servers=2)),
+    ("requesting parallel", models.requesting_parallel, dict(ta=3, ts=5, N=2000, servers=2)),
+    ("assembly, 2 parts", models.assembly, dict(ta=3, N=1000, parts=2)),
+    ("assembly, 4 parts", models.assembly, dict(ta=3, N=1000, parts=4)),
+    ("controlled", models.controlled, dict(ts=1, low=1, high=4, N=1000)),
+]
+
+ENGINES = ("simpy", "fast")
+
+
+def run_case(model, kwargs, seed):
+    """ Runs a case on both engines
+
+    :param model: the model
+    :param kwargs: the arguments of the model
+    :param seed: the seed
+    :return: the results and the wall-clock times of the engines
+    :rtype: tuple[list, list[float]]
+    """
+    results = []
+    times = []
+    for engine in ENGINES:
+        start = perf_counter()
+        results.append(model(seed=seed, engine=engine, **kwargs))
+        times.append(perf_counter() - start)
+    return results, times
+
+
+def first_difference(a, b):
+    """ Describes the first difference between two lists of exits"""
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return f"exit {i}: {x} != {y}"
+    return f"{len(a)} != {len(b)} exits"
+
+
+def conformance(seeds=range(3), cases=None, verbose=True):
+    """ Runs the conformance suite
+
+    :param seeds: the seeds with which every case is run
+    :param cases: the cases, (name, model, arguments), default CASES
+    :param verbose: if true, the result of every case is printed
+    :return: the failed cases, (name, seed, description of the first difference)
+    :rtype: list[tuple[str, int, str]]
+    """
+    failures = []
+    totals = [0.0] * len(ENGINES)
+    for name, model, kwargs in (CASES if cases is None else cases):
+        times = [0.0] * len(ENGINES)
+        failed = 0
+        for seed in seeds:
+            (reference, result), case_times = run_case(model, kwargs, seed)
+            times = [t + dt for t, dt in zip(times, case_times)]
+            if result != reference:
+                failed += 1
+                failures.append((name, seed, first_difference(reference, result)))
+        totals = [t + dt for t, dt in zip(totals, times)]
+        if verbose:
+            status = "ok" if not failed else f"FAILED ({failed} seeds)"
+            print(f"{name:<24} {status:<18} " + "  ".join(f"{e} {t:6.2f}s" for e, t in zip(ENGINES, times)))
+    if verbose:
+        print(f"{'total':<24} {'':<18} " + "  ".join(f"{e} {t:6.2f}s" for e, t in zip(ENGINES, totals)))
+        for name, seed, difference in failures:
+            print(f"{name}, seed {seed}: {difference}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checks that the engines give identical results for the reference models.")
+    parser.add_argument("--seeds", type=int, default=3, help="the number of seeds of every case (default 3)")
+    args = parser.parse_args(argv)
+    failures = conformance(seeds=range(args.seeds))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+The reference models are the production line models of the tutorial (chapter 10), written so they can be
+run repeatedly and compared: every model takes a seed and an engine, draws its random numbers from the
+random streams of its environment, and returns its exits instead of printing them, e.g.:
+
+    exits = serial(ta=3, ts=1, N=1000, stations=2, seed=42, engine="fast")
+
+A model can also be built in a given environment (e.g. an instrumented one), instead of a new environment with
+the seed and engine:
+
+    env = Environment(seed=42, instrument=True)
+    exits = serial(ta=3, ts=1, N=1000, stations=2, env=env)
+
+The exits are, for every lot which left the line, the time at which it left and its flow time.
+
+The models are:
+
+- deterministic: a generator, a server and an exit, with constant interarrival and process times
+- stochastic: a generator, a buffer, a server and an exit, with exponential interarrival and process times
+- serial: a line of stations, every station a buffer with one or more parallel servers
+  (the serial and parallel system models of the tutorial)
+- requesting_parallel: a buffer which sends lots to the servers which request them
+- assembly: a server which assembles a lot from parts from several generators
+- controlled: a factory with a controller which keeps the number of lots between a low and a high level
+
+"""
+# ==========================================================
+# IMPORTS
+# ==========================================================
+from dataclasses import dataclass
+from ..core.environment import Environment, process, selected
+from ..core.channel import Channel
+from ..core import buffer
+
+
+# ==========================================================
+# Processes
+# ==========================================================
+@process
+def Generator(env, c_out, ta, u=None):
+    """ Sends a lot (its entry time) every ta time units, or with exponential interarrival times (mean ta) from stream u"""
+    while True:
+        x = env.now
+        yield env.execute(c_out.send(x))
+        yield env.timeout(ta if u is None else u.exponential(ta))
+
+
+@process
+def Buffer(env, c_in, c_out):
+    """ A FIFO buffer process"""
+    xs = []
+    while True:
+        sending = c_out.send(xs[0]) if len(xs) > 0 else None
+        receiving = c_in.receive()
+        x = yield env.select(sending, receiving)
+        if selected(receiving):
+            xs = xs + [x]
+        if selected(sending):
+            xs = xs[1:]
+
+
+@process
+def Server(env, c_in, c_out, ts, u=None):
+    """ Processes a lot in ts time units, or in an exponential time (mean ts) from stream u"""
+    while True:
+        x = yield env.execute(c_in.receive())
+        yield env.timeout(ts if u is None else u.exponential(ts))
+        yield env.execute(c_out.send(x))
+
+
+@process
+def Exit(env, c_in, N, exits):
+    """ Receives N lots, and adds (time, flow time) of every lot to exits"""
+    for i in range(N):
+        x = yield env.execute(c_in.receive())
+        entry = min(x) if isinstance(x, list) else x  # an assembled lot entered with its first part
+        exits.append((env.now, env.now - entry))
+
+
+@process
+def BufferRequesting(env, c_in, c_out, c_r):
+    """ A FIFO buffer which sends a lot to the server which requested it first"""
+    xs = []
+    ys = []
+    while True:
+        sending = c_out[ys[0]].send(xs[0]) if (len(xs) > 0 and len(ys) > 0) else None
+        receiving = c_in.receive()
+        request = c_r.receive()
+        z = yield env.select(receiving, request, sending)
+        if selected(receiving):
+            xs = xs + [z]
+        if selected(request):
+            ys = ys + [z]
+        if selected(sending):
+            xs = xs[1:]
+            ys = ys[1:]
+
+
+@process
+def ServerRequesting(env, c_in, c_out, c_r, ts, k, u):
+    """ A server which requests its next lot from the buffer"""
+    while True:
+        yield env.execute(c_r.send(k))
+        x = yield env.execute(c_in.receive())
+        yield env.timeout(u.exponential(ts))
+        yield env.execute(c_out.send(x))
+
+
+@process
+def ServerAssembly(env, c_in, c_out):
+    """ Assembles a lot from two parts"""
+    v = [None, None]
+    while True:
+        receive_part1 = c_in[0].receive()
+        receive_part2 = c_in[1].receive()
+        x = yield env.select(receive_part1, receive_part2)
+        if selected(receive_part1):
+            v[0] = x
+            v[1] = yield env.execute(c_in[1].receive())
+        if selected(receive_part2):
+            v[1] = x
+            v[0] = yield env.execute(c_in[0].receive())
+        yield env.execute(c_out.send(list(v)))
+
+
+@process
+def ServerAssemblyMParts(env, c_in, c_out):
+    """ Assembles a lot from one part of every input channel"""
+    n = len(c_in)
+    v = [None] * n
+    while True:
+        rec = list(range(n))
+        while len(rec) > 0:
+            receive_parts = [c_in[i].receive() if (i in rec) else None for i in range(n)]
+            x = yield env.select(*receive_parts)
+            for j in range(n):
+                if selected(receive_parts[j]):
+                    v[j] = x
+                    rec.remove(j)
+        yield env.execute(c_out.send(list(v)))
+
+
+@dataclass
+class Product:
+    id: int
+    entrytime: float
+
+
+@process
+def GeneratorSignalled(env, c_out, c_signal, N):
+    """ Sends N products, every product when it is signalled"""
+    for i in range(N):
+        yield env.execute(c_signal.receive())
+        x = Product(id=i, entrytime=env.now)
+        yield env.execute(c_out.send(x))
+
+
+@process
+def ExitSignalled(env, c_in, c_signal, exits):
+    """ Receives a product when it is signalled, and adds (time, flow time) of every product to exits"""
+    while True:
+        yield env.execute(c_signal.receive())
+        x = yield env.execute(c_in.receive())
+        exits.append((env.now, env.now - x.entrytime))
+
+
+@process
+def Controller(env, c_signal_gen, c_signal_exit, low, high):
+    """ Keeps the number of products in the factory between low and high"""
+    count = 0
+    while True:
+        while count < high:
+            yield env.execute(c_signal_gen.send())
+            count = count + 1
+        while count > low:
+            yield env.execute(c_signal_exit.send())
+            count = count - 1
+
+
+# ==========================================================
+# Models
+# ==========================================================
+def deterministic(ta, ts, N, seed=None, engine="simpy", env=None):
+    """ A generator, a server and an exit, with constant interarrival and process times
+
+    :param ta: the interarrival time
+    :param ts: the process time
+    :param N: the number of lots which leave the line
+    :param seed: the seed of the environment
+    :param engine: the engine of the environment
+    :param env: the environment in which the model is built, None for a new environment with the seed and engine
+    :return: the exits, (time, flow time) for every lot
+    :rtype: list[tuple[float, float]]
+    """
+    if env is None:
+        env = Environment(seed=seed, engine=engine)
+    exits = []
+    a = Channel(env)
+    b = Channel(env)
+    Generator(env, a, ta)
+    Server(env, a, b, ts)
+    E = Exit(env, b, N, exits)
+    env.run(until=E)
+    return exits
+
+
+def stochastic(ta, ts, N, seed=None, engine="simpy", env=None):
+    """ A generator, a buffer, a server and an exit, with exponential interarrival and process times
+
+    :param ta: the mean interarrival time
+    :param ts: the mean process time
+    :param N: the number of lots which leave the line
+    :param seed: the seed of the environment
+    :param engine: the engine of the environment
+    :param env: the environment in which the model is built, None for a new environment with the seed and engine
+    :return: the exits, (time, flow time) for every lot
+    :rtype: list[tuple[float, float]]
+    """
+    return serial(ta, ts, N, stations=1, seed=seed, engine=engine, env=env)
+
+
+def serial(ta, ts, N, stations=2, servers=1, native_buffer=False, seed=None, engine="simpy", env=None):
+    """ A line of stations, every station a buffer with one or more parallel servers, with exponential
+    interarrival and process times
+
+    :param ta: the mean interarrival time
+    :param ts: the mean process time of a server, or a list with the mean process time of every station
+    :param N: the number of lots which leave the line
+    :param stations: the number of stations
+    :param servers: the number of parallel servers of every station
+    :param native_buffer: if true, the buffers are a PyCh Buffer instead of a buffer process
+    :param seed: the seed of the environment
+    :param engine: the engine of the environment
+    :param env: the environment in which the model is built, None for a new environment with the seed and engine
+    :return: the exits, (time, flow time) for every lot
+    :rtype: list[tuple[float, float]]
+    """
+    if not isinstance(ts, (list, tuple)):
+        ts = [ts] * stations
+    elif len(ts) != stations:
+        raise ValueError('Give the mean process time of every station.')
+    if env is None:
+        env = Environment(seed=seed, engine=engine)
+    exits = []
+    a = Channel(env)
+    Generator(env, a, ta, env.stream("generator"))
+    for k in range(stations):
+        b = Channel(env)
+        c = Channel(env)
+        if native_buffer:
+            buffer.Buffer(env, a, b)
+        else:
+            Buffer(env, a, b)
+        for j in range(servers):
+            Server(env, b, c, ts[k], env.stream(f"server {k} {j}"))
+        a = c
+    E = Exit(env, a, N, exits)
+    env.run(until=E)
+    return exits
+
+
+def requesting_parallel(ta, ts, N, servers=2, seed=None, engine="simpy", env=None):
+    """ A buffer which sends lots to the servers which request them, with exponential interarrival and process times
+
+    :param ta: the mean interarrival time
+    :param ts: the mean process time
+    :param N: the number of lots which leave the line
+    :param servers: the number of servers
+    :param seed: the seed of the environment
+    :param engine: the engine of the environment
+    :param env: the environment in which the model is built, None for a new environment with the seed and engine
+    :return: the exits, (time, flow time) for every lot
+    :rtype: list[tuple[float, float]]
+    """
+    if env is None:
+        env = Environment(seed=seed, engine=engine)
+    exits = []
+    a = Channel(env)
+    b = [Channel(env) for j in range(servers)]
+    c = Channel(env)
+    r = Channel(env)
+    Generator(env, a, ta, env.stream("generator"))
+    BufferRequesting(env, a, b, r)
+    for j in range(servers):
+        ServerRequesting(env, b[j], c, r, ts, j, env.stream(f"server {j}"))
+    E = Exit(env, c, N, exits)
+    env.run(until=E)
+    return exits
+
+
+def assembly(ta, N, parts=2, seed=None, engine="simpy", env=None):
+    """ A server which assembles a lot from parts from several generators, with exponential interarrival times
+
+    :param ta: the mean interarrival time of the parts of every generator
+    :param N: the number of lots which leave the line
+    :param parts: the number of parts of a lot (the number of generators)
+    :param seed: the seed of the environment
+    :param engine: the engine of the environment
+    :param env: the environment in which the model is built, None for a new environment with the seed and engine
+    :return: the exits, (time, flow time) for every lot
+    :rtype: list[tuple[float, float]]
+    """
+    if env is None:
+        env = Environment(seed=seed, engine=engine)
+    exits = []
+    a = [Channel(env) for j in range(parts)]
+    c = [Channel(env) for j in range(parts)]
+    b = Channel(env)
+    for j in range(parts):
+        Generator(env, a[j], ta, env.stream(f"generator {j}"))
+        Buffer(env, a[j], c[j])
+    if parts == 2:
+        ServerAssembly(env, c, b)
+    else:
+        ServerAssemblyMParts(env, c, b)
+    E = Exit(env, b, N, exits)
+    env.run(until=E)
+    return exits
+
+
+def controlled(ts, low, high, N, seed=None, engine="simpy", env=None):
+    """ A factory (a buffer and a server, with exponential process times) with a controller which keeps the number
+    of products in the factory between a low and a high level
+
+    :param ts: the mean process time
+    :param low: the number of products in the factory at which the controller starts new products
+    :param high: the number of products in the factory at which the controller lets products leave
+    :param N: the number of products
+    :param seed: the seed of the environment
+    :param engine: the engine of the environment
+    :param env: the environment in which the model is built, None for a new environment with the seed and engine
+    :return: the exits, (time, flow time) for every product
+    :rtype: list[tuple[float, float]]
+    """
+    if env is None:
+        env = Environment(seed=seed, engine=engine)
+    exits = []
+    sg = Channel(env)
+    se = Channel(env)
+    gf = Channel(env)
+    bs = Channel(env)
+    fe = Channel(env)
+    GeneratorSignalled(env, gf, sg, N)
+    Buffer(env, gf, bs)
+    Server(env, bs, fe, ts, env.stream("server"))
+    ExitSignalled(env, fe, se, exits)
+    Controller(env, sg, se, low, high)
+    env.run()
+    return exits
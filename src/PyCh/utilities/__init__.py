@@ -0,0 +1,15 @@
+"""
+Plot utilities. These import matplotlib, so they are only imported by PyCh when they are first used.
+
+"""
+import sys
+
+
+def use_notebook_backend():
+    """ Uses the interactive nbagg backend of matplotlib, but only when running in a Jupyter notebook
+
+    Outside of a notebook (e.g. in a script or a batch job) the backend is left to matplotlib.
+    """
+    if "ipykernel" in sys.modules:
+        import matplotlib
+        matplotlib.use('nbagg')
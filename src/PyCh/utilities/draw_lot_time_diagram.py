@@ -1,45 +1,142 @@
+"""
+A lot-time diagram shows for every lot (one row per lot) when it was at which location (one color per location).
+
+The lots can be given as a list of dictionaries, with for every location the start and end time of the lot there:
+
+    draw_lot_time_diagram(["buffer", "machine"], [{"buffer": (0, 2), "machine": (2, 5)}, ...])
+
+or, for many lots, as numpy arrays with one element per visit of a lot to a location:
+
+    draw_lot_time_diagram(["buffer", "machine"], lot=lot, location=location, start=start, end=end)
+
+in which location contains the index of the location in the list of locations.
+
+The lots are drawn in rows in the order of their numbers, without empty rows for missing numbers, so the lot
+numbers do not have to be contiguous (e.g. the entity ids of a trace).
+Every location is drawn as a single collection, so large diagrams are drawn quickly. A time window can be selected
+using time_range=(start, end), and when there are more than max_lots lots, only every k-th lot is drawn.
+
+"""
 from matplotlib import pyplot as plt
-import matplotlib
-matplotlib.use('nbagg')
+from matplotlib.collections import PolyCollection
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+import numpy
+from . import use_notebook_backend
+use_notebook_backend()
+
 
 # =================================
 # Code for drawing lot-time diagrams
 # =================================
-def draw_lot_time_diagram(locations, lots):
+def lot_arrays(locations, lots):
+    """ Converts a list of lots (dictionaries of locations and (start, end) times) to arrays
+
+    :param locations: the locations
+    :param lots: the lots, for lot i a dictionary with for every visited location its (start, end) times
+    :return: the arrays lot, location, start and end
+    :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    """
+    visits = [(i, j, lot[loc][0], lot[loc][1])
+              for i, lot in enumerate(lots) for j, loc in enumerate(locations) if loc in lot]
+    if not visits:
+        return numpy.zeros(0, dtype=int), numpy.zeros(0, dtype=int), numpy.zeros(0), numpy.zeros(0)
+    lot, location, start, end = zip(*visits)
+    return numpy.array(lot), numpy.array(location), numpy.array(start, dtype=float), numpy.array(end, dtype=float)
+
+
+def lot_label(numbers, row):
+    """ The label of a row of the diagram, e.g. "lot 12"
+
+    :param numbers: the lot numbers of the rows
+    :param row: the row
+    :return: the label, empty if there is no such row
+    :rtype: str
+    """
+    return f"lot {numbers[row]}" if 0 <= row < len(numbers) else ""
+
+
+def draw_lot_time_diagram(locations, lots=None, lot=None, location=None, start=None, end=None,
+                          time_range=None, max_lots=2000, show=True):
+    """ Draws a lot-time diagram
+
+    :param locations: the names of the locations
+    :param lots: the lots, as a list of dictionaries with for every visited location its (start, end) times
+    :param lot: instead of lots, an array with the lot number of every visit
+    :param location: an array with the index of the location of every visit
+    :param start: an array with the start time of every visit
+    :param end: an array with the end time of every visit
+    :param time_range: an optional (start, end) time window, only visits within this window are drawn
+    :param max_lots: the maximum number of lots which is drawn, if there are more only every k-th lot is drawn
+    :param show: if true, the figure is shown
+    :return: the figure and axes of the diagram
+    """
+    if lots is not None:
+        lot, location, start, end = lot_arrays(locations, lots)
+    elif lot is None or location is None or start is None or end is None:
+        raise TypeError('Give either the lots, or the arrays lot, location, start and end.')
+    lot = numpy.asarray(lot)
+    location = numpy.asarray(location)
+    start = numpy.asarray(start, dtype=float)
+    end = numpy.asarray(end, dtype=float)
+
+    # Select the visits within the time window
+    if time_range is not None:
+        inside = (end > time_range[0]) & (start < time_range[1])
+        lot, location = lot[inside], location[inside]
+        start = numpy.maximum(start[inside], time_range[0])
+        end = numpy.minimum(end[inside], time_range[1])
+
+    # Every lot gets a row, in the order of the lot numbers
+    numbers, row = numpy.unique(lot, return_inverse=True)
+    row = row.reshape(-1)
+
+    # Downsample the lots, if there are more lots than can be shown: only every step-th row is drawn
+    if len(numbers) > max_lots:
+        step = -(-len(numbers) // max_lots)
+        keep = row % step == 0
+        row, location, start, end = row[keep] // step, location[keep], start[keep], end[keep]
+        numbers = numbers[::step]
+
     fig, ax = plt.subplots()
-    
-    # Set colors
+
+    # Set colors (the colors are repeated if there are more locations than colors)
     prop_cycle = plt.rcParams['axes.prop_cycle']
     colors = prop_cycle.by_key()['color']
-    location_colors_dict = {}
+    location_colors_dict = {loc: colors[j % len(colors)] for j, loc in enumerate(locations)}
+
+    # Create plot, one collection per location, row i is drawn between y = -10*i and y = -10*i + 10
+    edgecolor = 'k' if len(numbers) <= 100 else 'face'
+    bottom = -10.0 * row
+    height = 10.0
     for j, loc in enumerate(locations):
-        location_colors_dict[loc] = colors[j]
-
-    # Create plot
-    lot_labels = []
-    yticks = []
-    for i, lot in enumerate(lots):
-        xranges = []
-        for j, loc in enumerate(locations):
-            if loc in lot:
-                timings = lot[loc]
-                xrange = (timings[0], timings[1]-timings[0])
-            else:
-                xrange = (-1,-1)
-            xranges.append(xrange)
-        
-        ax.broken_barh(xranges, (-10*i, 10), facecolors=colors, edgecolor= 'k')
-        lot_labels.append(f"lot {i}")
-        yticks.append(i*-10+5)
-    
+        visit = location == j
+        x0, x1, y0 = start[visit], end[visit], bottom[visit]
+        vertices = numpy.empty((len(x0), 4, 2))
+        vertices[:, 0, 0] = vertices[:, 1, 0] = x0
+        vertices[:, 2, 0] = vertices[:, 3, 0] = x1
+        vertices[:, 0, 1] = vertices[:, 3, 1] = y0
+        vertices[:, 1, 1] = vertices[:, 2, 1] = y0 + height
+        ax.add_collection(PolyCollection(vertices, facecolors=location_colors_dict[loc], edgecolors=edgecolor,
+                                         linewidths=0.5))
+    ax.autoscale_view()
+
     # Create legend
     labels = locations
-    handles = [plt.Rectangle((0,0),1,1, color=location_colors_dict[label]) for label in labels]
-    plt.legend(handles, labels)
+    handles = [plt.Rectangle((0, 0), 1, 1, color=location_colors_dict[label]) for label in labels]
+    ax.legend(handles, labels, loc='best' if len(numbers) <= 100 else 'upper right')  # 'best' is slow for many lots
 
     # Create Y and X labels
-    ax.set_xlim(left=0)
-    ax.set_yticks(yticks)
-    ax.set_yticklabels(lot_labels)
+    if time_range is not None:
+        ax.set_xlim(*time_range)
+    else:
+        ax.set_xlim(left=0)
+    if len(numbers) <= 20:
+        ax.set_yticks(-10 * numpy.arange(len(numbers)) + 5)
+        ax.set_yticklabels([f"lot {i}" for i in numbers])
+    else:
+        ax.yaxis.set_major_locator(MaxNLocator(nbins=10, steps=[1, 2, 5, 10]))
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda y, position: lot_label(numbers, round((5 - y) / 10))))
     ax.set_xlabel('seconds since start')
-    plt.show()
+    if show:
+        plt.show()
+    return fig, ax
@@ -1,31 +1,141 @@
+"""
+Live plots of a quantity during a simulation, e.g. the number of lots in a buffer:
+
+    plot = LiveStepPlot()
+    ...
+    plot.update(env.now, len(xs))
+    ...
+    plot.show()
+
+The samples are stored in numpy arrays, which grow when needed, or in a ring buffer which keeps only the last
+samples (capacity=...). The figure is not redrawn for every sample: it is redrawn at most every interval seconds
+of wall-clock time, and (if sim_interval is given) at most every sim_interval units of simulation time.
+When there are more samples than max_points, the drawn line is downsampled: for every group of samples the
+minimum and maximum are drawn, so peaks remain visible.
+
+"""
 import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('nbagg')
+import numpy
+from time import perf_counter
+from . import use_notebook_backend
+use_notebook_backend()
+
+
+def downsample(x, y, max_points):
+    """ Downsamples a line to at most max_points points, keeping the minimum and maximum of every group of samples
+
+    :param x: the x values, in increasing order
+    :param y: the y values
+    :param max_points: the maximum number of points
+    :return: the downsampled x and y values
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    n = len(x)
+    groups = max((max_points - 3) // 2, 1)  # room for the remaining samples and the last sample
+    if n <= max_points:
+        return x, y
+    size = -(-n // groups)  # the number of samples in a group (rounded up)
+    full = n // size * size
+    blocks = y[:full].reshape(-1, size)
+    offsets = numpy.arange(0, full, size)
+    low = offsets + blocks.argmin(axis=1)
+    high = offsets + blocks.argmax(axis=1)
+    indices = numpy.empty(2 * len(offsets), dtype=numpy.intp)
+    indices[0::2] = numpy.minimum(low, high)  # the minimum and maximum are drawn in the order in which they occur
+    indices[1::2] = numpy.maximum(low, high)
+    if full < n:
+        rest = y[full:]
+        first, second = sorted((full + int(rest.argmin()), full + int(rest.argmax())))
+        indices = numpy.concatenate([indices, [first, second]])
+    if indices[-1] != n - 1:
+        indices = numpy.concatenate([indices, [n - 1]])  # the line always ends at the last sample
+    indices = numpy.unique(indices)  # the minimum and maximum of a group can be the same sample
+    return x[indices], y[indices]
+
 
 class LivePlot:
-    def __init__(self, live = True):
-        self.x_data, self.y_data = [], []
+    def __init__(self, live=True, capacity=None, interval=0.5, sim_interval=None, max_points=2000):
+        """
+
+        :param live: if true, the plot is updated during the simulation, otherwise only by show()
+        :param capacity: the number of samples which is kept (the last ones), None to keep all samples
+        :param interval: the minimum wall-clock time in seconds between two redraws (0 to redraw for every sample)
+        :param sim_interval: the minimum simulation time between two redraws, None to use only the wall-clock time
+        :param max_points: the maximum number of points which is drawn, more samples are downsampled
+        """
+        if capacity is not None and capacity < 1:
+            raise ValueError('The capacity must be at least 1, or None to keep all samples.')
         self.figure = plt.figure()
-        self.line, = plt.plot(self.x_data, self.y_data)
-        self.live = live  # denotes if the step plot should be updated live
+        self.line, = self.create_line()
+        self.live = live  # denotes if the plot should be updated live
+        self.capacity = capacity
+        self.interval = interval
+        self.sim_interval = sim_interval
+        self.max_points = max_points
+        size = capacity if capacity is not None else 1024
+        self.x_buffer = numpy.empty(size)  # the stored x values
+        self.y_buffer = numpy.empty(size)  # the stored y values
+        self.count = 0  # the number of samples which were added
+        self.last_draw = -numpy.inf  # the wall-clock time of the last redraw (the first sample is drawn at once)
+        self.last_draw_x = -numpy.inf  # the x value (simulation time) of the last redraw
+
+    def create_line(self):
+        return plt.plot([], [])
+
+    @property
+    def x_data(self):
+        """ The stored x values, in the order in which they were added"""
+        return self.stored(self.x_buffer)
+
+    @property
+    def y_data(self):
+        """ The stored y values, in the order in which they were added"""
+        return self.stored(self.y_buffer)
+
+    def stored(self, buffer):
+        if self.capacity is None or self.count <= self.capacity:
+            return buffer[:self.count]
+        start = self.count % self.capacity
+        return numpy.concatenate([buffer[start:], buffer[:start]])
 
     def update(self, x_data, y_data):
-        self.x_data.append(x_data)
-        self.y_data.append(y_data)
-        self.line.set_data(self.x_data, self.y_data)
-        self.figure.gca().relim()
-        self.figure.gca().autoscale_view()
-        if self.live:
-            self.figure.canvas.draw()
+        """ Adds a sample, and redraws the plot if it is live and the last redraw is long enough ago
+
+        :param x_data: the x value (e.g. the simulation time)
+        :param y_data: the y value
+        :return: the line of the plot
+        """
+        i = self.count
+        if self.capacity is None:
+            if i == len(self.x_buffer):
+                self.x_buffer = numpy.concatenate([self.x_buffer, numpy.empty(i)])
+                self.y_buffer = numpy.concatenate([self.y_buffer, numpy.empty(i)])
+        else:
+            i %= self.capacity
+        self.x_buffer[i] = x_data
+        self.y_buffer[i] = y_data
+        self.count += 1
+        if self.live and (self.sim_interval is None or x_data - self.last_draw_x >= self.sim_interval) \
+                and perf_counter() - self.last_draw >= self.interval:
+            self.redraw()
         return self.line,
 
+    def redraw(self):
+        """ Draws the stored samples (downsampled to at most max_points points)"""
+        x, y = downsample(self.x_data, self.y_data, self.max_points)
+        self.line.set_data(x, y)
+        axes = self.figure.gca()
+        axes.relim()
+        axes.autoscale_view()
+        self.figure.canvas.draw()
+        self.last_draw = perf_counter()
+        self.last_draw_x = x[-1] if len(x) else -numpy.inf
+
     def show(self):
+        self.redraw()
         plt.show()
 
 
 class LiveStepPlot(LivePlot):
-    def __init__(self, live = True):
-        self.x_data, self.y_data = [], []
-        self.figure = plt.figure()
-        self.line, = plt.step(self.x_data, self.y_data)
-        self.live = live  # denotes if the step plot should be updated live
+    def create_line(self):
+        return plt.step([], [])
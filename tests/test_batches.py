@@ -0,0 +1,116 @@
+"""
+Batches of entities in a single communication, see PyCh.core.channel (send_batch() and receive_batch()).
+"""
+import pytest
+from PyCh import Environment, Channel, process, selected
+
+ENGINES = ["simpy", "fast"]
+
+
+@process
+def Sender(env, c_out, entity, delay, log, name):
+    yield env.timeout(delay)
+    yield env.execute(c_out.send(entity))
+    log.append((env.now, name, "sent"))
+
+
+@process
+def BatchSender(env, c_out, entities, delay, log, name):
+    yield env.timeout(delay)
+    yield env.execute(c_out.send_batch(entities))
+    log.append((env.now, name, "sent"))
+
+
+@process
+def Receiver(env, c_in, delay, log, name):
+    yield env.timeout(delay)
+    x = yield env.execute(c_in.receive())
+    log.append((env.now, name, x))
+
+
+@process
+def BatchReceiver(env, c_in, size, delay, log, name):
+    yield env.timeout(delay)
+    xs = yield env.execute(c_in.receive_batch(size))
+    log.append((env.now, name, xs))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_partial_batch(engine):
+    env = Environment(engine=engine)
+    c = Channel(env, policy="fifo")
+    log = []
+    Sender(env, c, "a", 0, log, "S1")
+    Sender(env, c, "b", 0, log, "S2")
+    BatchReceiver(env, c, 4, 1, log, "B")
+    env.run()
+    # the receiver takes the entities of all waiting senders, which are less than its size; the senders
+    # continue first
+    assert log == [(1, "S1", "sent"), (1, "S2", "sent"), (1, "B", ["a", "b"])]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_batch_receiver_completes_with_a_single_entity(engine):
+    env = Environment(engine=engine)
+    c = Channel(env)
+    log = []
+    BatchReceiver(env, c, 3, 0, log, "B")
+    Sender(env, c, "a", 2, log, "S1")
+    Sender(env, c, "b", 5, log, "S2")
+    Receiver(env, c, 6, log, "R")
+    env.run()
+    # the batch receiver does not wait for more entities, the second entity goes to the next receiver
+    assert log == [(2, "S1", "sent"), (2, "B", ["a"]), (6, "S2", "sent"), (6, "R", "b")]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_batch_sender_to_single_receivers(engine):
+    env = Environment(engine=engine)
+    c = Channel(env, policy="fifo")
+    log = []
+    BatchSender(env, c, [1, 2, 3], 0, log, "B")
+    Receiver(env, c, 1, log, "R1")
+    Receiver(env, c, 1, log, "R2")
+    Receiver(env, c, 4, log, "R3")
+    env.run()
+    # every receiver gets one entity, the sender completes when the last entity is received
+    assert log == [(1, "R1", 1), (1, "R2", 2), (4, "B", "sent"), (4, "R3", 3)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_select_commits_after_the_first_entity_of_a_batch(engine):
+    env = Environment(engine=engine)
+    c, d = Channel(env), Channel(env)
+    log = []
+
+    @process
+    def Selector(env):
+        batch = c.send_batch([1, 2])
+        single = d.receive()
+        yield env.select(batch, single)
+        log.append((env.now, "select", selected(batch), selected(single)))
+
+    Selector(env)
+    Receiver(env, c, 1, log, "R1")
+    # the select statement is committed to the batch, so it no longer receives from d
+    Sender(env, d, "x", 2, log, "S")
+    Receiver(env, c, 3, log, "R2")
+    Receiver(env, d, 4, log, "R3")
+    env.run()
+    assert log == [(1, "R1", 1), (3, "select", True, False), (3, "R2", 2), (4, "S", "sent"), (4, "R3", "x")]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_batches_and_single_communications_mixed(engine):
+    env = Environment(engine=engine)
+    c = Channel(env, policy="fifo")
+    log = []
+    Sender(env, c, "a", 0, log, "S1")
+    BatchSender(env, c, ["b", "c", "d"], 0, log, "B1")
+    BatchReceiver(env, c, 3, 1, log, "R1")
+    Receiver(env, c, 2, log, "R2")
+    BatchReceiver(env, c, 2, 3, log, "R3")
+    env.run()
+    # R1 takes the single entity and the first two of the batch, R2 the last entity of the batch
+    assert log == [(1, "S1", "sent"), (1, "R1", ["a", "b", "c"]), (2, "B1", "sent"), (2, "R2", "d")]
+    assert env.now == 3
@@ -0,0 +1,34 @@
+import pytest
+from PyCh import Environment
+from PyCh.reference import models
+from PyCh.reference.benchmarks import compare, count
+
+
+def results(engine="simpy", **benchmarks):
+    return {"engine": engine,
+            "benchmarks": {name: {"wall time": wall_time, "events": events}
+                           for name, (wall_time, events) in benchmarks.items()}}
+
+
+def test_compare_flags_regressions():
+    baseline = results(M=(1.0, 100), S=(2.0, 200), P=(1.0, 50), L=(1.0, 10))
+    current = results(M=(1.05, 100), S=(2.5, 200), P=(0.5, 51), N=(9.0, 1))
+    regressions = compare(current, baseline, tolerance=0.1, verbose=False)
+    # M is within the tolerance, N has no baseline and L was not run
+    assert [name for name, _ in regressions] == ["S", "P"]
+    assert "+25.0% wall time" in regressions[0][1]
+    assert regressions[1][1] == "events changed (50 -> 51)"
+    assert compare(current, baseline, tolerance=0.3, verbose=False) == [("P", "events changed (50 -> 51)")]
+
+
+def test_compare_requires_the_same_engine():
+    with pytest.raises(ValueError):
+        compare(results("fast"), results("simpy"), verbose=False)
+
+
+@pytest.mark.parametrize("engine", ["simpy", "fast"])
+def test_count(engine):
+    init = Environment.__init__
+    # every lot is sent by the generator to the server, and by the server to the exit
+    assert count(models.deterministic, dict(ta=3, ts=1, N=100, engine=engine), 1) == (805, 200)
+    assert Environment.__init__ is init
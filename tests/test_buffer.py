@@ -0,0 +1,97 @@
+"""
+The native Buffer, see PyCh.core.buffer.
+"""
+import pytest
+from PyCh import Environment, Channel, process
+from PyCh.core.buffer import Buffer
+from PyCh.reference import models
+
+ENGINES = ["simpy", "fast"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("kwargs", [
+    dict(ta=3, ts=1, stations=2),
+    dict(ta=3, ts=5, stations=1, servers=2),
+    dict(ta=1, ts=[0.9, 2.7, 0.5], stations=3, servers=2),
+    dict(ta=1, ts=2.5, stations=2, servers=3),
+])
+def test_same_results_as_the_buffer_process(engine, kwargs):
+    for seed in range(3):
+        process_buffer = models.serial(N=1000, seed=seed, engine=engine, **kwargs)
+        native_buffer = models.serial(N=1000, seed=seed, engine=engine, native_buffer=True, **kwargs)
+        assert native_buffer == process_buffer
+
+
+def run(engine, entities, start=10, **kwargs):
+    """ Sends the entities one per time unit to a buffer, and receives them from time start on
+
+    :return: the buffer, the times at which the entities were sent, and the received entities (with their times)
+    """
+    env = Environment(seed=1, engine=engine)
+    a, b = Channel(env), Channel(env)
+    buffer = Buffer(env, a, b, **kwargs)
+    sent = []
+    received = []
+
+    @process
+    def Sender(env):
+        for x in entities:
+            yield env.execute(a.send(x))
+            sent.append(env.now)
+            yield env.timeout(1)
+
+    @process
+    def Receiver(env):
+        yield env.timeout(start)
+        for _ in entities:
+            x = yield env.execute(b.receive())
+            received.append((env.now, x))
+            yield env.timeout(1)
+
+    Sender(env)
+    Receiver(env)
+    env.run()
+    return buffer, sent, received
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_capacity_blocks_the_sender(engine):
+    buffer, sent, received = run(engine, range(5), capacity=2)
+    # two entities are stored at once, the next one only when the receiver has taken one at time 10
+    assert sent == [0, 1, 10, 11, 12]
+    assert [x for _, x in received] == [0, 1, 2, 3, 4]
+    assert buffer.max_occupancy == 2
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_disciplines(engine):
+    _, _, received = run(engine, [3, 1, 4, 1, 5], discipline="lifo")
+    assert [x for _, x in received] == [5, 1, 4, 1, 3]
+    _, _, received = run(engine, [3, 1, 4, 1, 5], discipline="priority")
+    assert [x for _, x in received] == [1, 1, 3, 4, 5]
+    entities = [("a", 2), ("b", 1), ("c", 2), ("d", 1)]
+    _, _, received = run(engine, entities, discipline="priority", key=lambda x: x[1])
+    assert [x for x, _ in (x for _, x in received)] == ["b", "d", "a", "c"]  # ties in FIFO order
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_occupancy(engine):
+    # entities arrive at times 0, 1 and 2, and leave at times 4, 5 and 6
+    buffer, _, received = run(engine, range(3), start=4)
+    assert [t for t, _ in received] == [4, 5, 6]
+    assert buffer.count_in == buffer.count_out == 3
+    assert buffer.occupancy == 0
+    assert buffer.max_occupancy == 3
+    # the area under the occupancy is 1 + 2 + 3 + 3 + 2 + 1 = 12 over 6 time units, and 0 after that
+    assert buffer.env.now == 7
+    assert buffer.mean_occupancy == pytest.approx(12 / 7)
+
+
+def test_invalid_buffers():
+    env = Environment()
+    a, b = Channel(env), Channel(env)
+    with pytest.raises(ValueError):
+        Buffer(env, a, b, capacity=0)
+    with pytest.raises(ValueError):
+        Buffer(env, a, b, discipline="random")
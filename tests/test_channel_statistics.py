@@ -0,0 +1,63 @@
+import pytest
+from PyCh import Environment, Channel, process
+
+
+@process
+def Generator(env, c_out, n):
+    for i in range(n):
+        yield env.execute(c_out.send(i))
+        yield env.timeout(1)
+
+
+@process
+def Server(env, c_in, c_out):
+    while True:
+        x = yield env.execute(c_in.receive())
+        yield env.timeout(2)
+        yield env.execute(c_out.send(x))
+
+
+@process
+def Exit(env, c_in):
+    while True:
+        yield env.execute(c_in.receive())
+
+
+@pytest.mark.parametrize("engine", ["simpy", "fast"])
+def test_counts_and_blocking_of_a_known_model(engine):
+    env = Environment(instrument=True, engine=engine)
+    a = Channel(env, name="a")
+    b = Channel(env)
+    Generator(env, a, 5)
+    Server(env, a, b)
+    Exit(env, b)
+    env.run()
+    assert env.now == 10
+    statistics = env.channel_statistics()
+    assert list(statistics) == ["a", "channel 1"]
+    # the server takes a lot at 0, 2, 4, 6 and 8, the generator waits 1 for every lot but the first
+    assert statistics["a"] == {
+        "communications": 5,
+        "sender blocking": 4.0, "mean sender blocking": 0.8, "max sender blocking": 1.0,
+        "receiver blocking": 0.0, "mean receiver blocking": 0.0, "max receiver blocking": 0.0,
+        "senders": 0, "peak senders": 1, "receivers": 1, "peak receivers": 1,
+    }
+    # the exit waits 2 for every lot, which leave the server at 2, 4, 6, 8 and 10
+    assert statistics["channel 1"] == {
+        "communications": 5,
+        "sender blocking": 0.0, "mean sender blocking": 0.0, "max sender blocking": 0.0,
+        "receiver blocking": 10.0, "mean receiver blocking": 2.0, "max receiver blocking": 2.0,
+        "senders": 0, "peak senders": 1, "receivers": 1, "peak receivers": 1,
+    }
+
+
+def test_channels_are_not_instrumented_by_default():
+    env = Environment()
+    a = Channel(env)
+    b = Channel(env, instrument=True)
+    assert a.stats is None
+    Generator(env, b, 3)
+    Exit(env, b)
+    env.run()
+    assert list(env.channel_statistics()) == ["channel 0"]
+    assert env.channel_statistics()["channel 0"]["communications"] == 3
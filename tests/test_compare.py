@@ -0,0 +1,23 @@
+import numpy
+from PyCh import compare_scenarios
+from PyCh.reference import models
+
+
+def line(ts, seed=None):
+    exits = models.serial(ta=1, ts=ts, N=300, stations=2, seed=seed)
+    return {"flow time": float(numpy.mean([flow_time for _, flow_time in exits]))}
+
+
+def test_paired_replications_share_seeds():
+    result = compare_scenarios(line, {"base": dict(ts=0.8), "faster": dict(ts=0.78)}, replications=4, processes=1)
+    assert numpy.array_equal(result["base"].seeds, result["faster"].seeds)
+    assert numpy.array_equal(result.difference("faster"), result["faster"]["flow time"] - result["base"]["flow time"])
+    assert result.variance_reduction("faster") > 1
+
+
+def test_parallel_equals_serial():
+    scenarios = {"base": dict(ts=0.8), "faster": dict(ts=0.78)}
+    serial = compare_scenarios(line, scenarios, replications=3, processes=1)
+    parallel = compare_scenarios(line, scenarios, replications=3, processes=2)
+    for scenario in scenarios:
+        assert numpy.array_equal(serial[scenario]["flow time"], parallel[scenario]["flow time"])
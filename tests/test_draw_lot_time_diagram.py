@@ -0,0 +1,27 @@
+import matplotlib
+matplotlib.use("agg")
+import numpy
+from matplotlib import pyplot as plt
+from PyCh.utilities.draw_lot_time_diagram import draw_lot_time_diagram
+
+
+def draw(lot, max_lots=2000):
+    lot = numpy.asarray(lot)
+    n = len(lot)
+    fig, ax = draw_lot_time_diagram(["buffer", "machine"], lot=lot, location=numpy.arange(n) % 2,
+                                    start=numpy.arange(n, dtype=float), end=numpy.arange(n) + 1.0,
+                                    max_lots=max_lots, show=False)
+    plt.close(fig)
+    return ax
+
+
+def test_rows_do_not_depend_on_lot_numbers():
+    # Sparse and huge lot numbers (e.g. entity ids of a trace) are drawn in consecutive rows
+    ax = draw([0, 0, 2000, 2000, 10 ** 14, 10 ** 14])
+    assert ax.get_ylim()[0] >= -40
+    assert [label.get_text() for label in ax.get_yticklabels()] == ["lot 0", "lot 2000", f"lot {10 ** 14}"]
+
+
+def test_downsampling_sparse_lots():
+    ax = draw(numpy.repeat(numpy.arange(0, 30000, 3) * 7, 2), max_lots=100)
+    assert ax.get_ylim()[0] >= -1.1 * 10 * 100  # 100 rows, and the margin of the axes
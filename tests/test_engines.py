@@ -0,0 +1,100 @@
+"""
+The fast engine gives exactly the same results as the default (SimPy) engine, see PyCh.reference.conformance.
+"""
+import pytest
+from PyCh import Environment, Channel, process
+from PyCh.reference.conformance import CASES, first_difference
+
+
+@pytest.mark.parametrize("name, model, kwargs", CASES, ids=[case[0] for case in CASES])
+def test_reference_models_are_identical(name, model, kwargs):
+    for seed in (1, 2):
+        simpy_exits = model(seed=seed, engine="simpy", **kwargs)
+        fast_exits = model(seed=seed, engine="fast", **kwargs)
+        assert simpy_exits == fast_exits, first_difference(simpy_exits, fast_exits)
+
+
+def run_interrupted(engine):
+    env = Environment(engine=engine)
+    c = Channel(env)
+    log = []
+
+    @process
+    def Waiter(env):
+        try:
+            yield env.execute(c.receive())
+        except Exception as e:
+            log.append((env.now, type(e).__name__))
+        value = yield env.select(c.receive(), timeout=2)
+        log.append((env.now, value))
+
+    @process
+    def Interrupter(env, waiter):
+        yield env.timeout(1)
+        waiter.interrupt("stop")
+
+    Interrupter(env, Waiter(env))
+    env.run()
+    return log
+
+
+def test_interrupts_and_timeouts_are_identical():
+    assert run_interrupted("fast") == run_interrupted("simpy") == [(1, "Interrupt"), (3, None)]
+
+
+def test_step_handles_hops():
+    # RealTime drives the environment with step(), which must also handle the zero-delay hops of the fast engine
+    logs = []
+    for engine in ("simpy", "fast"):
+        env = Environment(engine=engine)
+        c = Channel(env)
+        log = []
+
+        @process
+        def Sender(env):
+            for i in range(3):
+                yield env.execute(c.send(i))
+                log.append(("sent", i, env.now))
+
+        @process
+        def Receiver(env):
+            for i in range(3):
+                x = yield env.execute(c.receive())
+                log.append(("received", x, env.now))
+                yield env.timeout(1)
+
+        Sender(env)
+        Receiver(env)
+        while env.peek() < float("inf"):
+            env.step()
+        logs.append(log)
+    assert logs[0] == logs[1]
+    assert len(logs[0]) == 6
+
+
+def run_until_a_process(engine):
+    env = Environment(engine=engine)
+    log = []
+
+    @process
+    def Worker(env):
+        yield env.timeout(3)
+        return "done"
+
+    @process
+    def Watcher(env, worker):
+        value = yield worker
+        log.append((env.now, value))
+
+    worker = Worker(env)
+    Watcher(env, worker)
+    env.run(until=worker)
+    log.append((env.now, env.peek()))
+    env.run()
+    return log
+
+
+def test_run_until_resumes_the_remaining_callbacks():
+    # as simpy.Environment.step(), the callbacks after the one which stops the run are kept, and handled by the
+    # next run; the until event is scheduled again for that, so peek() gives the current time
+    assert run_until_a_process("fast") == run_until_a_process("simpy") == [(3, 3), (3, "done")]
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def run(code):
+    """ Runs code in a new Python process, with PyCh on the path, and gives its output"""
+    env = dict(os.environ, PYTHONPATH=SRC, MPLBACKEND="agg")
+    return subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+
+
+def test_import_does_not_import_matplotlib():
+    assert run("import sys, PyCh; print('matplotlib' in sys.modules)").strip() == "False"
+
+
+def test_star_import_gives_plot_utilities():
+    output = run("from PyCh import *; print(plt.__name__, draw_lot_time_diagram.__name__, LivePlot.__name__, sqrt(4))")
+    assert output.split() == ["matplotlib.pyplot", "draw_lot_time_diagram", "LivePlot", "2.0"]
+
+
+def test_star_import_gives_only_the_listed_names():
+    output = run("import PyCh; from PyCh import *; names = set(dir()); "
+                 "print(sorted(set(PyCh.__all__) - names), "
+                 "sorted(name for name in ['core', 'experiments', 'utilities', 'plot_utilities', 'math'] "
+                 "if name in names))")
+    assert output.strip() == "[] []"
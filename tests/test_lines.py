@@ -0,0 +1,40 @@
+"""
+The vectorized recursions of a Line give the same times as the event-driven simulation of the same line.
+"""
+import numpy
+import pytest
+from PyCh.core.lines import Line, Generator, Buffer, Server, Exit
+
+LINES = {
+    "unlimited buffers": Line(Generator(1.0), Buffer(), Server(0.8), Buffer(), Server(0.9), Exit()),
+    "finite buffers": Line(Generator(1.0), Buffer(2), Server(0.9), Buffer(1), Server(0.95), Server(0.7), Exit()),
+    "parallel servers": Line(Generator(1.0), Buffer(), Server(2.5, servers=3), Buffer(), Server(0.9), Exit()),
+    "constant times": Line(Generator(1.0, "constant"), Buffer(3), Server(1.0, distribution="constant"), Exit()),
+}
+
+
+@pytest.mark.parametrize("engine", ["simpy", "fast"])
+@pytest.mark.parametrize("name", list(LINES))
+def test_vectorized_equals_event_driven(name, engine):
+    for seed in (1, 2):
+        assert LINES[name].cross_check(2000, seed, engine) < 1e-9
+
+
+def test_all_times_agree():
+    line = LINES["finite buffers"]
+    times = line.sample(1000, seed=3)
+    vectorized = line.solve(1000, times=times)
+    event = line.simulate(1000, times=times)
+    numpy.testing.assert_allclose(vectorized.entry, event.entry, atol=1e-9)
+    for v, e in zip(vectorized.departures, event.departures):
+        numpy.testing.assert_allclose(v, e, atol=1e-9)
+
+
+def test_parallel_servers_next_to_a_finite_buffer_are_simulated():
+    line = Line(Generator(1.0), Buffer(2), Server(2.5, servers=3), Exit())
+    assert not line.vectorizable
+    with pytest.raises(ValueError):
+        line.solve(100, seed=1)
+    result = line.run(100, seed=1)
+    assert result.method == "event"
+    assert numpy.all(result.exit >= result.entry)
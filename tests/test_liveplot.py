@@ -0,0 +1,35 @@
+import matplotlib
+matplotlib.use("agg")
+import numpy
+import pytest
+from PyCh.utilities.liveplot import LivePlot, downsample
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        LivePlot(capacity=0)
+
+
+def test_first_sample_is_drawn_at_once():
+    plot = LivePlot(interval=60)
+    plot.update(0.0, 1.0)
+    assert list(plot.line.get_ydata()) == [1.0]
+    plot.update(1.0, 2.0)  # within the interval, not drawn yet
+    assert list(plot.line.get_ydata()) == [1.0]
+
+
+def test_ring_buffer_keeps_last_samples():
+    plot = LivePlot(live=False, capacity=3)
+    for i in range(5):
+        plot.update(i, 10 * i)
+    assert list(plot.x_data) == [2, 3, 4]
+    assert list(plot.y_data) == [20, 30, 40]
+
+
+def test_downsample_keeps_extremes():
+    x = numpy.arange(10000.0)
+    y = numpy.sin(x / 100.0)
+    y[5000] = 10.0
+    dx, dy = downsample(x, y, 200)
+    assert len(dx) <= 200
+    assert dy.max() == 10.0 and dx[-1] == x[-1]
@@ -0,0 +1,81 @@
+"""
+A partitioned model gives exactly the same results with any number of processes, see PyCh.core.partition.
+"""
+import pytest
+from PyCh import Channel, process
+from PyCh.core.partition import PartitionedModel
+from PyCh.reference.models import Generator, Buffer, Server
+
+
+@process
+def Forward(env, c_in, c_out):
+    while True:
+        x = yield env.execute(c_in.receive())
+        yield env.execute(c_out.send(x))
+
+
+@process
+def Exit(env, c_in, exits):
+    while True:
+        x = yield env.execute(c_in.receive())
+        exits.append((env.now, env.now - x))
+
+
+def area(env, k, links, stations, ts):
+    if k == 0:
+        a = Channel(env)
+        Generator(env, a, 1.0, env.stream("generator"))
+    else:
+        a = links[k - 1].receiver(env)
+    for j in range(stations):
+        b = Channel(env)
+        c = Channel(env)
+        Buffer(env, a, b)
+        for s in range(2):
+            Server(env, b, c, ts, env.stream(f"server {k} {j} {s}"))
+        a = c
+    if k < len(links):
+        Forward(env, a, links[k].sender(env))
+        return None
+    exits = []
+    Exit(env, a, exits)
+    return exits
+
+
+def factory(areas=4, stations=3, ts=1.7, engine="simpy"):
+    model = PartitionedModel(seed=7, engine=engine)
+    links = [model.link(f"area {k}", lookahead=0.25) for k in range(areas - 1)]
+    for k in range(areas):
+        model.partition(f"area {k}", area, k, links, stations, ts)
+    return model
+
+
+@pytest.mark.parametrize("engine", ["simpy", "fast"])
+def test_results_do_not_depend_on_the_processes(engine):
+    results = [factory(engine=engine).run(until=1000, processes=processes) for processes in (1, 2, 4)]
+    exits = [r["area 3"] for r in results]
+    assert len(exits[0]) > 500
+    assert exits[1] == exits[0]
+    assert exits[2] == exits[0]
+    assert results[0]["area 0"] is None
+
+
+def test_results_do_not_depend_on_the_window():
+    r1 = factory().run(until=1000, processes=1, window=0.1)
+    r2 = factory().run(until=1000, processes=3, window=7)
+    assert r1["area 3"] == r2["area 3"]
+
+
+def test_engines_are_identical():
+    assert factory(engine="simpy").run(until=1000, processes=1) == factory(engine="fast").run(until=1000, processes=1)
+
+
+def test_invalid_models():
+    with pytest.raises(ValueError):
+        PartitionedModel().run(until=10)
+    with pytest.raises(ValueError):
+        PartitionedModel().link("zero", lookahead=0)
+    model = PartitionedModel()
+    model.partition("a", area, 0, [], 1, 1.0)
+    with pytest.raises(ValueError):
+        model.partition("a", area, 0, [], 1, 1.0)
@@ -0,0 +1,95 @@
+"""
+Persistent send and receive ports give the same results as fresh communication events, see PyCh.core.channel.
+"""
+import pytest
+from PyCh import Environment, Channel, process
+
+ENGINES = ["simpy", "fast"]
+
+
+def line(engine, ports, N=500):
+    """ A generator, two parallel servers (chosen at random) and an exit, with ports or with fresh events"""
+    env = Environment(seed=3, engine=engine)
+    a, b = Channel(env), Channel(env)
+    exits = []
+
+    @process
+    def Generator(env):
+        out = a.send_port() if ports else None
+        for i in range(N):
+            yield env.timeout(env.stream("arrivals").exponential(1.0))
+            yield env.execute(out.send(i) if ports else a.send(i))
+
+    @process
+    def Server(env, name):
+        c_in = a.receive_port() if ports else None
+        c_out = b.send_port() if ports else None
+        while True:
+            x = yield env.execute(c_in.receive() if ports else a.receive())
+            yield env.timeout(env.stream(name).exponential(1.8))
+            yield env.execute(c_out.send((x, name)) if ports else b.send((x, name)))
+
+    @process
+    def Exit(env):
+        c_in = b.receive_port() if ports else None
+        for _ in range(N):
+            x = yield env.execute(c_in.receive() if ports else b.receive())
+            exits.append((env.now, x))
+
+    Generator(env)
+    Server(env, "server 1")
+    Server(env, "server 2")
+    env.run(until=Exit(env))
+    return exits
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ports_equal_fresh_events(engine):
+    exits = line(engine, ports=True)
+    assert len(exits) == 500
+    assert exits == line(engine, ports=False)
+    assert {name for _, (_, name) in exits} == {"server 1", "server 2"}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_port_in_select_statements(engine):
+    env = Environment(engine=engine)
+    a, b = Channel(env), Channel(env)
+    received = []
+
+    @process
+    def Sender(env, c, entities):
+        for x in entities:
+            yield env.timeout(1)
+            yield env.execute(c.send(x))
+
+    @process
+    def Receiver(env):
+        pa, pb = a.receive_port(), b.receive_port()
+        for _ in range(6):
+            select = env.select(pa.receive(), pb.receive(), timeout=10)
+            x = yield select
+            received.append((env.now, x, select.selected is pa))
+
+    Sender(env, a, "abc")
+    Sender(env, b, [1, 2])
+    Receiver(env)
+    env.run()
+    assert sorted(str(x) for _, x, _ in received if x is not None) == ["1", "2", "a", "b", "c"]
+    assert all(from_a == isinstance(x, str) for _, x, from_a in received if x is not None)
+    assert received[-1][1] is None  # the last select statement timed out
+
+
+def test_port_cannot_be_rearmed_while_communicating():
+    env = Environment()
+    a = Channel(env)
+    port = a.send_port()
+
+    @process
+    def Sender(env):
+        yield env.execute(port.send(1))
+
+    Sender(env)
+    env.run()
+    with pytest.raises(ValueError, match="still communicating"):
+        port.send(2)
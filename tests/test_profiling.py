@@ -0,0 +1,68 @@
+import pytest
+import simpy
+from PyCh import Environment, Channel, process
+
+
+@process
+def Ticker(env, n):
+    for i in range(n):
+        yield env.timeout(1)
+
+
+@process
+def Sender(env, c_out):
+    yield env.execute(c_out.send(1))
+
+
+@process
+def Receiver(env, c_in):
+    yield env.execute(c_in.receive())
+
+
+@pytest.mark.parametrize("engine", ["simpy", "fast"])
+def test_counts_of_a_small_model(engine, capsys):
+    env = Environment(profile=True, engine=engine)
+    c = Channel(env)
+    Ticker(env, 3)
+    Ticker(env, 2)
+    Sender(env, c)
+    Receiver(env, c)
+    env.run()
+    profiles = {name: (p.processes, p.resumes, p.events) for name, p in env.profiler.profiles.items()}
+    # a ticker is resumed at its start and after every timeout, and schedules its timeouts
+    assert profiles["Ticker"] == (2, 4 + 3, 3 + 2)
+    # the receiver finds the waiting sender, and schedules the events of both
+    assert profiles["Sender"] == (1, 2, 0)
+    assert profiles["Receiver"] == (1, 2, 2)
+    # the starts and ends of the 4 processes, and the receiver's event scheduled one step later
+    assert env.profiler.other.events == 4 + 4 + 1
+    table = capsys.readouterr().out
+    assert "Ticker" in table and "(other)" in table
+
+
+def test_interrupt_is_passed_to_the_process(capsys):
+    env = Environment(profile=True)
+    log = []
+
+    @process
+    def Waiter(env):
+        try:
+            yield env.timeout(10)
+        except simpy.Interrupt as interrupt:
+            log.append((env.now, interrupt.cause))
+        yield env.timeout(1)
+        log.append(env.now)
+        return "done"
+
+    @process
+    def Interrupter(env, victim):
+        yield env.timeout(2)
+        victim.interrupt("stop")
+        value = yield victim
+        log.append(value)
+
+    waiter = Waiter(env)
+    Interrupter(env, waiter)
+    env.run()
+    assert log == [(2, "stop"), 3, "done"]
+    assert env.profiler.profiles["Waiter"].resumes == 3
@@ -0,0 +1,151 @@
+"""
+The real-time mode runs a model inside asyncio, with bridges to coroutines, see PyCh.core.realtime.
+"""
+import asyncio
+import time
+import pytest
+from PyCh import Environment, Channel, process, RealTime, SinkReader, Trace
+from PyCh.core.deadlock import DeadlockError
+
+
+def machine_model(engine="simpy", **kwargs):
+    env = Environment(seed=1, engine=engine, **kwargs)
+    a = Channel(env, name="a")
+    b = Channel(env, name="b")
+
+    @process
+    def Machine(env):
+        while True:
+            x = yield env.execute(a.receive())
+            yield env.timeout(2)
+            yield env.execute(b.send((x, env.now)))
+
+    Machine(env)
+    return env, a, b
+
+
+async def control(orders, done, lots=3):
+    results = []
+    for i in range(lots):
+        await asyncio.sleep(0.03)
+        await orders.send(i)
+        results.append(await done.receive())
+    orders.close()
+    return results
+
+
+@pytest.mark.parametrize("engine", ["simpy", "fast"])
+def test_bridges(engine):
+    env, a, b = machine_model(engine)
+    rt = RealTime(env, scale=0.01)
+    orders, done = rt.input(a), rt.output(b)
+
+    async def main():
+        return (await asyncio.gather(rt.run(until=20), control(orders, done)))[1]
+
+    results = asyncio.run(main())
+    assert [x for x, _ in results] == [0, 1, 2]
+    # an order arrives at the current wall-clock time (after at least 3 time units), and takes 2 time units
+    assert results[0][1] >= 5
+    assert all(t2 >= t1 + 2 for (_, t1), (_, t2) in zip(results, results[1:]))
+    assert env.now == 20
+    assert rt.lag.count > 0
+
+
+def test_run_ahead():
+    env, a, b = machine_model()
+
+    @process
+    def Ticker(env):
+        while True:
+            yield env.timeout(1)
+
+    Ticker(env)
+    rt = RealTime(env, scale=0.01, run_ahead=True)
+    orders = rt.input(a)
+    orders.hold(5000)
+    start = time.perf_counter()
+    asyncio.run(rt.run(until=5100))
+    # 5000 time units are run ahead at full speed, the last 100 take 1 s
+    assert env.now == 5100
+    assert time.perf_counter() - start < 10
+
+
+def test_strict_lag():
+    env = Environment()
+
+    @process
+    def Slow(env):
+        while True:
+            time.sleep(0.05)
+            yield env.timeout(1)
+
+    Slow(env)
+    rt = RealTime(env, scale=0.01, max_lag=0.02, strict=True)
+    with pytest.raises(RuntimeError, match="lags"):
+        asyncio.run(rt.run(until=10))
+
+
+def test_sink_and_trace_are_flushed(tmp_path):
+    env, a, b = machine_model(trace=str(tmp_path / "run.trace"))
+    sink = env.sink("lots", {"lot": "i8", "time": "f8"}, str(tmp_path / "lots"))
+
+    @process
+    def Exit(env, c_in, c_out):
+        while True:
+            x, t = yield env.execute(c_in.receive())
+            sink.append(x, t)
+            yield env.execute(c_out.send(x))
+
+    c = Channel(env, name="c")
+    Exit(env, b, c)
+    rt = RealTime(env, scale=0.01)
+    orders, done = rt.input(a), rt.output(c)
+
+    async def main():
+        await asyncio.gather(rt.run(until=20), control(orders, done))
+
+    asyncio.run(main())
+    assert list(SinkReader(str(tmp_path / "lots"))["lot"]) == [0, 1, 2]
+    assert len(Trace(str(tmp_path / "run.trace")).channel("a")) == 3
+
+
+def test_flushed_after_an_error(tmp_path):
+    env = Environment()
+    sink = env.sink("values", {"x": "f8"}, str(tmp_path / "values"))
+
+    @process
+    def Failing(env):
+        for i in range(3):
+            sink.append(i)
+            yield env.timeout(1)
+        raise ValueError("failed")
+
+    Failing(env)
+    with pytest.raises(ValueError):
+        asyncio.run(RealTime(env, scale=0.001).run(until=10))
+    assert list(SinkReader(str(tmp_path / "values"))["x"]) == [0, 1, 2]
+
+
+def test_waiting_for_a_bridge_is_no_deadlock():
+    env, a, b = machine_model(detect_deadlock=True)
+    rt = RealTime(env, scale=0.01)
+    orders, done = rt.input(a), rt.output(b)
+
+    async def main():
+        return (await asyncio.gather(rt.run(until=20), control(orders, done)))[1]
+
+    assert [x for x, _ in asyncio.run(main())] == [0, 1, 2]
+    assert env.now == 20
+
+
+def test_deadlock_after_the_bridges_are_closed():
+    env, a, b = machine_model(detect_deadlock=True)
+    rt = RealTime(env, scale=0.01)
+    orders, done = rt.input(a), rt.output(b)
+
+    async def main():
+        await asyncio.gather(rt.run(), control(orders, done))
+
+    with pytest.raises(DeadlockError, match="receiving from channel 'a'"):
+        asyncio.run(main())
@@ -0,0 +1,159 @@
+"""
+The order in which the sender and the receiver of a communication continue, also relative to a bystander
+process which continues after delays of zero at the same time.
+
+The original implementation (version 2.1) resumed the receiver with a helper process, 2 to 4 steps after the sender
+depending on the use of select statements; BASELINE holds the orders which it gives. Now the receiver continues one
+zero-delay step after the sender, in the same order for execute and select (a deliberate change, see
+PyCh.core.channel). What both have in common is checked as well.
+"""
+import pytest
+from PyCh import Environment, Channel
+
+ENGINES = ["simpy", "fast"]
+
+
+def run(engine, *processes):
+    """ Runs processes, given as functions of (env, log, channel), and gives the log"""
+    env = Environment(engine=engine)
+    a = Channel(env)
+    log = []
+    for p in processes:
+        env.process(p(env, log, a))
+    env.run()
+    return log
+
+
+def sender(env, log, a):
+    log.append("P start")
+    yield env.execute(a.send(1))
+    log.append("P sent")
+    yield env.timeout(0)
+    log.append("P zero")
+
+
+def receiver(env, log, a):
+    log.append("Q start")
+    x = yield env.execute(a.receive())
+    log.append(f"Q got {x}")
+    yield env.timeout(0)
+    log.append("Q zero")
+
+
+def select_sender(env, log, a):
+    log.append("P start")
+    yield env.select(a.send(1), Channel(env).send(2))
+    log.append("P sent")
+    yield env.timeout(0)
+    log.append("P zero")
+
+
+def select_receiver(env, log, a):
+    log.append("Q start")
+    x = yield env.select(a.receive(), Channel(env).receive())
+    log.append(f"Q got {x}")
+    yield env.timeout(0)
+    log.append("Q zero")
+
+
+def bystander(env, log, a):
+    for i in range(6):
+        log.append(f"R {i}")
+        yield env.timeout(0)
+
+
+# The orders of version 2.1, for (send, receive), after "Q start" and "P start" (in the order of starting)
+BASELINE = {
+    (sender, receiver):
+        ["R 0", "R 1", "P sent", "R 2", "P zero", "R 3", "Q got 1", "R 4", "Q zero", "R 5"],
+    (select_sender, receiver):
+        ["R 0", "R 1", "R 2", "R 3", "P sent", "Q got 1", "R 4", "P zero", "Q zero", "R 5"],
+    (sender, select_receiver):
+        ["R 0", "R 1", "P sent", "R 2", "P zero", "R 3", "R 4", "R 5", "Q got 1", "Q zero"],
+    (select_sender, select_receiver):
+        ["R 0", "R 1", "R 2", "R 3", "P sent", "R 4", "P zero", "R 5", "Q got 1", "Q zero"],
+}
+
+# The order now, which is the same for all combinations of execute and select
+EXPECTED = ["R 0", "P sent", "R 1", "P zero", "Q got 1", "R 2", "Q zero", "R 3", "R 4", "R 5"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("send, receive", list(BASELINE))
+@pytest.mark.parametrize("receiver_first", [True, False])
+def test_sender_continues_before_receiver(engine, send, receive, receiver_first):
+    processes = [receive, send, bystander] if receiver_first else [send, receive, bystander]
+    log = run(engine, *processes)
+    start = ["Q start", "P start"] if receiver_first else ["P start", "Q start"]
+    assert log == start + EXPECTED
+
+
+@pytest.mark.parametrize("send, receive", list(BASELINE))
+def test_common_order_with_baseline(send, receive):
+    baseline = BASELINE[send, receive]
+    for log in (baseline, EXPECTED):
+        # The sender continues before the receiver, and the bystander does not have to wait for them
+        assert log.index("P sent") < log.index("Q got 1")
+        assert log.index("R 0") < log.index("P sent")
+        # Every process keeps its own order
+        assert [line for line in log if line.startswith("R")] == [f"R {i}" for i in range(6)]
+    assert sorted(baseline) == sorted(EXPECTED)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_chain_order(engine):
+    env = Environment(engine=engine)
+    a = Channel(env)
+    b = Channel(env)
+    log = []
+
+    def first():
+        for i in range(2):
+            yield env.execute(a.send(i))
+            log.append(f"P sent {i}")
+
+    def middle():
+        for i in range(2):
+            x = yield env.execute(a.receive())
+            log.append(f"M got {x}")
+            yield env.execute(b.send(x))
+            log.append(f"M sent {x}")
+
+    def last():
+        for i in range(2):
+            x = yield env.execute(b.receive())
+            log.append(f"Q got {x}")
+
+    env.process(last())
+    env.process(middle())
+    env.process(first())
+    env.run()
+    assert log == ["P sent 0", "M got 0", "M sent 0", "P sent 1", "Q got 0", "M got 1", "M sent 1", "Q got 1"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_polling_does_not_starve_receiver(engine):
+    # A process which polls with timeout(0) must not postpone the receiver indefinitely
+    # (the original implementation resumed the receiver after 3 polls)
+    done = []
+    polls = []
+
+    def send(env, log, a):
+        yield env.timeout(1)
+        yield env.execute(a.send(1))
+
+    def receive(env, log, a):
+        yield env.execute(a.receive())
+        done.append(env.now)
+
+    def poll(env, log, a):
+        yield env.timeout(1)
+        n = 0
+        while not done and n < 1000:
+            yield env.timeout(0)
+            n += 1
+        polls.append(n)
+
+    run(engine, send, receive, poll)
+    assert done == [1]
+    assert polls[0] <= 3
@@ -0,0 +1,50 @@
+import numpy
+import pytest
+from PyCh import replicate, replicate_until
+
+
+def model(seed=None):
+    return {"global": numpy.random.random(), "seed": seed % 1000}
+
+
+def test_global_random_state_is_restored():
+    numpy.random.seed(5)
+    expected = numpy.random.random()
+    numpy.random.seed(5)
+    replicate(model, 3, processes=1)
+    assert numpy.random.random() == expected
+
+
+def test_parallel_equals_serial():
+    serial = replicate(model, 4, seed=1, processes=1)
+    parallel = replicate(model, 4, seed=1, processes=2)
+    for name in serial.names:
+        assert numpy.array_equal(serial[name], parallel[name])
+
+
+def normal_model(seed=None):
+    return {"x": numpy.random.normal(10.0, 1.0), "y": numpy.random.normal(0.0, 100.0)}
+
+
+def test_replicate_until_stops_at_the_target():
+    result = replicate_until(normal_model, absolute=0.3, metrics="x", processes=1, batch=5)
+    assert result.converged
+    assert result.half_width("x") <= 0.3
+    # the batch before the last one was not precise enough
+    n = len(result)
+    assert n > 10 and (n - 10) % 5 == 0
+    earlier = replicate(normal_model, n - 5, processes=1)
+    assert earlier.half_width("x") > 0.3
+    assert numpy.array_equal(earlier["x"], result["x"][:n - 5])
+
+
+def test_replicate_until_stops_at_max_replications():
+    result = replicate_until(normal_model, relative=0.001, processes=1, min_replications=4, max_replications=12,
+                             batch=5)
+    assert not result.converged
+    assert len(result) == 12  # 4, then 5, then the 3 which are left
+
+
+def test_replicate_until_needs_a_target():
+    with pytest.raises(ValueError):
+        replicate_until(normal_model, processes=1)
@@ -0,0 +1,108 @@
+"""
+Select statements with a timeout, and the choice between ready alternatives, see PyCh.core.selection.
+"""
+import pytest
+from PyCh import Environment, Channel, process
+
+ENGINES = ["simpy", "fast"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_timeout(engine):
+    env = Environment(engine=engine)
+    a = Channel(env)
+    log = []
+
+    @process
+    def Waiter(env):
+        select = env.select(a.receive(), timeout=5)
+        value = yield select
+        log.append((env.now, value, select.timed_out))
+        # the alternative is unregistered, so a later sender waits for a new receiver
+        x = yield env.execute(a.receive())
+        log.append((env.now, x))
+
+    @process
+    def Sender(env):
+        yield env.timeout(7)
+        yield env.execute(a.send(1))
+
+    Waiter(env)
+    Sender(env)
+    env.run()
+    assert log == [(5, None, True), (7, 1)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_timeout_does_not_advance_the_time_after_a_selection(engine):
+    env = Environment(engine=engine)
+    a = Channel(env)
+    log = []
+
+    @process
+    def Waiter(env):
+        for _ in range(3):
+            select = env.select(a.receive(), timeout=100)
+            x = yield select
+            log.append((env.now, x, select.timed_out))
+
+    @process
+    def Sender(env):
+        for i in range(3):
+            yield env.timeout(1)
+            yield env.execute(a.send(i))
+
+    Waiter(env)
+    Sender(env)
+    env.run()
+    assert log == [(1, 0, False), (2, 1, False), (3, 2, False)]
+    assert env.now == 3
+    assert env.peek() == float("inf")
+
+
+def test_cancel_keeps_the_event_queue_ordered():
+    env = Environment()
+    timeouts = [env.timeout(t) for t in (5, 1, 4, 2, 3)]
+    env.cancel(timeouts[2])
+    env.cancel(timeouts[2])  # no longer scheduled
+    times = []
+    while env.peek() < float("inf"):
+        env.step()
+        times.append(env.now)
+    assert times == [1, 2, 3, 5]
+
+
+def test_same_channel_for_send_and_receive():
+    env = Environment()
+    a = Channel(env)
+    with pytest.raises(ValueError, match="cannot send to itself"):
+        env.select(a.send(1), a.receive())
+
+
+def ready_choice(seed, engine="simpy"):
+    """ Gives the alternative which a select statement chooses when both are ready"""
+    env = Environment(seed=seed, engine=engine)
+    a, b = Channel(env), Channel(env)
+    chosen = []
+
+    @process
+    def Sender(env, c, entity):
+        yield env.execute(c.send(entity))
+
+    @process
+    def Chooser(env):
+        yield env.timeout(1)
+        chosen.append((yield env.select(a.receive(), b.receive())))
+
+    Sender(env, a, "a")
+    Sender(env, b, "b")
+    Chooser(env)
+    env.run()
+    return chosen[0]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_random_choice_between_ready_alternatives(engine):
+    choices = [ready_choice(seed, engine) for seed in range(40)]
+    assert set(choices) == {"a", "b"}
+    assert choices == [ready_choice(seed) for seed in range(40)]
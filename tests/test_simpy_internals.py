@@ -0,0 +1,77 @@
+"""
+The fast engine (PyCh.core.fast) and Environment.cancel() use internals of SimPy, which are not part of its API.
+These tests fail when a SimPy version changes them, see the SimPy versions allowed by setup.py.
+"""
+import itertools
+import simpy
+from simpy.core import StopSimulation
+from simpy.events import Event, Process, Initialize, Interruption, Timeout, PENDING, NORMAL, URGENT
+
+
+def test_event_queue_entries():
+    env = simpy.Environment()
+    timeout = env.timeout(2, value="x")
+    event = env.event()
+    env.schedule(event, URGENT, 1)
+    # the queue is a heap of (time, priority, event id, event)
+    assert type(env._queue) is list
+    assert sorted(env._queue) == [(1, URGENT, 1, event), (2, NORMAL, 0, timeout)]
+    assert type(env._eid) is itertools.count
+    assert repr(env._eid) == "count(2)"  # see Environment.event_count()
+    assert next(env._eid) == 2
+    assert env._now == 0
+    assert (NORMAL, URGENT) == (1, 0)
+
+
+def test_event_attributes():
+    env = simpy.Environment()
+    event = env.event()
+    assert event._value is PENDING and event.callbacks == []
+    event.succeed(3)
+    assert (event._ok, event._value) == (True, 3)
+    failed = env.event()
+    failed.fail(ValueError("failed"))
+    assert failed._ok is False and isinstance(failed._value, ValueError)
+    assert not hasattr(failed, "_defused")
+    failed.defused = True
+    assert failed._defused is True
+    timeout = Timeout(env, 2, "x")
+    assert (timeout._ok, timeout._value, timeout._delay) == (True, "x", 2)
+
+
+def test_process_attributes():
+    env = simpy.Environment()
+    log = []
+
+    def generator(env):
+        log.append(env._active_proc)
+        try:
+            yield env.timeout(1)
+        except simpy.Interrupt as interrupt:
+            log.append(interrupt.cause)
+
+    process = Process(env, generator(env))
+    assert isinstance(process._target, Initialize)
+    assert process._generator.__name__ == "generator"
+    assert process._target.callbacks == [process._resume]
+    env.step()
+    assert log == [process] and env._active_proc is None
+    assert isinstance(process._target, Timeout)
+    assert issubclass(Interruption, Event)
+    Interruption(process, "cause")
+    env.run()
+    assert log == [process, "cause"]
+    assert process._ok is True and process._target is None
+
+
+def test_stop_simulation_keeps_the_remaining_callbacks():
+    env = simpy.Environment()
+    log = []
+    event = env.timeout(1)
+    event.callbacks.append(StopSimulation.callback)
+    event.callbacks.append(log.append)
+    env.run()
+    # the event is scheduled again (before all other events), with the callbacks which were not called
+    assert log == [] and env._queue == [(1, -1, 1, event)] and event.callbacks == [log.append]
+    env.run()
+    assert log == [event]
@@ -0,0 +1,106 @@
+"""
+The records of a result sink are read back by a SinkReader, see PyCh.core.sink.
+"""
+import numpy
+import pytest
+from PyCh import Environment, Channel, process, ResultSink, SinkReader, replicate
+
+COLUMNS = {"lot": "i8", "location": "i4", "start": "f8", "end": "f8"}
+
+
+@pytest.mark.parametrize("format", ["npy", "npz"])
+def test_round_trip(tmp_path, format):
+    path = str(tmp_path / "lots")
+    lots = numpy.arange(1000)
+    with ResultSink("lots", COLUMNS, path, chunk_size=64, format=format) as sink:
+        for i in lots[:500]:
+            sink.append(i, i % 3, 0.5 * i, i + 1.0)
+        rest = lots[500:]
+        sink.extend(rest, rest % 3, 0.5 * rest, rest + 1.0)
+    result = SinkReader(path)
+    assert len(result) == 1000
+    assert result.columns == list(COLUMNS)
+    assert result["lot"].dtype == numpy.dtype("i8")
+    numpy.testing.assert_array_equal(result["lot"], lots)
+    numpy.testing.assert_array_equal(result["location"], lots % 3)
+    numpy.testing.assert_array_equal(result["end"], lots + 1.0)
+    chunks = list(result.chunks(columns=["start"]))
+    assert [len(chunk["start"]) for chunk in chunks] == [64] * 15 + [40]
+    numpy.testing.assert_array_equal(numpy.concatenate([chunk["start"] for chunk in chunks]), 0.5 * lots)
+
+
+def test_append_after_close(tmp_path):
+    path = str(tmp_path / "lots")
+    sink = ResultSink("lots", COLUMNS, path, chunk_size=4)
+    sink.append(1, 0, 0.0, 1.0)
+    sink.close()
+    assert len(SinkReader(path)) == 1
+    sink.append(lot=2, location=1, start=1.0, end=2.0)
+    sink.close()
+    sink.close()
+    numpy.testing.assert_array_equal(SinkReader(path)["lot"], [1, 2])
+
+
+def test_empty_sink(tmp_path):
+    path = str(tmp_path / "lots")
+    ResultSink("lots", COLUMNS, path).close()
+    assert len(SinkReader(path)["start"]) == 0
+
+
+def test_flushed_by_run(tmp_path):
+    path = str(tmp_path / "lots")
+    env = Environment(seed=1)
+    c = Channel(env)
+    sink = env.sink("lots", COLUMNS, path, chunk_size=16)
+
+    @process
+    def Generator(env, c_out):
+        for i in range(100):
+            yield env.timeout(1)
+            yield env.execute(c_out.send(i))
+
+    @process
+    def Exit(env, c_in):
+        while True:
+            i = yield env.execute(c_in.receive())
+            sink.append(i, 0, env.now - 1, env.now)
+
+    Generator(env, c)
+    Exit(env, c)
+    env.run(until=50.5)
+    assert len(SinkReader(path)) == 50
+    env.run()
+    result = SinkReader(path)
+    numpy.testing.assert_array_equal(result["lot"], numpy.arange(100))
+    numpy.testing.assert_array_equal(result["end"], numpy.arange(1, 101))
+
+
+def model_with_sink(path=None, seed=None):
+    env = Environment(seed=seed)
+    sink = env.sink("values", {"x": "f8"}, path if path is None else f"{path}/{seed}")
+    sink.extend(env.rng.random(10))
+    env.run()
+    return float(SinkReader(sink.path)["x"].sum())
+
+
+def test_replications_need_a_path(tmp_path):
+    with pytest.raises(ValueError):
+        replicate(model_with_sink, 2, processes=1)
+    result = replicate(model_with_sink, 3, kwargs=dict(path=str(tmp_path)), processes=1)
+    assert len(set(result["value"])) == 3
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def environment_requires_a_path(seed=None):
+    return Environment(seed=seed).require_sink_path
+
+
+def test_path_requirement_is_set_for_the_environments_of_a_replication(tmp_path):
+    assert not Environment().require_sink_path
+    assert list(replicate(environment_requires_a_path, 2, processes=1)["value"]) == [True, True]
+    # the requirement ends with the replication
+    assert not Environment().require_sink_path
+    env = Environment()
+    env.sink("lots", COLUMNS, str(tmp_path / "lots")).close()
+    with pytest.raises(ValueError):
+        ResultSink("lots", COLUMNS, require_path=True)
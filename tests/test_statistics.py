@@ -0,0 +1,107 @@
+import numpy
+import pytest
+from PyCh import Environment, process, Tally, TimeWeighted, BatchMeans, confidence_interval
+from PyCh.core.statistics import mser
+
+
+def test_tally():
+    tally = Tally("x")
+    values = numpy.random.default_rng(1).normal(5.0, 2.0, 1000)
+    for value in values:
+        tally.observe(value)
+    summary = tally.summary()
+    assert summary["count"] == 1000
+    assert summary["mean"] == pytest.approx(values.mean())
+    assert summary["std"] == pytest.approx(values.std(ddof=1))
+    assert (summary["min"], summary["max"]) == (values.min(), values.max())
+    empty = Tally().summary()
+    assert empty["count"] == 0 and numpy.isnan(empty["mean"]) and numpy.isnan(empty["std"])
+
+
+def test_time_weighted():
+    env = Environment()
+    wip = env.time_weighted("wip")
+
+    @process
+    def Changes(env):
+        for value, duration in [(2, 1.0), (4, 3.0), (0, 4.0)]:
+            wip.update(value)
+            yield env.timeout(duration)
+
+    Changes(env)
+    env.run()
+    # 2 during 1, 4 during 3 and 0 during 4 time units
+    assert wip.mean == pytest.approx(14.0 / 8.0)
+    assert wip.variance == pytest.approx(52.0 / 8.0 - (14.0 / 8.0) ** 2)
+    wip.add(3)
+    assert wip.summary() == {"value": 3, "mean": wip.mean, "std": pytest.approx(wip.variance ** 0.5),
+                             "min": 0, "max": 4}
+    assert TimeWeighted(env, 1.5).mean == 1.5
+
+
+def test_confidence_interval():
+    mean, half_width = confidence_interval([1.0, 2.0, 3.0, 4.0], 0.95)
+    assert mean == 2.5
+    # t(0.975, 3) = 3.182
+    assert half_width == pytest.approx(3.182446 * (5.0 / 3.0 / 4.0) ** 0.5, rel=1e-5)
+    assert confidence_interval([1.0])[1] == numpy.inf
+
+
+def test_mser_removes_the_warm_up():
+    values = numpy.concatenate([numpy.linspace(0.0, 9.0, 10), 10.0 + numpy.random.default_rng(2).normal(0, 0.1, 90)])
+    assert 9 <= mser(values) <= 20
+    assert mser(numpy.full(50, 3.0)) == 0
+    assert mser([1.0, 2.0, 3.0]) == 0
+
+
+def test_batch_means_merges_batches():
+    batch_means = BatchMeans(batches=4, warmup=False)
+    for value in range(64):
+        batch_means.observe(float(value))
+    # 64 observations in 4 to 8 batches: 8 batches of 8 are merged into 4 batches of 16
+    assert batch_means.batch_size == 16
+    assert batch_means.means == [7.5, 23.5, 39.5, 55.5]
+    assert batch_means.mean == 31.5
+    assert batch_means.summary()["count"] == 64
+
+
+def ar1_model(phi, seed, **precision):
+    """ Observes an AR(1) series with mean 10, starting at 0, until the batch means interval is precise"""
+    env = Environment(seed=seed)
+    batch_means = env.batch_means("x")
+    rng = numpy.random.default_rng(seed)
+
+    @process
+    def Series(env):
+        x = 0.0
+        while True:
+            x = 10.0 + phi * (x - 10.0) + rng.normal()
+            batch_means.observe(x)
+            yield env.timeout(1)
+
+    Series(env)
+    mean, half_width = env.run(until=batch_means.until_precise(**precision))
+    return batch_means, mean, half_width
+
+
+def test_batch_means_do_not_stop_early_for_correlated_observations():
+    for seed in range(5):
+        batch_means, mean, half_width = ar1_model(0.95, seed, relative=0.05)
+        # the batches are at least twice as large as the number of batches
+        assert batch_means.batch_size >= 64
+        assert batch_means.count >= 2 * 32 * 32
+        assert abs(mean - 10.0) <= 2 * half_width
+
+
+def test_batch_means_with_small_batches_stop_early():
+    batch_means, mean, half_width = ar1_model(0.95, 0, relative=0.05, min_batch_size=1)
+    assert batch_means.count < 100
+    assert not batch_means.is_precise(relative=0.05)
+
+
+def test_until_precise_requires_a_target():
+    env = Environment()
+    with pytest.raises(ValueError):
+        env.batch_means("x").until_precise()
+    with pytest.raises(ValueError):
+        BatchMeans().until_precise(relative=0.1)
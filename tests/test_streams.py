@@ -0,0 +1,57 @@
+"""
+Named random streams are reproducible and independent, see PyCh.core.streams.
+"""
+import numpy
+import pytest
+from PyCh import Environment
+
+
+def draws(stream, n=50):
+    return [stream.random() for _ in range(n)] + [stream.exponential(2.0) for _ in range(n)] + \
+           [stream.normal(1.0, 0.5) for _ in range(n)] + [stream.integers(10) for _ in range(n)]
+
+
+def test_same_seed_and_name_give_the_same_numbers():
+    assert draws(Environment(seed=7).stream("arrivals")) == draws(Environment(seed=7).stream("arrivals"))
+    assert draws(Environment(seed=7).stream("arrivals")) != draws(Environment(seed=8).stream("arrivals"))
+    assert draws(Environment(seed=7).stream("arrivals")) != draws(Environment(seed=7).stream("server"))
+
+
+def test_streams_are_independent():
+    env = Environment(seed=7)
+    first = draws(env.stream("arrivals"))
+    env = Environment(seed=7)
+    for name in ("server 1", "server 2"):  # other streams, which are created and used first
+        draws(env.stream(name))
+    assert draws(env.stream("arrivals")) == first
+
+
+def test_generator_signatures():
+    u = Environment(seed=7).stream("u")
+    assert u.random(5).shape == (5,)
+    assert u.random(2, dtype=numpy.float32).dtype == numpy.float32
+    assert u.uniform(numpy.zeros(3), numpy.ones(3)).shape == (3,)
+    assert u.exponential(numpy.array([1.0, 2.0])).shape == (2,)
+    assert u.normal(size=4).shape == (4,)
+    assert set(u.integers(1, 3, size=100, endpoint=True)) == {1, 2, 3}
+    assert u.choice(["a", "b"], p=[0.0, 1.0]) == "b"
+    assert sorted(u.choice(5, size=5, replace=False)) == [0, 1, 2, 3, 4]
+    assert 0 <= u.choice(5) < 5
+    assert u.choice(["a", "b", "c"]) in ("a", "b", "c")
+    assert u.gamma(2.0, 1.0) > 0  # drawn from the generator directly
+
+
+def test_environment_random_stream():
+    env = Environment(seed=7)
+    assert env.random.random(5).shape == (5,)
+    assert env.random.choice(["a", "b"], p=[1.0, 0.0]) == "a"
+
+
+@pytest.mark.parametrize("name", ["integers", "choice"])
+def test_served_from_the_block(name):
+    # a single draw without extra arguments takes one number of the uniform block
+    u = Environment(seed=7).stream("u")
+    v = Environment(seed=7).stream("u")
+    getattr(u, name)(4)
+    v.random()
+    assert u.random() == v.random()
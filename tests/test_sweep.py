@@ -0,0 +1,59 @@
+import importlib
+import sys
+import numpy
+import pytest
+from PyCh import sweep
+
+
+calls = []
+
+
+def model(a, b=0.0):
+    calls.append((a, b))
+    return {"y": a + b + numpy.random.random()}
+
+
+def test_cache_hits_for_equal_numpy_and_python_values(tmp_path):
+    calls.clear()
+    first = sweep(model, {"a": [1.0, 2.0], "b": [0]}, replications=2, processes=1, cache=tmp_path)
+    assert len(calls) == 4
+    calls.clear()
+    second = sweep(model, {"a": numpy.array([1.0, 2.0]), "b": [numpy.int64(0)]}, replications=2, processes=1,
+                   cache=tmp_path)
+    assert calls == []
+    assert numpy.array_equal(first["y"], second["y"])
+    # only the new point is simulated
+    sweep(model, {"a": [1.0, 2.0, 3.0], "b": [0]}, replications=2, processes=1, cache=tmp_path)
+    assert calls == [(3.0, 0), (3.0, 0)]
+
+
+def test_finished_points_are_saved_when_a_point_fails(tmp_path):
+    def failing(a):
+        if a == 3:
+            raise RuntimeError("point 3 fails")
+        calls.append(a)
+        return a
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        sweep(failing, {"a": [1, 2, 3]}, replications=2, processes=1, cache=tmp_path)
+    assert calls == [1, 1, 2, 2]
+    calls.clear()
+    table = sweep(failing, {"a": [1, 2]}, replications=2, processes=1, cache=tmp_path)
+    assert calls == []
+    assert list(table["value"]) == [1, 2]
+
+
+def test_cache_is_invalidated_when_the_model_changes(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    source = tmp_path / "sweep_model.py"
+    source.write_text("def model(a):\n    return a\n")
+    import sweep_model
+    try:
+        cache = tmp_path / "cache"
+        assert list(sweep(sweep_model.model, {"a": [1, 2]}, processes=1, cache=cache)["value"]) == [1, 2]
+        assert list(sweep(sweep_model.model, {"a": [1, 2]}, processes=1, cache=cache)["value"]) == [1, 2]
+        source.write_text("def model(a):\n    return 10 * a\n")
+        importlib.reload(sweep_model)
+        assert list(sweep(sweep_model.model, {"a": [1, 2]}, processes=1, cache=cache)["value"]) == [10, 20]
+    finally:
+        del sys.modules["sweep_model"]
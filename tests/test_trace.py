@@ -0,0 +1,115 @@
+import os
+import numpy
+import pytest
+from PyCh import Environment, Channel, Trace, process
+from PyCh.reference.models import Generator, Buffer, Server, Exit
+
+
+def line(path, N=200, engine="simpy"):
+    """ A line of a generator (which sends floats), a buffer and a server, of which the communications are traced"""
+    env = Environment(seed=1, trace=path, engine=engine)
+    a, b, c = Channel(env, name="a"), Channel(env, name="b"), Channel(env, name="c")
+    Generator(env, a, 1.0, env.stream("generator"))
+    Buffer(env, a, b)
+    Server(env, b, c, 0.9, env.stream("server"))
+    exits = []
+    env.run(until=Exit(env, c, N, exits))
+    return exits
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "run.trace")
+    line(path)
+    trace = Trace(path)
+    assert trace.channels == ["a", "b", "c"]
+    assert len(trace.channel("c")) == 200
+    assert numpy.all(numpy.diff(trace.records["time"]) >= 0)
+
+
+def test_visits_follow_one_lot(tmp_path):
+    path = str(tmp_path / "run.trace")
+    exits = line(path)
+    lot, location, start, end = Trace(path).visits()
+    # Every lot visits the buffer and the server once, so visit chains of different lots are never joined
+    numbers, counts = numpy.unique(lot, return_counts=True)
+    assert counts.max() == 2
+    assert len(numbers) >= len(exits)
+    assert numpy.all(end >= start)
+
+
+def test_entities_are_numbered_by_identity(tmp_path):
+    path = str(tmp_path / "objects.trace")
+    env = Environment(trace=path)
+    a = Channel(env)
+
+    class Lot:
+        pass
+
+    class Identified:
+        def __init__(self, id):
+            self.id = id
+
+    @process
+    def Sender(env, c_out):
+        for i in range(100):
+            yield env.execute(c_out.send(Lot()))  # freed after it is received, its id() may be reused
+        yield env.execute(c_out.send(Identified(7)))
+        yield env.execute(c_out.send(None))
+        yield env.execute(c_out.send(3))
+
+    @process
+    def Receiver(env, c_in):
+        while True:
+            yield env.execute(c_in.receive())
+
+    Sender(env, a)
+    Receiver(env, a)
+    env.run()
+    entity = list(Trace(path).records["entity"])
+    assert entity == list(range(-2, -102, -1)) + [7, -1, 3]
+    # the freed lots are forgotten, only the entities which are still referenced are kept
+    assert len(env.tracer.entities) == len(env.tracer.entity_numbers) <= 1
+
+
+def open_files():
+    """ The paths of the files which are open in this process (on Linux)"""
+    fds = "/proc/self/fd"
+    paths = []
+    for fd in os.listdir(fds):
+        try:
+            paths.append(os.readlink(os.path.join(fds, fd)))
+        except OSError:
+            pass
+    return paths
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="requires /proc")
+def test_file_is_closed_after_run(tmp_path):
+    path = str(tmp_path / "run.trace")
+    line(path, N=20)
+    assert os.path.realpath(path) not in open_files()
+    assert len(Trace(path).channel("c")) == 20
+
+
+def test_runs_append_to_the_trace(tmp_path):
+    path = str(tmp_path / "run.trace")
+    env = Environment(trace=path)
+    a = Channel(env, name="a")
+
+    @process
+    def Sender(env, c_out):
+        for i in range(10):
+            yield env.timeout(1)
+            yield env.execute(c_out.send(i))
+
+    @process
+    def Receiver(env, c_in):
+        while True:
+            yield env.execute(c_in.receive())
+
+    Sender(env, a)
+    Receiver(env, a)
+    env.run(until=5.5)
+    assert list(Trace(path).records["entity"]) == [0, 1, 2, 3, 4]
+    env.run()
+    assert list(Trace(path).records["entity"]) == list(range(10))
@@ -0,0 +1,122 @@
+"""
+The waiter structures of the matching policies of a channel, see PyCh.core.waiters.
+"""
+import numpy
+import pytest
+from PyCh import Environment, Channel, process
+from PyCh.core.waiters import RandomWaiters, FifoWaiters, PriorityWaiters, make_waiters
+
+
+class Waiter:
+    """ A stand-in for a Sender or Receiver"""
+
+    def __init__(self, name, priority=0):
+        self.name = name
+        self.priority = priority
+
+    def __repr__(self):
+        return self.name
+
+
+def picks(waiters):
+    """ Picks and removes all waiters, and gives them in the order in which they were picked"""
+    order = []
+    while len(waiters):
+        waiter = waiters.pick()
+        waiters.remove(waiter)
+        order.append(waiter)
+    return order
+
+
+def test_random_swap_remove_keeps_the_index_consistent():
+    waiters = RandomWaiters(numpy.random.default_rng(1))
+    ws = [Waiter(f"w{i}") for i in range(10)]
+    for w in ws:
+        waiters.add(w)
+    waiters.add(ws[0])  # registering twice has no effect
+    for w in (ws[3], ws[9], ws[0], ws[3]):  # the middle, the last, the first, and one which is already removed
+        waiters.remove(w)
+    assert len(waiters) == 7
+    assert set(waiters) == set(ws) - {ws[0], ws[3], ws[9]}
+    for w in waiters:
+        assert waiters.waiters[waiters.index[w]] is w
+    assert ws[3] not in waiters and ws[4] in waiters
+
+
+def test_random_picks_every_waiter():
+    waiters = RandomWaiters(numpy.random.default_rng(1))
+    ws = [Waiter(f"w{i}") for i in range(4)]
+    for w in ws:
+        waiters.add(w)
+    picked = {waiters.pick() for _ in range(200)}
+    assert picked == set(ws)
+    assert sorted(picks(waiters), key=ws.index) == ws
+
+
+def test_fifo_order():
+    waiters = FifoWaiters()
+    ws = [Waiter(f"w{i}") for i in range(5)]
+    for w in ws:
+        waiters.add(w)
+    waiters.remove(ws[0])
+    waiters.remove(ws[2])
+    waiters.add(ws[0])  # registered again, so it is last
+    assert picks(waiters) == [ws[1], ws[3], ws[4], ws[0]]
+
+
+def test_priority_ties_in_fifo_order():
+    waiters = PriorityWaiters()
+    ws = [Waiter("a", 2), Waiter("b", 1), Waiter("c", 2), Waiter("d", 1), Waiter("e", 0)]
+    for w in ws:
+        waiters.add(w)
+    assert [w.name for w in picks(waiters)] == ["e", "b", "d", "a", "c"]
+
+
+def test_priority_lazy_deletion():
+    waiters = PriorityWaiters()
+    ws = [Waiter(f"w{i}", i) for i in range(100)]
+    for w in ws:
+        waiters.add(w)
+    for w in ws[:90]:
+        waiters.remove(w)
+    # The removed entries are discarded once they outnumber the registered waiters
+    assert len(waiters) == 10
+    assert len(waiters.heap) <= 2 * len(waiters) + 16
+    assert waiters.pick() is ws[90]
+    waiters.remove(ws[95])
+    waiters.add(Waiter("first", -1))
+    assert [w.name for w in picks(waiters)] == ["first"] + [f"w{i}" for i in range(90, 100) if i != 95]
+    assert len(waiters) == 0
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError, match="Unknown matching policy"):
+        make_waiters("lifo", None)
+
+
+@pytest.mark.parametrize("engine", ["simpy", "fast"])
+@pytest.mark.parametrize("policy, expected", [
+    ("fifo", [0, 1, 2, 3]),
+    ("priority", [3, 1, 2, 0]),
+])
+def test_channel_policies(engine, policy, expected):
+    env = Environment(seed=1, engine=engine)
+    c = Channel(env, policy=policy)
+    received = []
+
+    @process
+    def Sender(env, i, priority):
+        yield env.timeout(i)
+        yield env.execute(c.send(i, priority=priority))
+
+    @process
+    def Receiver(env):
+        yield env.timeout(10)
+        for _ in range(4):
+            received.append((yield env.execute(c.receive())))
+
+    for i, priority in enumerate([5, 1, 1, 0]):
+        Sender(env, i, priority)
+    Receiver(env)
+    env.run()
+    assert received == expected